@@ -29,6 +29,61 @@ class Settings:
     QUERY_MIN_LENGTH: int = 2
     MAX_SUGGESTIONS: int = 5
 
+    # Seconds an in-memory catalog snapshot may be reused before it is
+    # reloaded from the database (0 = only reload after admin writes)
+    CATALOG_SNAPSHOT_MAX_AGE: float = float(os.getenv("CATALOG_SNAPSHOT_MAX_AGE", "60"))
+
+    # Prebuilt catalog index file (scripts/build_index_file.py) to start from
+    # instead of reading the catalog tables; ignored once the catalog changes
+    CATALOG_INDEX_FILE: str = os.getenv("CATALOG_INDEX_FILE", "")
+
+    # DutchMatcher field scorer: "heuristic" (substring/Jaccard) or "damerau"
+    MATCHER_SCORER: str = os.getenv("MATCHER_SCORER", "heuristic")
+
+    # Token similarity backend for the damerau scorer: "python" or
+    # "rapidfuzz" (batch scoring in C, falls back to python if not installed)
+    MATCHER_BACKEND: str = os.getenv("MATCHER_BACKEND", "python")
+
+    # Service matching engine for the template suggestion engine:
+    # "dutch" (DutchMatcher), "tfidf" (NumPy char n-gram TF-IDF, needs numpy)
+    # or "bm25f" (field-weighted inverted index)
+    MATCH_ENGINE: str = os.getenv("MATCH_ENGINE", "dutch")
+
+    # Worker processes the DutchMatcher catalog is sharded across
+    # (0 or 1 = match in the request process)
+    MATCH_SHARDS: int = int(os.getenv("MATCH_SHARDS", "0"))
+
+    # Service field weights for the tfidf and bm25f engines, e.g.
+    # "name=1.0,keywords=0.95,description=0.7,category=0.6" (unset fields keep these defaults)
+    MATCH_FIELD_WEIGHTS: str = os.getenv("MATCH_FIELD_WEIGHTS", "")
+
+    # Candidates each engine's retrieve phase hands to the rerank phase, e.g.
+    # "dutch=500,bm25f=200" (0 = no limit, unset engines default to 1000)
+    RETRIEVE_LIMITS: str = os.getenv("RETRIEVE_LIMITS", "")
+
+    # In-process suggestion result cache: max entries (0 = disabled) and
+    # seconds an entry is served; admin writes invalidate it immediately
+    SUGGESTION_CACHE_SIZE: int = int(os.getenv("SUGGESTION_CACHE_SIZE", "2048"))
+    SUGGESTION_CACHE_TTL: float = float(os.getenv("SUGGESTION_CACHE_TTL", "30"))
+
+    # Keystroke sessions (SuggestionRequest.session_token): sessions kept per
+    # process (0 = disabled) and seconds a session lives after its last request
+    KEYSTROKE_SESSIONS: int = int(os.getenv("KEYSTROKE_SESSIONS", "1024"))
+    KEYSTROKE_SESSION_TTL: float = float(os.getenv("KEYSTROKE_SESSION_TTL", "60"))
+
+    # Canonical query keys tracked for the raw-variant collapse metrics in
+    # /api/health (0 = disabled)
+    CANONICAL_QUERY_KEYS: int = int(os.getenv("CANONICAL_QUERY_KEYS", "4096"))
+
+    # Query complexity caps: words kept and characters kept per word (0 = no
+    # cap); a capped query is answered with partial=true
+    QUERY_MAX_WORDS: int = int(os.getenv("QUERY_MAX_WORDS", "12"))
+    QUERY_MAX_WORD_LENGTH: int = int(os.getenv("QUERY_MAX_WORD_LENGTH", "40"))
+
+    # CPU milliseconds a suggestion request may spend matching (0 = no
+    # budget); when it runs out the best results so far are returned, partial
+    MATCH_BUDGET_MS: float = float(os.getenv("MATCH_BUDGET_MS", "50"))
+
     # Suggestion Engine (template requires database, koop uses external API)
     # KOOP API not accessible from Vercel, use template
     SUGGESTION_ENGINE: str = os.getenv("SUGGESTION_ENGINE", "template")
@@ -225,6 +225,34 @@ class Database:
                     "total_associations": total_associations
                 }
 
+    def get_catalog_fingerprint(self) -> str:
+        """
+        Hash of every catalog column matching uses (services, gemeentes,
+        associations), computed server-side in one query. Changes whenever
+        the catalog does, so a prebuilt index file can be checked for
+        staleness without reading the tables.
+        """
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT md5(
+                        coalesce((SELECT string_agg(
+                            md5(row(id, name, description, category, keywords)::text), ',' ORDER BY id
+                        ) FROM services), '')
+                        || '|' ||
+                        coalesce((SELECT string_agg(
+                            md5(row(id, name)::text), ',' ORDER BY id
+                        ) FROM gemeentes), '')
+                        || '|' ||
+                        coalesce((SELECT string_agg(
+                            gemeente_id || ':' || service_id, ',' ORDER BY gemeente_id, service_id
+                        ) FROM associations), '')
+                    )
+                    """
+                )
+                return cur.fetchone()[0]
+
     # APP SETTINGS
     def get_setting(self, key: str) -> Optional[str]:
         """Get a setting value by key"""
@@ -12,6 +12,7 @@ from datetime import datetime
 
 from app.core.config import settings
 from app.models.database import db
+from app.services.catalog_store import catalog_store
 
 router = APIRouter()
 security = HTTPBasic()
@@ -93,6 +94,7 @@ async def create_gemeente(gemeente: GemeenteCreate, username: str = Depends(veri
     """Create new gemeente"""
     try:
         result = db.create_gemeente(gemeente.dict())
+        catalog_store.invalidate()
         return json.loads(json.dumps(result, default=json_serial))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -107,6 +109,7 @@ async def update_gemeente(
     """Update gemeente"""
     try:
         result = db.update_gemeente(gemeente_id, gemeente.dict())
+        catalog_store.invalidate()
         if not result:
             raise HTTPException(status_code=404, detail="Gemeente not found")
         return json.loads(json.dumps(result, default=json_serial))
@@ -121,6 +124,7 @@ async def delete_gemeente(gemeente_id: int, username: str = Depends(verify_admin
     """Delete gemeente"""
     try:
         success = db.delete_gemeente(gemeente_id)
+        catalog_store.invalidate()
         if not success:
             raise HTTPException(status_code=404, detail="Gemeente not found")
         return {"message": "Gemeente deleted successfully"}
@@ -160,6 +164,7 @@ async def create_service(service: ServiceCreate, username: str = Depends(verify_
     """Create new service"""
     try:
         result = db.create_service(service.dict())
+        catalog_store.invalidate()
         return json.loads(json.dumps(result, default=json_serial))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -174,6 +179,7 @@ async def update_service(
     """Update service"""
     try:
         result = db.update_service(service_id, service.dict())
+        catalog_store.invalidate()
         if not result:
             raise HTTPException(status_code=404, detail="Service not found")
         return json.loads(json.dumps(result, default=json_serial))
@@ -188,6 +194,7 @@ async def delete_service(service_id: int, username: str = Depends(verify_admin))
     """Delete service"""
     try:
         success = db.delete_service(service_id)
+        catalog_store.invalidate()
         if not success:
             raise HTTPException(status_code=404, detail="Service not found")
         return {"message": "Service deleted successfully"}
@@ -213,6 +220,7 @@ async def create_association(association: AssociationCreate, username: str = Dep
     """Create new association"""
     try:
         result = db.create_association(association.dict())
+        catalog_store.invalidate()
         return json.loads(json.dumps(result, default=json_serial))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -223,6 +231,7 @@ async def delete_association(association_id: int, username: str = Depends(verify
     """Delete association"""
     try:
         success = db.delete_association(association_id)
+        catalog_store.invalidate()
         if not success:
             raise HTTPException(status_code=404, detail="Association not found")
         return {"message": "Association deleted successfully"}
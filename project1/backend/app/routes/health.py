@@ -6,6 +6,10 @@ import sys
 
 from app.core.config import settings
 from app.models.database import db
+from app.services.suggestion_cache import suggestion_cache
+from app.services.keystroke_session import session_store
+from app.services.canonical import query_canonicalizer
+from app.services.match_pipeline import pipeline_stats
 
 router = APIRouter()
 
@@ -32,6 +36,10 @@ async def health_check():
             "available": db_available,
             "error": db_error
         },
+        "suggestion_cache": suggestion_cache.stats(),
+        "keystroke_sessions": session_store.stats(),
+        "query_canonicalizer": query_canonicalizer.stats(),
+        "match_pipeline": pipeline_stats.stats(),
         "environment": {
             "python_version": sys.version.split()[0]
         }
@@ -4,13 +4,21 @@ Epic 1: Query Suggestion Engine
 """
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import Callable, Hashable, List, Optional, Dict, Any, Tuple
 import time
 
 from app.core.config import settings
-from app.models.database import db
 from app.services.template_engine import template_engine
-from app.services.dutch_matcher import DutchMatcher
+from app.services.dutch_matcher import dutch_matcher
+from app.services.catalog_store import catalog_store
+from app.services.suggestion_cache import suggestion_cache
+from app.services.keystroke_session import KeystrokeSession, session_index, session_store
+from app.services.match_pipeline import MatchBudget, MatchTrace, parse_retrieve_limits, pipeline_stats
+from app.services.canonical import keyword_set_key, query_canonicalizer
+from app.services.catalog import CatalogSnapshot, parse_field_weights
+from app.services.tfidf_engine import TfidfEngine, numpy_available
+from app.services.bm25f_engine import Bm25fEngine
+from app.services.sharded_matcher import shard_pool
 from app.services.koop_client import KoopAPIClient
 
 router = APIRouter()
@@ -20,6 +28,11 @@ router = APIRouter()
 class SuggestionRequest(BaseModel):
     query: str = Field(..., min_length=2, description="Search query")
     max_results: int = Field(5, ge=1, le=10)
+    session_token: Optional[str] = Field(
+        None,
+        max_length=64,
+        description="Client-chosen id of a typing session; queries extending the previous one are narrowed"
+    )
 
 
 class ServiceInfo(BaseModel):
@@ -42,6 +55,10 @@ class SuggestionResponse(BaseModel):
     response_time_ms: float
     using_database: bool
     suggestion_engine: str
+    cached: bool = False
+    # The query was cut to the complexity caps or matching ran out of its
+    # CPU budget: suggestions are the best found, not necessarily the best
+    partial: bool = False
 
 
 @router.post("/suggestions", response_model=SuggestionResponse)
@@ -65,15 +82,113 @@ async def get_suggestions(request: SuggestionRequest):
     # Check which engine to use (template or KOOP) - from config
     suggestion_engine = settings.SUGGESTION_ENGINE
 
-    # Generate suggestions based on configured engine
+    # Spelling variants of a query share one canonical text, which is what
+    # gets scored, and one canonical key
+    canonical = query_canonicalizer.canonicalize(request.query, _order_free_key(suggestion_engine))
+
+    # Repeated type-ahead queries are served from the result cache; the
+    # catalog version in the key retires entries after admin writes
+    cache_key = (
+        canonical.key,
+        request.max_results,
+        suggestion_engine,
+        settings.MATCH_ENGINE,
+        catalog_store.version,
+    )
+    suggestions = suggestion_cache.get(cache_key)
+    cached = suggestions is not None
+    partial = canonical.truncated
+    if not cached:
+        session = session_store.session(request.session_token) if request.session_token else None
+        # The budget starts after catalog work (snapshot rebuilds, engines
+        # built on first use), so it only limits matching
+        snapshot = _warm_snapshot(suggestion_engine, session)
+        budget = MatchBudget(settings.MATCH_BUDGET_MS) if settings.MATCH_BUDGET_MS > 0 else None
+        suggestions = _generate_suggestions(
+            canonical.text, request.max_results, suggestion_engine, session, budget, snapshot
+        )
+        if budget is not None and budget.exhausted:
+            # Depends on load, not just the query: never served from the cache
+            partial = True
+        else:
+            suggestion_cache.put(cache_key, suggestions)
+
+    response_time = (time.time() - start_time) * 1000
+
+    return SuggestionResponse(
+        query=request.query,
+        suggestions=suggestions,
+        response_time_ms=round(response_time, 2),
+        using_database=suggestion_engine != "koop",
+        suggestion_engine=suggestion_engine,
+        cached=cached,
+        partial=partial
+    )
+
+
+def _order_free_key(suggestion_engine: str) -> Optional[Callable[[str], Hashable]]:
+    """
+    Canonical key function for when scoring ignores word order and stop words
+
+    The tfidf and bm25f engines only see the query's keyword set. The rest
+    of the template pipeline sees the query through its gemeente mentions
+    and template intents, which go into the key as they are, so queries
+    with the same key get the same suggestions. Returns None (key on the
+    canonical text) for the Dutch matcher, whose exact and substring
+    matches depend on the whole text, and for the KOOP engine.
+    """
+    if suggestion_engine == "koop" or not settings.DATABASE_URL:
+        return None
+    if not (settings.MATCH_ENGINE == "bm25f" or (settings.MATCH_ENGINE == "tfidf" and numpy_available())):
+        return None
+
+    try:
+        snapshot = catalog_store.get()
+    except Exception:
+        # Suggestion generation reports the failure
+        return None
+
+    return keyword_set_key(snapshot, dutch_matcher, template_engine.detect_intents)
+
+
+def _warm_snapshot(suggestion_engine: str, session: Optional[KeystrokeSession] = None) -> Optional[CatalogSnapshot]:
+    """
+    Current catalog snapshot, with the engines a request uses already built
+
+    Returns None for the KOOP engine, without a database, or when the
+    snapshot cannot be built (suggestion generation reports the failure).
+    """
+    if suggestion_engine == "koop" or not settings.DATABASE_URL:
+        return None
+
+    try:
+        snapshot = catalog_store.get()
+        dutch_matcher.warm(snapshot)
+        if session is not None:
+            session_index(snapshot)
+        _engine(snapshot)
+    except Exception:
+        return None
+    return snapshot
+
+
+def _generate_suggestions(
+    query: str,
+    max_results: int,
+    suggestion_engine: str,
+    session: Optional[KeystrokeSession] = None,
+    budget: Optional[MatchBudget] = None,
+    snapshot: Optional[CatalogSnapshot] = None
+) -> List[Suggestion]:
+    """Generate suggestions with the configured engine (HTTPException on failure)"""
     if suggestion_engine == "koop":
         # KOOP API mode
         try:
             koop_client = KoopAPIClient()
             suggestions = _generate_suggestions_from_koop(
                 koop_client,
-                request.query,
-                request.max_results
+                query,
+                max_results
             )
         except Exception as e:
             raise HTTPException(
@@ -90,8 +205,11 @@ async def get_suggestions(request: SuggestionRequest):
 
         try:
             suggestions = _generate_suggestions_from_database(
-                request.query,
-                request.max_results
+                query,
+                max_results,
+                session,
+                budget,
+                snapshot
             )
         except Exception as e:
             raise HTTPException(
@@ -99,47 +217,53 @@ async def get_suggestions(request: SuggestionRequest):
                 detail=f"Template engine failed: {str(e)}"
             )
 
-    response_time = (time.time() - start_time) * 1000
-
-    return SuggestionResponse(
-        query=request.query,
-        suggestions=suggestions,
-        response_time_ms=round(response_time, 2),
-        using_database=suggestion_engine != "koop",
-        suggestion_engine=suggestion_engine
-    )
+    return suggestions
 
 
-def _generate_suggestions_from_database(query: str, max_results: int) -> List[Suggestion]:
+def _generate_suggestions_from_database(
+    query: str,
+    max_results: int,
+    session: Optional[KeystrokeSession] = None,
+    budget: Optional[MatchBudget] = None,
+    snapshot: Optional[CatalogSnapshot] = None
+) -> List[Suggestion]:
     """Generate suggestions using template engine + Dutch matcher"""
-    # Get all services and gemeentes
-    services = db.get_all_services()
-    gemeentes = db.get_all_gemeentes()
-    associations = db.get_all_associations()
-
-    # Match services using Dutch NLP
-    matcher = DutchMatcher()
-    service_tuples = matcher.match_services(query, services)  # Returns List[Tuple[Dict, float]]
-
-    # Convert tuples to dicts with gemeente information
-    matched_services = []
-    for service_dict, confidence in service_tuples:
-        # Find gemeentes offering this service
-        service_associations = [a for a in associations if a['service_id'] == service_dict['id']]
-        gemeente_name = service_associations[0]['gemeente_name'] if service_associations else None
-
-        matched_services.append({
-            'service': service_dict,
-            'confidence': confidence,
-            'gemeente': gemeente_name
-        })
+    # Prebuilt catalog snapshot (services, gemeentes, associations)
+    if snapshot is None:
+        snapshot = catalog_store.get()
+    associations = snapshot.association_index
+    trace = MatchTrace()
+
+    # Gemeentes named in the query ("paspoort den haag") narrow the
+    # associations; the rest of the query is matched against services
+    matched_services = _match_services_in_gemeentes(query, snapshot, max_results, session, trace, budget)
+
+    if not matched_services:
+        # Match services using the configured engine
+        service_tuples = _match_services(query, snapshot, max_results, session, trace, budget)  # Returns List[Tuple[Dict, float]]
+        started = time.perf_counter()
+
+        # Convert tuples to dicts with gemeente information
+        for service_dict, confidence in service_tuples:
+            # First gemeente (by name) offering this service
+            gemeente_name = associations.first_gemeente_name(service_dict['id'])
+
+            matched_services.append({
+                'service': service_dict,
+                'confidence': confidence,
+                'gemeente': gemeente_name
+            })
+        trace.record("associate", started, len(matched_services))
 
     # Generate question templates
+    started = time.perf_counter()
     raw_suggestions = template_engine.generate_suggestions(
         query,
         matched_services,
         max_results
     )
+    trace.record("templates", started, len(raw_suggestions))
+    pipeline_stats.add(trace)
 
     # Convert to Pydantic models
     return [
@@ -158,6 +282,95 @@ def _generate_suggestions_from_database(query: str, max_results: int) -> List[Su
     ]
 
 
+def _match_services(
+    query: str,
+    snapshot: CatalogSnapshot,
+    max_results: int,
+    session: Optional[KeystrokeSession] = None,
+    trace: Optional[MatchTrace] = None,
+    budget: Optional[MatchBudget] = None
+) -> List[Tuple[Dict, float]]:
+    """
+    Match services with settings.MATCH_ENGINE, falling back to the Dutch matcher
+
+    The keystroke session only narrows the Dutch matcher; other engines
+    score every request in full. Each engine's retrieve phase hands at most
+    its settings.RETRIEVE_LIMITS candidates to the rerank phase. The CPU
+    budget stops the per-candidate scoring of the Dutch and sharded
+    matchers; tfidf and bm25f rank in one bounded pass over their postings.
+    """
+    retrieve_limits = parse_retrieve_limits(settings.RETRIEVE_LIMITS)
+    name, engine = _engine(snapshot)
+    if trace is not None:
+        trace.engine = name
+
+    # The template engine only uses the top max_results * 2 matches
+    if name == "sharded":
+        return engine.match_services(
+            query, top_k=max_results * 2, retrieve_limit=retrieve_limits[name], trace=trace, budget=budget
+        )
+    if engine is not None:
+        return engine.match_services(
+            query, top_k=max_results * 2, retrieve_limit=retrieve_limits[name], trace=trace
+        )
+    return dutch_matcher.match_services(
+        query, snapshot, top_k=max_results * 2, session=session,
+        retrieve_limit=retrieve_limits[name], trace=trace, budget=budget
+    )
+
+
+def _engine(snapshot: CatalogSnapshot) -> Tuple[str, Any]:
+    """
+    Name and engine of settings.MATCH_ENGINE (None for the Dutch matcher)
+
+    The sharded matcher's workers are shared by every snapshot: a newer
+    snapshot is loaded into them, not spawned anew.
+    """
+    field_weights = parse_field_weights(settings.MATCH_FIELD_WEIGHTS)
+    if settings.MATCH_ENGINE == "tfidf" and numpy_available():
+        return "tfidf", snapshot.get_engine("tfidf", lambda s: TfidfEngine(s, dutch_matcher, field_weights))
+    if settings.MATCH_ENGINE == "bm25f":
+        return "bm25f", snapshot.get_engine("bm25f", lambda s: Bm25fEngine(s, dutch_matcher, field_weights))
+    if settings.MATCH_SHARDS > 1:
+        return "sharded", shard_pool.get(snapshot, dutch_matcher, settings.MATCH_SHARDS)
+    return "dutch", None
+
+
+def _match_services_in_gemeentes(
+    query: str,
+    snapshot: CatalogSnapshot,
+    max_results: int,
+    session: Optional[KeystrokeSession] = None,
+    trace: Optional[MatchTrace] = None,
+    budget: Optional[MatchBudget] = None
+) -> List[Dict]:
+    """
+    Match the non-gemeente part of the query against services offered by
+    the gemeentes mentioned in it
+
+    Returns an empty list when the query names no gemeente, consists only
+    of a gemeente name, or none of the named gemeentes offers a match.
+    """
+    mentions, service_query = snapshot.gemeente_detector.detect(dutch_matcher.normalize_text(query))
+    if not mentions or not service_query:
+        return []
+
+    gemeente_matches = list({m.gemeente['id']: (m.gemeente, 1.0) for m in mentions}.values())
+    service_tuples = _match_services(service_query, snapshot, max_results, session, trace, budget)
+
+    started = time.perf_counter()
+    combined = dutch_matcher.combine_matches(
+        service_query,
+        gemeente_matches,
+        service_tuples,
+        snapshot.association_index,
+        max_results=max_results * 2
+    )
+    if trace is not None:
+        trace.record("associate", started, len(combined))
+    return combined
+
+
 def _generate_suggestions_from_koop(
     koop_client: KoopAPIClient,
     query: str,
@@ -0,0 +1,125 @@
+"""
+Gemeente/service association index
+
+Associations are stored twice as int bitsets over dense ids: per service the
+set of gemeentes offering it, and per gemeente the set of services it offers.
+Pair checks are a shift and a mask, and narrowing to a set of matched
+gemeentes or services is a single AND, instead of scanning the association
+list for every matched service or gemeente.
+
+Dense ids are assigned in order of first appearance in the association list
+(ordered by gemeente name, then service name), so iterating a bitset yields
+gemeentes and services in that same order.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Positions of the set bits of mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class AssociationIndex:
+    """Bitset adjacency between gemeentes and services"""
+
+    def __init__(self, associations: Iterable[Dict]):
+        self.gemeente_ids: List[int] = []
+        self.service_ids: List[int] = []
+        self._gemeente_dense: Dict[int, int] = {}
+        self._service_dense: Dict[int, int] = {}
+        self._gemeente_names: Dict[int, Optional[str]] = {}
+        self._service_gemeentes: Dict[int, int] = {}
+        self._gemeente_services: Dict[int, int] = {}
+
+        for assoc in associations:
+            gemeente_id = assoc['gemeente_id']
+            service_id = assoc['service_id']
+            g_dense = self._dense(gemeente_id, self._gemeente_dense, self.gemeente_ids)
+            s_dense = self._dense(service_id, self._service_dense, self.service_ids)
+            self._gemeente_names.setdefault(gemeente_id, assoc.get('gemeente_name'))
+
+            self._service_gemeentes[service_id] = self._service_gemeentes.get(service_id, 0) | (1 << g_dense)
+            self._gemeente_services[gemeente_id] = self._gemeente_services.get(gemeente_id, 0) | (1 << s_dense)
+
+    @staticmethod
+    def _dense(key: int, mapping: Dict[int, int], ids: List[int]) -> int:
+        dense = mapping.get(key)
+        if dense is None:
+            dense = len(ids)
+            mapping[key] = dense
+            ids.append(key)
+        return dense
+
+    def has(self, gemeente_id: int, service_id: int) -> bool:
+        """True if the gemeente offers the service"""
+        g_dense = self._gemeente_dense.get(gemeente_id)
+        if g_dense is None:
+            return False
+        return bool((self._service_gemeentes.get(service_id, 0) >> g_dense) & 1)
+
+    def gemeente_mask(self, gemeente_ids: Iterable[int]) -> int:
+        """Bitset of the given gemeentes (unknown ids are ignored)"""
+        mask = 0
+        for gemeente_id in gemeente_ids:
+            g_dense = self._gemeente_dense.get(gemeente_id)
+            if g_dense is not None:
+                mask |= 1 << g_dense
+        return mask
+
+    def service_mask(self, service_ids: Iterable[int]) -> int:
+        """Bitset of the given services (unknown ids are ignored)"""
+        mask = 0
+        for service_id in service_ids:
+            s_dense = self._service_dense.get(service_id)
+            if s_dense is not None:
+                mask |= 1 << s_dense
+        return mask
+
+    def gemeentes_for_service(
+        self,
+        service_id: int,
+        within: int = -1,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        """
+        Ids of gemeentes offering the service
+
+        Args:
+            service_id: The service
+            within: Only gemeentes in this bitset (see gemeente_mask), default all
+            limit: Maximum number of ids to return
+        """
+        mask = self._service_gemeentes.get(service_id, 0) & within
+        return self._take(mask, self.gemeente_ids, limit)
+
+    def services_for_gemeente(
+        self,
+        gemeente_id: int,
+        within: int = -1,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        """Ids of services offered by the gemeente, optionally within a service bitset"""
+        mask = self._gemeente_services.get(gemeente_id, 0) & within
+        return self._take(mask, self.service_ids, limit)
+
+    @staticmethod
+    def _take(mask: int, ids: List[int], limit: Optional[int]) -> List[int]:
+        result = []
+        for dense in iter_bits(mask):
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(ids[dense])
+        return result
+
+    def gemeente_name(self, gemeente_id: int) -> Optional[str]:
+        """Gemeente name as joined into the association rows"""
+        return self._gemeente_names.get(gemeente_id)
+
+    def first_gemeente_name(self, service_id: int) -> Optional[str]:
+        """Name of the first gemeente (by name) offering the service"""
+        gemeentes = self.gemeentes_for_service(service_id, limit=1)
+        return self.gemeente_name(gemeentes[0]) if gemeentes else None
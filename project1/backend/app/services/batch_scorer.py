@@ -0,0 +1,110 @@
+"""
+Batch token scorer backend for the damerau field scorer (rapidfuzz)
+
+The damerau scorer compares every query word with every word of every
+candidate field, one bounded edit distance at a time in Python. Its token
+similarity only depends on the two words, so for a given query it can be
+computed up front against the snapshot vocabulary instead: one
+rapidfuzz.process.extract call per query word scores the whole vocabulary
+in C, with the edit-distance bound as score_cutoff, and another scores the
+vocabulary's prefixes for type-ahead input. Field scoring then only looks
+similarities up.
+
+Similarities are identical to _token_similarity in dutch_matcher (same
+optimal string alignment distance, same formulas), so rankings do not
+change with the backend. Requires rapidfuzz (see requirements-full.txt).
+"""
+
+from typing import Dict, FrozenSet, List, Tuple
+
+try:
+    from rapidfuzz import process
+    from rapidfuzz.distance import OSA
+except ImportError:  # optional dependency
+    process = None
+    OSA = None
+
+
+def rapidfuzz_available() -> bool:
+    """True if the rapidfuzz backend can be used"""
+    return process is not None
+
+
+class TokenSimilarities:
+    """
+    Similarity of each query word to the vocabulary words within its bound
+
+    masks holds, per query word, the vocabulary bitmask of its similar
+    words, so a field sharing none of them is rejected with one AND.
+    """
+
+    __slots__ = ('threshold', 'rows', 'masks')
+
+    def __init__(self, threshold: float, rows: Dict[str, Dict[str, float]], masks: Dict[str, int]):
+        self.threshold = threshold
+        self.rows = rows
+        self.masks = masks
+
+
+class BatchTokenScorer:
+    """Scores query words against a snapshot vocabulary with rapidfuzz"""
+
+    def __init__(self, vocabulary: Dict[str, int]):
+        if process is None:
+            raise ImportError("BatchTokenScorer requires rapidfuzz (pip install -r requirements-full.txt)")
+
+        self.words: List[str] = sorted(vocabulary, key=vocabulary.get)
+        # Query length -> (distinct prefixes of longer words, word ids per prefix)
+        self._prefixes: Dict[int, Tuple[List[str], List[List[int]]]] = {}
+
+    def prefixes(self, length: int) -> Tuple[List[str], List[List[int]]]:
+        """Distinct length-character prefixes of the words longer than length"""
+        cached = self._prefixes.get(length)
+        if cached is None:
+            grouped: Dict[str, List[int]] = {}
+            for word_id, word in enumerate(self.words):
+                if len(word) > length:
+                    grouped.setdefault(word[:length], []).append(word_id)
+            cached = (list(grouped), list(grouped.values()))
+            self._prefixes[length] = cached
+        return cached
+
+    def similarities(self, query_words: FrozenSet[str], threshold: float) -> TokenSimilarities:
+        """
+        Token similarities of the query words, for score_prepared(threshold)
+
+        Vocabulary words missing from a row have similarity 0.0.
+        """
+        words = self.words
+        rows = {}
+        masks = {}
+        for q_word in query_words:
+            q_len = len(q_word)
+            max_distance = int(q_len * (1 - threshold))
+            row: Dict[str, float] = {}
+            mask = 0
+
+            # Whole words
+            for word, distance, word_id in process.extract(
+                q_word, words, scorer=OSA.distance, score_cutoff=max_distance, limit=None
+            ):
+                similarity = 1 - distance / max(q_len, len(word))
+                if similarity > 0.0:
+                    row[word] = similarity
+                    mask |= 1 << word_id
+
+            # Prefixes of longer words (type-ahead)
+            prefixes, ids_by_prefix = self.prefixes(q_len)
+            for _, distance, i in process.extract(
+                q_word, prefixes, scorer=OSA.distance, score_cutoff=max_distance, limit=None
+            ):
+                for word_id in ids_by_prefix[i]:
+                    word = words[word_id]
+                    similarity = (1 - distance / q_len) * (0.7 + 0.25 * q_len / len(word))
+                    if similarity > row.get(word, 0.0):
+                        row[word] = similarity
+                        mask |= 1 << word_id
+
+            rows[q_word] = row
+            masks[q_word] = mask
+        return TokenSimilarities(threshold, rows, masks)
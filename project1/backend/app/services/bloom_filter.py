@@ -0,0 +1,66 @@
+"""
+Bloom filter for string membership
+
+A fixed-size bit array with k probe positions per item: "not present" is
+always correct, "present" is wrong with probability ~error_rate. Holds tens
+of thousands of catalog n-grams in a few KiB where a set of strings would
+take megabytes.
+
+Probe positions come from the string's own hash (cached on the str object)
+with double hashing, so a lookup costs k bit tests and no new hashing.
+Python salts str hashes per process, so a filter is only valid in the
+process that built it.
+"""
+
+from typing import Iterable
+import math
+
+
+class BloomFilter:
+    """Probabilistic set of strings without false negatives"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Args:
+            capacity: Expected number of distinct items
+            error_rate: False positive rate at capacity
+        """
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, item: str):
+        size = self.size
+        h = hash(item) & 0xFFFFFFFFFFFFFFFF
+        h1 = h & 0xFFFFFFFF
+        # Step in 1..size-1: a multiple of size would probe one bit k times
+        h2 = 1 + (h >> 32) % (size - 1)
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % size
+
+    def add(self, item: str) -> None:
+        bits = self._bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        """Number of items added"""
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
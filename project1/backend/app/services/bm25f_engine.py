@@ -0,0 +1,342 @@
+"""
+BM25F inverted-index engine for service matching
+
+Every service field (name, keywords, description, category) is indexed as
+per-field postings over normalized terms: for each term and field, the
+services containing it with their length-normalized term frequency. IDF and
+the length norms are computed once at build time, so a query only walks the
+postings of its own terms. Long descriptions cost nothing for queries that
+do not contain their words.
+
+Scoring is BM25F: per term, the field-weighted sum of normalized term
+frequencies is saturated with k1 and multiplied by the term's IDF. Scores
+are divided by the query's maximum attainable score (the sum of its term
+IDFs), so confidences fall in [0, 1] like the other engines.
+
+Query words that are not indexed terms are spell-corrected against the
+snapshot and, for type-ahead input, expanded to the indexed terms they are
+a prefix of.
+
+Ranking with a top_k terminates early. Each term also keeps impact-ordered
+postings: its full BM25F contribution per service, highest first, so the
+first posting is the term's upper bound. Query words are read best-first in
+turn, and every newly seen service is scored completely by lookup in the
+other words' postings. Reading stops once the sum of the words' current
+upper bounds can no longer reach the k-th best score. Services with common
+terms like "aanvragen" that cannot make the top k are never touched.
+Results are identical to scoring every posting; stats counts services fully
+scored vs postings skipped.
+
+Drop-in alternative to DutchMatcher.match_services: same
+List[Tuple[Dict, float]] return shape. Pure Python, no extra dependencies.
+"""
+
+from typing import List, Dict, Tuple, Optional
+from bisect import bisect_left
+import heapq
+import math
+import re
+import time
+
+from app.services.catalog import CatalogSnapshot, DEFAULT_FIELD_WEIGHTS, PreparedText
+from app.services.match_pipeline import MatchTrace
+from app.services.topk import TopK
+
+
+FIELDS = ('name', 'keywords', 'description', 'category')
+
+
+class ImpactList:
+    """A term's BM25F contribution per service, highest first"""
+
+    __slots__ = ('doc_ids', 'scores', 'by_doc')
+
+    def __init__(self, by_doc: Dict[int, float]):
+        self.by_doc = by_doc
+        ordered = sorted(by_doc.items(), key=lambda item: (-item[1], item[0]))
+        self.doc_ids = [doc_id for doc_id, _ in ordered]
+        self.scores = [score for _, score in ordered]
+
+    @property
+    def upper_bound(self) -> float:
+        return self.scores[0] if self.scores else 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+
+class PruningStats:
+    """Services fully scored vs postings skipped by top-k early termination"""
+
+    __slots__ = ('scored', 'skipped')
+
+    def __init__(self, scored: int = 0, skipped: int = 0):
+        self.scored = scored
+        self.skipped = skipped
+
+    def add(self, other: "PruningStats") -> None:
+        self.scored += other.scored
+        self.skipped += other.skipped
+
+
+class Bm25fEngine:
+    """Scores a query against the services whose postings contain its terms"""
+
+    def __init__(
+        self,
+        snapshot: CatalogSnapshot,
+        matcher,
+        field_weights: Optional[Dict[str, float]] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        max_expansions: int = 50
+    ):
+        self.matcher = matcher
+        self.spelling = snapshot.spelling
+        self.field_weights = dict(DEFAULT_FIELD_WEIGHTS, **(field_weights or {}))
+        self.k1 = k1
+        self.b = b
+        self.max_expansions = max_expansions
+        self.services = [entry.service for entry in snapshot.services]
+        self.stats = PruningStats()
+        self._build(snapshot)
+
+    @staticmethod
+    def _terms(fields: List[PreparedText]) -> List[str]:
+        """Keyword tokens of the fields, with repeats, in text order"""
+        return [
+            word
+            for field in fields
+            for word in re.findall(r'\w+', field.normalized)
+            if word in field.words
+        ]
+
+    def _build(self, snapshot: CatalogSnapshot) -> None:
+        n_docs = len(snapshot.services)
+
+        # Term counts and lengths per field and service
+        counts: List[List[Dict[str, int]]] = []
+        lengths: List[List[int]] = []
+        for entry in snapshot.services:
+            doc_fields = [
+                [entry.name],
+                entry.keywords,
+                [entry.description] if entry.description is not None else [],
+                [entry.category] if entry.category is not None else [],
+            ]
+            doc_counts = []
+            doc_lengths = []
+            for fields in doc_fields:
+                field_counts: Dict[str, int] = {}
+                terms = self._terms(fields)
+                for term in terms:
+                    field_counts[term] = field_counts.get(term, 0) + 1
+                doc_counts.append(field_counts)
+                doc_lengths.append(len(terms))
+            counts.append(doc_counts)
+            lengths.append(doc_lengths)
+
+        average_lengths = [
+            ((sum(doc[f] for doc in lengths) / n_docs) or 1.0) if n_docs else 1.0
+            for f in range(len(FIELDS))
+        ]
+
+        # Per-field postings: term -> field -> (doc ids, normalized tf)
+        postings: Dict[str, List[Tuple[List[int], List[float]]]] = {}
+        for doc_id, (doc_counts, doc_lengths) in enumerate(zip(counts, lengths)):
+            for f, field_counts in enumerate(doc_counts):
+                norm = 1.0 - self.b + self.b * doc_lengths[f] / average_lengths[f]
+                for term, tf in field_counts.items():
+                    fields = postings.get(term)
+                    if fields is None:
+                        fields = [([], []) for _ in FIELDS]
+                        postings[term] = fields
+                    fields[f][0].append(doc_id)
+                    fields[f][1].append(tf / norm)
+
+        self.postings = postings
+        self.idf = {}
+        for term, fields in postings.items():
+            df = len({doc_id for doc_ids, _ in fields for doc_id in doc_ids})
+            self.idf[term] = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        self.terms = sorted(postings)
+        self.n_docs = n_docs
+
+        # Full BM25F contribution of each term per service
+        weights = [self.field_weights[field] for field in FIELDS]
+        self.impacts: Dict[str, ImpactList] = {}
+        for term, fields in postings.items():
+            pseudo_tf: Dict[int, float] = {}
+            for weight, (doc_ids, tfs) in zip(weights, fields):
+                if not weight:
+                    continue
+                for doc_id, tf in zip(doc_ids, tfs):
+                    pseudo_tf[doc_id] = pseudo_tf.get(doc_id, 0.0) + weight * tf
+
+            idf = self.idf[term]
+            self.impacts[term] = ImpactList(
+                {doc_id: idf * tf / (self.k1 + tf) for doc_id, tf in pseudo_tf.items()}
+            )
+
+    def expand(self, word: str) -> List[str]:
+        """Indexed terms a query word stands for: itself, or terms it prefixes"""
+        if word in self.postings:
+            return [word]
+
+        expansions = []
+        i = bisect_left(self.terms, word)
+        while i < len(self.terms) and self.terms[i].startswith(word):
+            expansions.append(self.terms[i])
+            if len(expansions) >= self.max_expansions:
+                break
+            i += 1
+        return expansions
+
+    def score(self, words) -> Tuple[Dict[int, float], float]:
+        """
+        BM25F score of every service sharing a term with the query
+
+        A prefix-expanded word contributes its best-scoring expansion.
+
+        Returns:
+            Tuple of (doc id -> score, maximum attainable score)
+        """
+        scores: Dict[int, float] = {}
+        max_score = 0.0
+
+        for word in words:
+            terms = self.expand(word)
+            if not terms:
+                continue
+
+            expansions = [self.impacts[term] for term in terms]
+            word_scores: Dict[int, float] = {}
+            for impact in expansions:
+                for doc_id, term_score in impact.by_doc.items():
+                    if term_score > word_scores.get(doc_id, 0.0):
+                        word_scores[doc_id] = term_score
+
+            max_score += max(self.idf[term] for term in terms)
+            for doc_id, word_score in word_scores.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + word_score
+
+        return scores, max_score
+
+    def rank(
+        self,
+        words,
+        top_k: Optional[int],
+        min_confidence: float
+    ) -> Tuple[List[Tuple[int, float]], PruningStats]:
+        """
+        Best services for the query words, catalog order on ties
+
+        With a top_k, postings are read best-first and reading stops as soon
+        as no unseen service can reach the k-th best score. Returns the same
+        (doc id, confidence) list as ranking every score() result.
+        """
+        words = [word for word in words if self.expand(word)]
+        word_terms = [[self.impacts[term] for term in self.expand(word)] for word in words]
+        max_score = sum(max(self.idf[term] for term in self.expand(word)) for word in words)
+        stats = PruningStats()
+        if not max_score:
+            return [], stats
+
+        min_score = min_confidence * max_score
+        if top_k is None:
+            scores, _ = self.score(words)
+            stats.scored = len(scores)
+            ranked = sorted(
+                ((doc_id, score) for doc_id, score in scores.items() if score >= min_score),
+                key=lambda item: (-item[1], item[0])
+            )
+            return [(doc_id, score / max_score) for doc_id, score in ranked], stats
+
+        def word_score(terms: List[ImpactList], doc_id: int) -> float:
+            return max(impact.by_doc.get(doc_id, 0.0) for impact in terms)
+
+        # Best-first stream of (-score, doc id) per word; a prefix-expanded
+        # word merges its expansions and keeps a service's first (best) score
+        streams = [
+            heapq.merge(*[zip((-score for score in impact.scores), impact.doc_ids) for impact in terms])
+            for terms in word_terms
+        ]
+        bounds = [max(impact.upper_bound for impact in terms) for terms in word_terms]
+        # Scores are summed in query word order, bounds in any order
+        slack = 1e-9 * max_score
+
+        kth = TopK(top_k)
+        scored: Dict[int, float] = {}
+        postings_read = 0
+        while any(bounds):
+            for w, stream in enumerate(streams):
+                if not bounds[w]:
+                    continue
+                entry = next(stream, None)
+                if entry is None:
+                    bounds[w] = 0.0
+                    continue
+                postings_read += 1
+                bounds[w] = -entry[0]
+                doc_id = entry[1]
+                if doc_id in scored:
+                    continue
+
+                score = 0.0
+                for terms in word_terms:
+                    score += word_score(terms, doc_id)
+                scored[doc_id] = score
+                kth.push(score, doc_id)
+
+            # No unseen service can beat the k-th best or reach min_score.
+            # A single word is read in (score, doc id) order, so unseen
+            # services tying the k-th best lose the tie to the seen ones.
+            if len(streams) == 1:
+                bound = bounds[0]
+                done = bound <= kth.threshold()
+            else:
+                bound = sum(bounds) + slack
+                done = bound < kth.threshold()
+            if done or bound < min_score:
+                break
+
+        stats.scored = len(scored)
+        stats.skipped = sum(len(impact) for terms in word_terms for impact in terms) - postings_read
+        ranked = heapq.nsmallest(
+            top_k,
+            ((doc_id, score) for doc_id, score in scored.items() if score >= min_score),
+            key=lambda item: (-item[1], item[0])
+        )
+        return [(doc_id, score / max_score) for doc_id, score in ranked], stats
+
+    def match_services(
+        self,
+        query: str,
+        min_confidence: float = 0.1,
+        top_k: Optional[int] = None,
+        retrieve_limit: Optional[int] = None,
+        trace: Optional[MatchTrace] = None
+    ) -> List[Tuple[Dict, float]]:
+        """
+        Match query against all services
+
+        Args:
+            query: The search query
+            min_confidence: Minimum normalized BM25F score
+            top_k: Maximum number of results (None = all above min_confidence)
+            retrieve_limit: Caps top_k (None or 0 = no cap); ranking is the
+                retrieve phase here, the route reranks what it returns
+            trace: Records the retrieve phase of the request
+
+        Returns:
+            List of tuples (service, confidence_score) sorted by confidence
+        """
+        started = time.perf_counter()
+        if retrieve_limit:
+            top_k = retrieve_limit if top_k is None else min(top_k, retrieve_limit)
+        prepared = self.matcher.correct_query(self.matcher.prepare_text(query), self.spelling)
+        ranked, stats = self.rank(sorted(prepared.words), top_k, min_confidence)
+        self.stats.add(stats)
+        if trace is not None:
+            trace.record("retrieve", started, len(ranked))
+        return [(self.services[doc_id], confidence) for doc_id, confidence in ranked]
@@ -0,0 +1,243 @@
+"""
+Query canonicalization
+
+Type-ahead traffic spells the same query many ways: "Paspoort", "paspoort ",
+"PASPOORT", "paspóórt". fold_text() maps them to one canonical text (case
+folded, every diacritic and compatibility form folded, whitespace
+collapsed); DutchMatcher.normalize_text uses it, so the catalog, the index
+file, the match filter's dead keys and the suggestion cache all see the same
+text.
+
+Dropping stop words and sorting tokens is only done where it cannot change
+a result. The heuristic scorer compares whole query strings (exact and
+substring matches), and gemeente names span words ("den haag"), so there the
+canonical key is the folded text. Callers whose scoring only sees the
+keyword set pass a key function that builds an order-free key instead.
+
+QueryCanonicalizer also caps the number and length of query words, so a
+pasted paragraph costs no more to match than a long query, and counts how
+many distinct raw queries collapse into each canonical key, which shows how
+much a cache keyed on it gains.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+import re
+import threading
+import unicodedata
+
+from app.core.config import settings
+from app.services.catalog import CatalogSnapshot
+
+_WORD = re.compile(r'\w+')
+
+
+def fold_text(text: str) -> str:
+    """
+    Canonical text for comparison
+    - Case folded ("ß" -> "ss")
+    - Compatibility forms and ligatures expanded ("ĳ" -> "ij", "ﬁ" -> "fi")
+    - Diacritics removed ("ë" -> "e", "ú" -> "u")
+    - Whitespace trimmed and collapsed to single spaces
+    """
+    if text.isascii():
+        return ' '.join(text.lower().split())
+    # Folding case can leave compatibility forms ("ᴬ" -> "A" -> "a"), so
+    # decompose on both sides to make folding idempotent
+    return ' '.join(_strip_marks(_strip_marks(text).casefold()).split())
+
+
+def _strip_marks(text: str) -> str:
+    """NFKD decomposition without the combining marks"""
+    return ''.join(
+        char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char)
+    )
+
+
+def cap_words(text: str, max_words: int = 0, max_word_length: int = 0) -> Tuple[str, bool]:
+    """
+    Text cut after its max_words-th word, with longer words cut to
+    max_word_length characters (0 = no cap)
+
+    Returns:
+        Tuple of (capped text, whether anything was cut)
+    """
+    truncated = False
+    if max_words > 0:
+        end = 0
+        for count, match in enumerate(_WORD.finditer(text), 1):
+            if count > max_words:
+                text = text[:end]
+                truncated = True
+                break
+            end = match.end()
+    if max_word_length > 0 and len(text) > max_word_length:
+        capped = _WORD.sub(lambda match: match.group(0)[:max_word_length], text)
+        truncated = truncated or capped != text
+        text = capped
+    return text, truncated
+
+
+def keyword_set_key(
+    snapshot: CatalogSnapshot,
+    matcher: Any,
+    detect_intents: Callable[[str], List[str]]
+) -> Callable[[str], Hashable]:
+    """
+    Order-free key function for scoring that only sees keyword sets
+
+    The key holds the template intents and gemeente mentions as they are,
+    and the sorted keywords (stop words dropped) of the whole query and of
+    the part outside the mentions.
+
+    Args:
+        snapshot: Catalog whose gemeente detector splits off the mentions
+        matcher: DutchMatcher whose prepare_text picks the keywords
+        detect_intents: Intents of a query (QuestionTemplateEngine.detect_intents)
+    """
+    detector = snapshot.gemeente_detector
+
+    def key(text: str) -> Hashable:
+        mentions, service_query = detector.detect(text)
+        return (
+            tuple(detect_intents(text)),
+            tuple(dict.fromkeys(m.gemeente['id'] for m in mentions)),
+            bool(service_query),
+            tuple(sorted(matcher.prepare_text(service_query).words)),
+            tuple(sorted(matcher.prepare_text(text).words)),
+        )
+
+    return key
+
+
+class CanonicalQuery:
+    """Canonical text of a query (what is scored), its cache key and whether it was capped"""
+
+    __slots__ = ('text', 'key', 'truncated')
+
+    def __init__(self, text: str, key: Hashable, truncated: bool = False):
+        self.text = text
+        self.key = key
+        self.truncated = truncated
+
+
+class QueryCanonicalizer:
+    """Canonicalizes queries and counts the raw variants of each key"""
+
+    def __init__(
+        self,
+        max_keys: int = 4096,
+        max_variants: int = 32,
+        max_words: int = 0,
+        max_word_length: int = 0
+    ):
+        """
+        Args:
+            max_keys: Canonical keys tracked for the collapse metrics, least
+                recently seen dropped first (0 disables the metrics)
+            max_variants: Raw variants remembered per key; variants past
+                this are counted once per request, not deduplicated
+            max_words: Words of a query kept (0 = all), see cap_words
+            max_word_length: Characters of a query word kept (0 = all)
+        """
+        self.max_keys = max_keys
+        self.max_variants = max_variants
+        self.max_words = max_words
+        self.max_word_length = max_word_length
+        # key -> [canonical text, raw variants, overflow count]
+        self._keys: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.evictions = 0
+        self.truncated = 0
+
+    def canonicalize(
+        self,
+        query: str,
+        key: Optional[Callable[[str], Hashable]] = None
+    ) -> CanonicalQuery:
+        """
+        Canonical form of a raw query
+
+        Args:
+            query: The raw query as typed
+            key: Builds the cache key from the canonical text; default is
+                the text itself (for scoring that depends on word order)
+        """
+        text, truncated = cap_words(fold_text(query), self.max_words, self.max_word_length)
+        canonical = CanonicalQuery(text, key(text) if key is not None else text, truncated)
+        self._record(canonical, query)
+        return canonical
+
+    def _record(self, canonical: CanonicalQuery, raw: str) -> None:
+        if self.max_keys <= 0:
+            return
+
+        with self._lock:
+            self.queries += 1
+            self.truncated += canonical.truncated
+            entry = self._keys.get(canonical.key)
+            if entry is None:
+                entry = self._keys[canonical.key] = [canonical.text, set(), 0]
+            self._keys.move_to_end(canonical.key)
+            variants: Set[str] = entry[1]
+            if raw not in variants:
+                if len(variants) < self.max_variants:
+                    variants.add(raw)
+                else:
+                    entry[2] += 1
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+                self.evictions += 1
+
+    def variants(self, key: Hashable) -> int:
+        """Distinct raw queries seen for a canonical key"""
+        with self._lock:
+            entry = self._keys.get(key)
+            return len(entry[1]) + entry[2] if entry is not None else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        """Collapse metrics for monitoring, with the keys most raw variants fold into"""
+        with self._lock:
+            counts = [(len(variants) + overflow, text) for text, variants, overflow in self._keys.values()]
+            queries = self.queries
+            evictions = self.evictions
+            truncated = self.truncated
+
+        raw_variants = sum(count for count, _ in counts)
+        histogram: Dict[str, int] = {"1": 0, "2": 0, "3-4": 0, "5+": 0}
+        for count, _ in counts:
+            bucket = "1" if count == 1 else "2" if count == 2 else "3-4" if count <= 4 else "5+"
+            histogram[bucket] += 1
+        counts.sort(key=lambda item: -item[0])
+        top_keys: List[Dict[str, Any]] = [
+            {"canonical": text, "variants": count} for count, text in counts[:top] if count > 1
+        ]
+
+        return {
+            "enabled": self.max_keys > 0,
+            "queries": queries,
+            "truncated": truncated,
+            "keys": len(counts),
+            "max_keys": self.max_keys,
+            "evictions": evictions,
+            "raw_variants": raw_variants,
+            "variants_per_key": round(raw_variants / len(counts), 3) if counts else 0.0,
+            "variants_histogram": histogram,
+            "top_keys": top_keys,
+        }
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+# Global query canonicalizer instance
+query_canonicalizer = QueryCanonicalizer(
+    max_keys=settings.CANONICAL_QUERY_KEYS,
+    max_words=settings.QUERY_MAX_WORDS,
+    max_word_length=settings.QUERY_MAX_WORD_LENGTH
+)
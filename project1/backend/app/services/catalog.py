@@ -0,0 +1,411 @@
+"""
+In-memory catalog snapshot for the Dutch matcher
+
+Holds gemeentes, services and associations together with the pre-normalized
+form of every searchable field (normalized text, keyword set, length), so
+matching a query only costs work proportional to the query and the number of
+entries, not to re-normalizing and re-tokenizing the whole catalog per request.
+
+Database rows are stored as compact __slots__ records holding only the
+columns matching and suggestions use (no created_at/updated_at/metadata),
+with interned strings, so repeated categories, keywords and gemeente names
+are stored once. Records are read-only mappings, so code written against the
+row dicts (service['name'], service.get('description')) works unchanged.
+Since rows are passed by reference either way, records shrink the resident
+snapshot; they do not change what a request allocates.
+"""
+
+from collections.abc import Mapping
+from typing import List, Dict, Optional, FrozenSet, Callable, Any, Iterator, Tuple
+import sys
+import time
+
+from app.services.compounds import CompoundSplitter
+from app.services.prefix_index import PrefixIndex
+from app.services.trigram_index import TrigramIndex
+from app.services.spelling import SpellingCorrector
+from app.services.stemmer import stems as stem_words
+from app.services.association_index import AssociationIndex
+from app.services.gemeente_detector import GemeenteDetector
+
+
+# Service field priorities, as used by DutchMatcher.match_services
+DEFAULT_FIELD_WEIGHTS = {
+    'name': 1.0,
+    'keywords': 0.95,
+    'description': 0.70,
+    'category': 0.60,
+}
+
+
+def parse_field_weights(spec: str) -> Dict[str, float]:
+    """
+    Parse "name=1.0,description=0.5" into a field weight dict
+
+    Unknown field names raise ValueError; an empty spec gives {}.
+    """
+    weights = {}
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        field, _, value = part.partition('=')
+        field = field.strip()
+        if field not in DEFAULT_FIELD_WEIGHTS:
+            raise ValueError(f"Unknown service field '{field}' in field weights")
+        weights[field] = float(value)
+    return weights
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Record(Mapping):
+    """Read-only mapping over a fixed set of __slots__ columns"""
+
+    __slots__ = ()
+    columns: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.columns:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class ServiceRecord(Record):
+    """Compact service row"""
+
+    __slots__ = ('id', 'name', 'description', 'category', 'keywords')
+    columns = __slots__
+
+    def __init__(self, row: Dict):
+        self.id = row['id']
+        self.name = _intern(row['name'])
+        self.description = _intern(row.get('description'))
+        self.category = _intern(row.get('category'))
+        self.keywords = tuple(_intern(k) for k in row.get('keywords') or ())
+
+
+class GemeenteRecord(Record):
+    """Compact gemeente row"""
+
+    __slots__ = ('id', 'name')
+    columns = __slots__
+
+    def __init__(self, row: Dict):
+        self.id = row['id']
+        self.name = _intern(row['name'])
+
+
+class AssociationRecord(Record):
+    """Compact association row (the gemeente_name join is kept for lookups)"""
+
+    __slots__ = ('gemeente_id', 'service_id', 'gemeente_name')
+    columns = __slots__
+
+    def __init__(self, row: Dict):
+        self.gemeente_id = row['gemeente_id']
+        self.service_id = row['service_id']
+        self.gemeente_name = _intern(row.get('gemeente_name'))
+
+
+class PreparedText:
+    """
+    Pre-normalized form of a single text field
+
+    stems holds the Dutch stems of the keywords (see app/services/stemmer.py),
+    computed from words unless given.
+    mask is the keyword set as an int bitmask over the snapshot vocabulary
+    (bit i = word with id i), or None when no vocabulary has been applied.
+    similarities is only set on queries, by a batch scorer backend (see
+    DutchMatcher.score_tokens).
+    """
+
+    __slots__ = ('normalized', 'words', 'stems', 'length', 'mask', 'similarities')
+
+    def __init__(
+        self,
+        normalized: str,
+        words: FrozenSet[str],
+        mask: Optional[int] = None,
+        similarities: Optional[Any] = None,
+        stems: Optional[FrozenSet[str]] = None
+    ):
+        self.normalized = normalized
+        self.words = words
+        if stems is None:
+            stems = stem_words(words)
+        # Shared when no word is inflected, so scorers can skip the stems by identity
+        self.stems = words if stems == words else stems
+        self.length = len(normalized)
+        self.mask = mask
+        self.similarities = similarities
+
+    def interned(self) -> "PreparedText":
+        """Same text with its strings interned (shared across the catalog)"""
+        words = frozenset(_intern(w) for w in self.words)
+        return PreparedText(
+            _intern(self.normalized),
+            words,
+            self.mask,
+            stems=words if self.stems is self.words else frozenset(_intern(s) for s in self.stems)
+        )
+
+
+class ServiceEntry:
+    """A service with all of its searchable fields prepared"""
+
+    __slots__ = ('service', 'name', 'keywords', 'description', 'category')
+
+    def __init__(
+        self,
+        service: Dict,
+        name: PreparedText,
+        keywords: List[PreparedText],
+        description: Optional[PreparedText],
+        category: Optional[PreparedText]
+    ):
+        self.service = service
+        self.name = name
+        self.keywords = keywords
+        self.description = description
+        self.category = category
+
+
+class GemeenteEntry:
+    """A gemeente with its name prepared"""
+
+    __slots__ = ('gemeente', 'name')
+
+    def __init__(self, gemeente: Dict, name: PreparedText):
+        self.gemeente = gemeente
+        self.name = name
+
+
+class CatalogSnapshot:
+    """
+    Immutable, pre-processed view of the catalog
+
+    Build it once with CatalogSnapshot.build() and pass it to
+    DutchMatcher.match_services / match_gemeentes instead of the raw lists.
+    """
+
+    def __init__(
+        self,
+        services: List[ServiceEntry],
+        gemeentes: List[GemeenteEntry],
+        associations: List[Dict],
+        version: int = 0
+    ):
+        self.services = services
+        self.gemeentes = gemeentes
+        self.associations = associations
+        self.version = version
+        self.built_at = time.monotonic()
+
+        # Database id -> dense id (position in services / gemeentes)
+        self.service_dense: Dict[int, int] = {e.service['id']: i for i, e in enumerate(services)}
+        self.gemeente_dense: Dict[int, int] = {e.gemeente['id']: i for i, e in enumerate(gemeentes)}
+
+        # Lookup indexes, filled by build_indexes()
+        self.service_prefixes: Optional[PrefixIndex] = None
+        self.gemeente_prefixes: Optional[PrefixIndex] = None
+        self.service_trigrams: Optional[TrigramIndex] = None
+        self.gemeente_trigrams: Optional[TrigramIndex] = None
+        self.spelling: Optional[SpellingCorrector] = None
+        self.vocabulary: Optional[Dict[str, int]] = None
+        self.association_index: Optional[AssociationIndex] = None
+        self.gemeente_detector: Optional[GemeenteDetector] = None
+
+        # Memory-mapped index file the indexes read from, if loaded from one
+        self.index_file = None
+        # Catalog fingerprint the rows were read at, if known
+        self.fingerprint: Optional[str] = None
+
+        # Alternative matching engines built on demand, see get_engine()
+        self._engines: Dict[str, Any] = {}
+
+    @classmethod
+    def build(
+        cls,
+        matcher,
+        services: List[Dict],
+        gemeentes: List[Dict],
+        associations: List[Dict],
+        version: int = 0,
+        indexes: bool = True,
+        compact: bool = True
+    ) -> "CatalogSnapshot":
+        """
+        Prepare every searchable field of the catalog
+
+        Args:
+            matcher: DutchMatcher used for normalization and tokenization
+            services: Service rows (name, description, category, keywords)
+            gemeentes: Gemeente rows (name)
+            associations: Association rows (gemeente_id, service_id, gemeente_name)
+            version: Catalog version this snapshot was built from
+            indexes: Also build the lookup indexes (skip for one-off matching)
+            compact: Store compact records with interned strings instead of
+                the given row dicts
+        """
+        prepare = matcher.prepare_text
+        if compact:
+            services = [ServiceRecord(row) for row in services]
+            gemeentes = [GemeenteRecord(row) for row in gemeentes]
+            associations = [AssociationRecord(row) for row in associations]
+
+            def prepare(text, _prepare=matcher.prepare_text):
+                return _prepare(text).interned()
+
+        service_entries = []
+        for service in services:
+            service_entries.append(ServiceEntry(
+                service=service,
+                name=prepare(service['name']),
+                keywords=[prepare(k) for k in service.get('keywords') or []],
+                description=prepare(service['description']) if service.get('description') else None,
+                category=prepare(service['category']) if service.get('category') else None,
+            ))
+
+        gemeente_entries = [
+            GemeenteEntry(gemeente=gemeente, name=prepare(gemeente['name']))
+            for gemeente in gemeentes
+        ]
+
+        snapshot = cls(service_entries, gemeente_entries, associations, version)
+        if indexes:
+            snapshot.build_indexes()
+        return snapshot
+
+    def build_indexes(self) -> None:
+        """
+        Build the lookup indexes
+
+        - Prefix indexes over gemeente names, service names and keywords.
+          Both the full normalized string and its individual words are
+          indexed, so "den ha" and "haag" both complete to Den Haag.
+          Service words are also indexed by their compound parts, split
+          against the catalog words, so "vergunning" reaches
+          "parkeervergunning".
+        - Trigram indexes over every token of every searchable field, for
+          typo candidates.
+        - Spelling corrector over the words of service names, keywords and
+          gemeente names.
+        - Dense word ids (most frequent word = bit 0) and the keyword bitmask
+          of every prepared field, for set-free Jaccard scoring.
+        - Gemeente/service association bitsets.
+        - Aho-Corasick automaton over gemeente names for free-text queries.
+        """
+        compounds = CompoundSplitter(
+            word for entry in self.services for field in self.service_fields(entry) for word in field.words
+        )
+
+        service_prefixes = PrefixIndex()
+        service_trigrams = TrigramIndex()
+        spelling = SpellingCorrector()
+        for doc_id, entry in enumerate(self.services):
+            for field in [entry.name] + entry.keywords:
+                service_prefixes.add(field.normalized, doc_id)
+                service_prefixes.add_all(field.words, doc_id)
+                service_prefixes.add_all(compounds.parts(field.words), doc_id)
+                spelling.add_all(field.words)
+            for field in self.service_fields(entry):
+                service_trigrams.add_all(field.words, doc_id)
+
+        gemeente_prefixes = PrefixIndex()
+        gemeente_trigrams = TrigramIndex()
+        for doc_id, entry in enumerate(self.gemeentes):
+            gemeente_prefixes.add(entry.name.normalized, doc_id)
+            gemeente_prefixes.add_all(entry.name.words, doc_id)
+            gemeente_trigrams.add_all(entry.name.words, doc_id)
+            spelling.add_all(entry.name.words)
+
+        self.service_prefixes = service_prefixes.freeze()
+        self.gemeente_prefixes = gemeente_prefixes.freeze()
+        self.service_trigrams = service_trigrams.freeze()
+        self.gemeente_trigrams = gemeente_trigrams.freeze()
+        self.spelling = spelling.freeze()
+        self._build_vocabulary()
+        self.build_derived_indexes()
+
+    def build_derived_indexes(self) -> None:
+        """
+        Build the gemeente detector and association bitsets
+
+        Both are cheap to derive from the rows, so they are also rebuilt
+        after loading the other indexes from an index file.
+        """
+        gemeente_detector = GemeenteDetector()
+        for entry in self.gemeentes:
+            gemeente_detector.add(entry.name.normalized, entry.gemeente)
+        self.gemeente_detector = gemeente_detector.freeze()
+        self.association_index = AssociationIndex(self.associations)
+
+    def _build_vocabulary(self) -> None:
+        fields = [entry.name for entry in self.gemeentes]
+        for entry in self.services:
+            fields.extend(self.service_fields(entry))
+
+        frequencies: Dict[str, int] = {}
+        for field in fields:
+            for word in field.words:
+                frequencies[word] = frequencies.get(word, 0) + 1
+
+        # Frequent words get the low bits, keeping most masks small ints
+        ranked = sorted(frequencies, key=lambda w: (-frequencies[w], w))
+        vocabulary = {word: word_id for word_id, word in enumerate(ranked)}
+
+        for field in fields:
+            mask = 0
+            for word in field.words:
+                mask |= 1 << vocabulary[word]
+            field.mask = mask
+
+        self.vocabulary = vocabulary
+
+    @staticmethod
+    def service_fields(entry: ServiceEntry) -> List[PreparedText]:
+        """All prepared searchable fields of a service"""
+        fields = [entry.name] + entry.keywords
+        if entry.description is not None:
+            fields.append(entry.description)
+        if entry.category is not None:
+            fields.append(entry.category)
+        return fields
+
+    def service(self, service_id: int) -> Optional[Dict]:
+        """Service row by database id"""
+        dense = self.service_dense.get(service_id)
+        return self.services[dense].service if dense is not None else None
+
+    def gemeente(self, gemeente_id: int) -> Optional[Dict]:
+        """Gemeente row by database id"""
+        dense = self.gemeente_dense.get(gemeente_id)
+        return self.gemeentes[dense].gemeente if dense is not None else None
+
+    def get_engine(self, name: str, factory: Callable[["CatalogSnapshot"], Any]) -> Any:
+        """
+        Engine built from this snapshot, created by factory on first use
+
+        Engines live and die with the snapshot, so they are rebuilt whenever
+        the catalog changes.
+        """
+        engine = self._engines.get(name)
+        if engine is None:
+            engine = factory(self)
+            self._engines[name] = engine
+        return engine
+
+    def age(self) -> float:
+        """Seconds since this snapshot was built"""
+        return time.monotonic() - self.built_at
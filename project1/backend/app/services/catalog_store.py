@@ -0,0 +1,128 @@
+"""
+Process-wide cache of the catalog snapshot
+
+The snapshot is built from the database on first use and reused by every
+request until an admin write invalidates it or it exceeds its maximum age
+(other instances may have written to the database in the meantime).
+
+With an index file configured, every (re)build first asks the database for
+the catalog fingerprint. If the current snapshot or the index file was built
+at that fingerprint it is reused; only a changed catalog is read from the
+tables and indexed again. When the database cannot be reached, the current
+snapshot or the index file is used without the staleness check, so matching
+keeps working through a database outage.
+"""
+
+from typing import Optional
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.models.database import db
+from app.services.catalog import CatalogSnapshot
+from app.services.dutch_matcher import dutch_matcher
+from app.services.index_file import IndexFileError, load_index_file
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogStore:
+    """Lazily builds and caches the CatalogSnapshot"""
+
+    def __init__(self, max_age_seconds: float = 60.0, index_path: str = ""):
+        self.max_age_seconds = max_age_seconds
+        self.index_path = index_path
+        self.version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> CatalogSnapshot:
+        """Return the current snapshot, rebuilding it if missing or expired"""
+        snapshot = self._snapshot
+        if snapshot is not None and not self._expired(snapshot):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or self._expired(snapshot):
+                snapshot = self._build()
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self) -> None:
+        """Drop the snapshot after a catalog write; the next get() rebuilds it"""
+        with self._lock:
+            self.version += 1
+            self._snapshot = None
+
+    def _expired(self, snapshot: CatalogSnapshot) -> bool:
+        return (
+            snapshot.version != self.version
+            or (self.max_age_seconds > 0 and snapshot.age() > self.max_age_seconds)
+        )
+
+    def _build(self) -> CatalogSnapshot:
+        if not self.index_path:
+            return self._build_from_db()
+
+        try:
+            fingerprint = db.get_catalog_fingerprint()
+        except Exception as e:
+            return self._build_offline(e)
+
+        current = self._snapshot
+        if current is not None and current.version == self.version and current.fingerprint == fingerprint:
+            # Only expired by age and the catalog has not changed
+            current.built_at = time.monotonic()
+            return current
+
+        try:
+            snapshot = load_index_file(self.index_path, version=self.version)
+        except (IndexFileError, OSError) as e:
+            logger.warning("Cannot load catalog index file: %s", e)
+        else:
+            if snapshot.fingerprint == fingerprint:
+                return snapshot
+            logger.info("Catalog index file %s is stale, building from the database", self.index_path)
+
+        snapshot = self._build_from_db()
+        snapshot.fingerprint = fingerprint
+        return snapshot
+
+    def _build_offline(self, error: Exception) -> CatalogSnapshot:
+        """
+        Snapshot while the database is unreachable: the current one, else
+        the index file; re-raises error when there is neither
+        """
+        current = self._snapshot
+        if current is not None and current.version == self.version:
+            logger.warning("Cannot check catalog staleness (%s), keeping the current snapshot", error)
+            current.built_at = time.monotonic()
+            return current
+
+        try:
+            snapshot = load_index_file(self.index_path, version=self.version)
+        except (IndexFileError, OSError) as e:
+            logger.warning("Cannot load catalog index file: %s", e)
+            raise error
+        logger.warning(
+            "Cannot check catalog staleness (%s), using index file %s as is", error, self.index_path
+        )
+        return snapshot
+
+    def _build_from_db(self) -> CatalogSnapshot:
+        return CatalogSnapshot.build(
+            dutch_matcher,
+            db.get_all_services(),
+            db.get_all_gemeentes(),
+            db.get_all_associations(),
+            version=self.version
+        )
+
+
+# Global catalog store instance
+catalog_store = CatalogStore(
+    max_age_seconds=settings.CATALOG_SNAPSHOT_MAX_AGE,
+    index_path=settings.CATALOG_INDEX_FILE
+)
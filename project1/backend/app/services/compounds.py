@@ -0,0 +1,72 @@
+"""
+Dutch compound-word decomposition
+
+Dutch writes compounds as one word ("parkeervergunning", "afvalcontainer"),
+so the words of a catalog field do not contain their heads. Splitting them
+at index-build time lets a query for "vergunning" or "container" reach the
+compounds through the prefix index instead of a substring scan.
+
+Dutch compounds are right-headed: the last part is the head, everything
+before it modifies it. A word is split on the longest catalog word it ends
+with (the head, not the word itself); the remaining modifier is split the
+same way, or kept whole when it is not a compound itself ("parkeer").
+Modifiers often end in a linking s ("bewoners-vergunning"); the modifier
+without it is added as well when that is a catalog word.
+"""
+
+from typing import Dict, Iterable, List
+
+
+LINKING_SUFFIXES = ('s',)
+
+
+class CompoundSplitter:
+    """Splits compounds into parts found in a lexicon (the catalog words)"""
+
+    def __init__(self, lexicon: Iterable[str], min_head: int = 4, min_modifier: int = 3):
+        """
+        Args:
+            lexicon: Known words; heads are taken from these
+            min_head: Minimum length of a head
+            min_modifier: Minimum length of a modifier
+        """
+        self.min_head = min_head
+        self.min_modifier = min_modifier
+        self.lexicon = {word for word in lexicon if len(word) >= min_head}
+        self._cache: Dict[str, List[str]] = {}
+
+    def split(self, word: str) -> List[str]:
+        """Parts of a compound, modifiers first; [] if word is not a compound"""
+        parts = self._cache.get(word)
+        if parts is None:
+            parts = self._split(word)
+            self._cache[word] = parts
+        return parts
+
+    def _split(self, word: str) -> List[str]:
+        # Longest head first: "vergunning" rather than "gunning"
+        for start in range(self.min_modifier, len(word) - self.min_head + 1):
+            head = word[start:]
+            if head not in self.lexicon:
+                continue
+
+            modifier = word[:start]
+            parts = self.split(modifier) or [modifier]
+            for suffix in LINKING_SUFFIXES:
+                stem = modifier[:-len(suffix)]
+                if modifier.endswith(suffix) and stem in self.lexicon and stem not in parts:
+                    parts = parts + [stem]
+            return parts + [head]
+        return []
+
+    def parts(self, words: Iterable[str]) -> List[str]:
+        """Compound parts of all words, without duplicates or the words themselves"""
+        words = list(words)
+        seen = set(words)
+        result = []
+        for word in words:
+            for part in self.split(word):
+                if part not in seen:
+                    seen.add(part)
+                    result.append(part)
+        return result
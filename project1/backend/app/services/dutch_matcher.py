@@ -12,24 +12,102 @@ Acceptance Criteria:
 - Prioritizes more relevant suggestions first
 """
 
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, Tuple, Union, Optional
+from collections import Counter
+from functools import lru_cache
+import functools
+import heapq
+import logging
+import math
 import re
+import time
+
+from app.core.config import settings
+from app.services.catalog import CatalogSnapshot, PreparedText, ServiceEntry
+from app.services.canonical import fold_text
+from app.services.prefix_index import PrefixIndex
+from app.services.trigram_index import TrigramIndex
+from app.services.spelling import SpellingCorrector
+from app.services.phonetic import SPELLING_VARIATIONS
+from app.services.edit_distance import bounded_edit_distance
+from app.services.association_index import AssociationIndex
+from app.services.batch_scorer import BatchTokenScorer, rapidfuzz_available
+from app.services.match_filter import MatchFilter
+from app.services.substring_index import SubstringIndex
+from app.services.keystroke_session import KeystrokeSession
+from app.services.match_pipeline import MatchBudget, MatchTrace
+from app.services.topk import TopK
+
+logger = logging.getLogger(__name__)
+
+
+# Candidates scored between two CPU budget checks (see DutchMatcher.score_candidates)
+BUDGET_CHECK_INTERVAL = 8
+
+# Available field scorers (see DutchMatcher.score_prepared)
+SCORERS = ('heuristic', 'damerau')
+
+# Token similarity backends for the damerau scorer (see DutchMatcher.score_tokens)
+BACKENDS = ('python', 'rapidfuzz')
+
+
+@lru_cache(maxsize=65536)
+def _token_similarity(q_word: str, t_word: str, max_distance: int) -> float:
+    """
+    Similarity of a query token to a target token (0.0 to 1.0)
+
+    A query token shorter than the target is also compared against the
+    target's prefix of the same length (type-ahead), scored like a
+    substring hit in the heuristic scorer.
+    """
+    if q_word == t_word:
+        return 1.0
+
+    best = 0.0
+    q_len, t_len = len(q_word), len(t_word)
+
+    if q_len < t_len:
+        distance = bounded_edit_distance(q_word, t_word[:q_len], max_distance)
+        if distance <= max_distance:
+            best = (1 - distance / q_len) * (0.7 + 0.25 * q_len / t_len)
+
+    distance = bounded_edit_distance(q_word, t_word, max_distance)
+    if distance <= max_distance:
+        best = max(best, 1 - distance / max(q_len, t_len))
+
+    return best
 
 
 class DutchMatcher:
     """
     Dutch language matcher for gemeentes and services
     Handles partial matches, spelling variations, and keyword matching
+
+    Args:
+        scorer: Field scorer, one of SCORERS
+            - heuristic: exact -> substring -> Jaccard -> partial substring
+            - damerau: per-token bounded Damerau-Levenshtein similarity
+        backend: Token similarity backend for the damerau scorer, one of BACKENDS
+            - python: edit distances per token pair while scoring
+            - rapidfuzz: whole-vocabulary batch per query (falls back to
+              python when rapidfuzz is not installed)
     """
 
-    def __init__(self):
-        # Common Dutch spelling variations and normalizations
-        self.spelling_variations = {
-            'ij': ['y', 'ij'],
-            'ei': ['ey', 'ei'],
-            'ou': ['ouw', 'ou'],
-            'au': ['auw', 'au'],
-        }
+    def __init__(self, scorer: str = 'heuristic', backend: str = 'python'):
+        if scorer not in SCORERS:
+            raise ValueError(f"Unknown scorer '{scorer}', expected one of {SCORERS}")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+        if backend == 'rapidfuzz' and not rapidfuzz_available():
+            logger.warning("rapidfuzz is not installed, using the python scorer backend")
+            backend = 'python'
+        self.scorer = scorer
+        self.backend = backend
+        self._score = self._score_damerau if scorer == 'damerau' else self._score_heuristic
+
+        # Common Dutch spelling variations and normalizations; folded into
+        # the phonetic keys the spelling corrector looks variants up by
+        self.spelling_variations = SPELLING_VARIATIONS
 
         # Dutch stop words (low-value words to filter out)
         self.stop_words = {
@@ -41,24 +119,12 @@ class DutchMatcher:
     def normalize_text(self, text: str) -> str:
         """
         Normalize Dutch text for comparison
-        - Lowercase
-        - Remove diacritics (ë -> e, ï -> i, etc.)
-        - Trim whitespace
-        """
-        text = text.lower().strip()
-
-        # Remove common Dutch diacritics
-        diacritic_map = {
-            'ë': 'e', 'ï': 'i', 'ü': 'u',
-            'é': 'e', 'è': 'e', 'ê': 'e',
-            'á': 'a', 'à': 'a', 'â': 'a',
-            'ó': 'o', 'ò': 'o', 'ô': 'o',
-        }
-
-        for accented, plain in diacritic_map.items():
-            text = text.replace(accented, plain)
-
-        return text
+        - Lowercase (case folded)
+        - Remove diacritics (ë -> e, ï -> i, etc.) and expand ligatures (ĳ -> ij)
+        - Trim and collapse whitespace
+        See canonical.fold_text.
+        """
+        return fold_text(text)
 
     def extract_keywords(self, query: str) -> List[str]:
         """
@@ -90,8 +156,44 @@ class DutchMatcher:
         Returns:
             Tuple of (is_match, confidence_score)
         """
-        query_norm = self.normalize_text(query)
-        target_norm = self.normalize_text(target)
+        return self.score_prepared(
+            self.prepare_text(query),
+            self.prepare_text(target),
+            threshold
+        )
+
+    def prepare_text(self, text: str) -> PreparedText:
+        """
+        Normalize and tokenize text once so it can be scored many times
+        """
+        normalized = self.normalize_text(text)
+        words = re.findall(r'\w+', normalized)
+        keywords = frozenset(
+            word for word in words
+            if word not in self.stop_words and len(word) >= 2
+        )
+        return PreparedText(normalized, keywords)
+
+    def score_prepared(
+        self,
+        query: PreparedText,
+        target: PreparedText,
+        threshold: float = 0.6
+    ) -> Tuple[bool, float]:
+        """
+        Same scoring as fuzzy_match, on already prepared query and target
+        """
+        return self._score(query, target, threshold)
+
+    def _score_heuristic(
+        self,
+        query: PreparedText,
+        target: PreparedText,
+        threshold: float
+    ) -> Tuple[bool, float]:
+        """Exact, substring, Jaccard (words, then stems) and partial-substring cascade"""
+        query_norm = query.normalized
+        target_norm = target.normalized
 
         # Exact match
         if query_norm == target_norm:
@@ -100,30 +202,42 @@ class DutchMatcher:
         # Substring match
         if query_norm in target_norm:
             # Confidence based on how much of the target is matched
-            confidence = len(query_norm) / len(target_norm)
+            confidence = len(query_norm) / target.length
             return (True, min(0.95, 0.7 + confidence * 0.25))
 
         if target_norm in query_norm:
             # Target is contained in query
-            confidence = len(target_norm) / len(query_norm)
+            confidence = target.length / query.length
             return (True, min(0.90, 0.65 + confidence * 0.25))
 
         # Word-level matching (for multi-word queries)
-        query_words = set(self.extract_keywords(query))
-        target_words = set(self.extract_keywords(target))
+        query_words = query.words
+        target_words = target.words
 
         if not query_words or not target_words:
             return (False, 0.0)
 
-        # Calculate Jaccard similarity
-        intersection = len(query_words & target_words)
-        union = len(query_words | target_words)
+        # Calculate Jaccard similarity (popcounts when both sides are bitmasks)
+        if query.mask is not None and target.mask is not None:
+            intersection = (query.mask & target.mask).bit_count()
+            union = (query.mask | target.mask).bit_count()
+        else:
+            intersection = len(query_words & target_words)
+            union = len(query_words | target_words)
 
         if intersection > 0:
             jaccard_score = intersection / union
             if jaccard_score >= threshold:
                 return (True, jaccard_score * 0.85)
 
+        # Same Jaccard over stems, for inflected forms ("vergunningen")
+        if query.stems is not query_words or target.stems is not target_words:
+            intersection = len(query.stems & target.stems)
+            if intersection > 0:
+                jaccard_score = intersection / len(query.stems | target.stems)
+                if jaccard_score >= threshold:
+                    return (True, jaccard_score * 0.85)
+
         # Partial word matching (for typos)
         partial_matches = 0
         for q_word in query_words:
@@ -141,87 +255,569 @@ class DutchMatcher:
 
         return (False, 0.0)
 
-    def match_gemeentes(self, query: str, gemeentes: List[Dict]) -> List[Tuple[Dict, float]]:
+    def _score_damerau(
+        self,
+        query: PreparedText,
+        target: PreparedText,
+        threshold: float
+    ) -> Tuple[bool, float]:
+        """
+        Average best token similarity of the query words against the target words
+
+        Each token pair is compared with a bounded edit distance derived from
+        the threshold, and the field is abandoned as soon as the remaining
+        query words can no longer lift the average above the threshold.
+        """
+        if query.normalized == target.normalized:
+            return (True, 1.0)
+
+        query_words = query.words
+        target_words = target.words
+        if not query_words or not target_words:
+            return (False, 0.0)
+
+        similarities = query.similarities
+        if similarities is not None and similarities.threshold != threshold:
+            similarities = None
+
+        word_count = len(query_words)
+        remaining = word_count
+        total = 0.0
+
+        for q_word in query_words:
+            best = 0.0
+            if similarities is not None:
+                # No similar word in the field: one AND instead of a lookup per word
+                if target.mask is None or similarities.masks[q_word] & target.mask:
+                    row = similarities.rows[q_word]
+                    for t_word in target_words:
+                        similarity = row.get(t_word, 0.0)
+                        if similarity > best:
+                            best = similarity
+            else:
+                max_distance = int(len(q_word) * (1 - threshold))
+                for t_word in target_words:
+                    similarity = _token_similarity(q_word, t_word, max_distance)
+                    if similarity > best:
+                        best = similarity
+                        if best == 1.0:
+                            break
+
+            total += best
+            remaining -= 1
+            if (total + remaining) / word_count < threshold:
+                return (False, 0.0)
+
+        score = total / word_count
+        if score >= threshold:
+            return (True, min(0.95, score))
+        return (False, 0.0)
+
+    def match_gemeentes(
+        self,
+        query: str,
+        gemeentes: Union[List[Dict], CatalogSnapshot],
+        top_k: Optional[int] = None
+    ) -> List[Tuple[Dict, float]]:
         """
         Match query against gemeente names
 
         Args:
             query: The search query
-            gemeentes: List of gemeente dictionaries with 'name' field
+            gemeentes: List of gemeente dictionaries with 'name' field,
+                or a prebuilt CatalogSnapshot
+            top_k: Only keep the top_k best matches (None = all)
 
         Returns:
             List of tuples (gemeente, confidence_score) sorted by confidence
         """
-        matches = []
-
-        for gemeente in gemeentes:
-            is_match, confidence = self.fuzzy_match(query, gemeente['name'])
+        if not isinstance(gemeentes, CatalogSnapshot):
+            gemeentes = CatalogSnapshot.build(self, [], gemeentes, [], indexes=False, compact=False)
+
+        match_filter = self.match_filter(gemeentes)
+        dead_key = ('gemeentes', self.normalize_text(query))
+        if match_filter is not None and match_filter.is_dead(dead_key):
+            return []
+
+        query_prepared, original = self.scoring_queries(query, gemeentes)
+        if self._rejected(match_filter, dead_key, query_prepared, original):
+            return []
+        matches = TopK(top_k)
+
+        # With the filter, the substring index makes retrieval exact: no
+        # hit means no match, so there is no full-scan fallback
+        candidates = self.retrieve_candidates(
+            query_prepared, gemeentes.gemeente_prefixes, gemeentes.gemeentes,
+            gemeentes.gemeente_trigrams, fallback=match_filter is None,
+            substring_index=self.substring_index(gemeentes, gemeentes=True),
+            original=original, outside=self._outside(match_filter, 'gemeentes')
+        )
+        if not candidates and match_filter is not None:
+            match_filter.mark_dead(dead_key)
+
+        for entry in candidates:
+            is_match, confidence = self.score_prepared(query_prepared, entry.name)
+            if original is not None:
+                original_match, original_confidence = self.score_prepared(original, entry.name)
+                if original_match and (not is_match or original_confidence > confidence):
+                    is_match, confidence = original_match, original_confidence
             if is_match:
-                matches.append((gemeente, confidence))
+                matches.push(confidence, entry.gemeente)
 
-        # Sort by confidence (descending)
-        matches.sort(key=lambda x: x[1], reverse=True)
-        return matches
+        # Sorted by confidence (descending)
+        return matches.results()
 
     def match_services(
         self,
         query: str,
-        services: List[Dict],
-        min_confidence: float = 0.5
+        services: Union[List[Dict], CatalogSnapshot],
+        min_confidence: float = 0.5,
+        top_k: Optional[int] = None,
+        session: Optional[KeystrokeSession] = None,
+        retrieve_limit: Optional[int] = None,
+        trace: Optional[MatchTrace] = None,
+        budget: Optional[MatchBudget] = None
     ) -> List[Tuple[Dict, float]]:
         """
         Match query against service names, descriptions, and keywords
 
         Args:
             query: The search query
-            services: List of service dictionaries
+            services: List of service dictionaries, or a prebuilt CatalogSnapshot
             min_confidence: Minimum confidence threshold
+            top_k: Only keep the top_k best matches (None = all); once k
+                matches are held, lower-weighted fields that cannot beat the
+                k-th best are not scored
+            session: Keystroke session of the typing user; a query extending
+                the session's previous one only scores the services that can
+                still match (heuristic scorer only, results are unchanged)
+            retrieve_limit: Services scored at most (None or 0 = every
+                retrieved service), see retrieve_candidates
+            trace: Records the retrieve and rerank phases of the request
+            budget: CPU budget of the request; candidates are then scored
+                best retrieval score first until it runs out (results are
+                unchanged if it does not, see score_candidates)
 
         Returns:
             List of tuples (service, confidence_score) sorted by confidence
         """
-        matches = []
+        started = time.perf_counter()
+        if not isinstance(services, CatalogSnapshot):
+            services = CatalogSnapshot.build(self, services, [], [], indexes=False, compact=False)
+
+        match_filter = self.match_filter(services)
+        dead_key = ('services', self.normalize_text(query))
+        if match_filter is not None and match_filter.is_dead(dead_key):
+            if trace is not None:
+                trace.record("retrieve", started, 0)
+            return []
+
+        query_prepared, original = self.scoring_queries(query, services)
+        if self._rejected(match_filter, dead_key, query_prepared, original):
+            if trace is not None:
+                trace.record("retrieve", started, 0)
+            return []
+
+        candidates = self.retrieve_candidates(
+            query_prepared, services.service_prefixes, services.services,
+            services.service_trigrams, fallback=match_filter is None,
+            limit=retrieve_limit, trace=trace, prioritize=budget is not None,
+            substring_index=self.substring_index(services), original=original,
+            outside=self._outside(match_filter, 'services')
+        )
+        if not candidates and match_filter is not None:
+            match_filter.mark_dead(dead_key)
+        # Narrowing keeps what the query itself can match, which is not
+        # enough when its correction is scored too
+        if session is not None and self.scorer == 'heuristic' and original is None:
+            candidates = session.narrow(services, query_prepared, candidates)
+        if trace is not None:
+            trace.record("retrieve", started, len(candidates))
+            started = time.perf_counter()
+
+        if budget is None:
+            matches = self.score_candidates(query_prepared, candidates, min_confidence, top_k, original=original)
+        else:
+            matches = self.score_candidates(
+                query_prepared, candidates, min_confidence, top_k,
+                budget=budget, positions=services.service_dense, original=original
+            )
+        if trace is not None:
+            trace.record("rerank", started, len(matches))
+            trace.partial = trace.partial or (budget is not None and budget.exhausted)
+        return [(entry.service, confidence) for entry, confidence in matches]
+
+    def score_candidates(
+        self,
+        query: PreparedText,
+        candidates: List[ServiceEntry],
+        min_confidence: float = 0.5,
+        top_k: Optional[int] = None,
+        budget: Optional[MatchBudget] = None,
+        positions: Optional[Dict[int, int]] = None,
+        original: Optional[PreparedText] = None
+    ) -> List[Tuple[ServiceEntry, float]]:
+        """
+        Second stage of match_services: score retrieved service entries
 
-        for service in services:
-            max_confidence = 0.0
+        Args:
+            original: The query before spelling correction, if it was
+                corrected; an entry gets the better score of the two
+            budget: Stop scoring once this CPU budget is used up (checked
+                every BUDGET_CHECK_INTERVAL candidates, so the first ones
+                are always scored)
+            positions: Catalog position by service id, for candidates that
+                are not in catalog order (e.g. best retrieval score first)
 
-            # Check service name (highest priority)
-            is_match, confidence = self.fuzzy_match(query, service['name'])
-            if is_match:
-                max_confidence = max(max_confidence, confidence * 1.0)
-
-            # Check keywords (high priority)
-            if 'keywords' in service and service['keywords']:
-                for keyword in service['keywords']:
-                    is_match, confidence = self.fuzzy_match(query, keyword)
-                    if is_match:
-                        max_confidence = max(max_confidence, confidence * 0.95)
-
-            # Check description (lower priority)
-            if 'description' in service and service['description']:
-                is_match, confidence = self.fuzzy_match(query, service['description'])
-                if is_match:
-                    max_confidence = max(max_confidence, confidence * 0.70)
+        Returns:
+            List of tuples (entry, confidence_score) sorted by confidence,
+            catalog order on ties
+        """
+        matches = TopK(top_k)
+
+        for scored, entry in enumerate(candidates, 1):
+            if positions is None:
+                floor = matches.threshold()
+            else:
+                # An earlier catalog position wins a tie with the k-th best,
+                # so fields that can only equal it must still be scored
+                floor = math.nextafter(matches.threshold(), -math.inf)
+            max_confidence = self.score_service(query, entry, floor)
+            if original is not None:
+                max_confidence = max(
+                    max_confidence, self.score_service(original, entry, max(floor, max_confidence))
+                )
+            if max_confidence >= min_confidence:
+                if positions is None:
+                    matches.push(max_confidence, entry)
+                else:
+                    matches.push(max_confidence, entry, order=positions[entry.service['id']])
+            if budget is not None and scored % BUDGET_CHECK_INTERVAL == 0 and budget.expired():
+                break
+
+        # Sorted by confidence (descending)
+        return matches.results()
+
+    def correct_query(
+        self,
+        query: PreparedText,
+        spelling: Optional[SpellingCorrector]
+    ) -> PreparedText:
+        """
+        Replace misspelled query words with their catalog spelling
+
+        Known words and prefixes of known words are left alone, so partial
+        type-ahead input is never "corrected". Returns query itself when
+        nothing is corrected.
+        """
+        if spelling is None:
+            return query
+
+        corrections = spelling.correct_words(query.words)
+        if not corrections:
+            return query
+
+        normalized = re.sub(
+            r'\w+',
+            lambda m: corrections.get(m.group(0), m.group(0)),
+            query.normalized
+        )
+        words = frozenset(corrections.get(word, word) for word in query.words)
+        return PreparedText(normalized, words)
+
+    def scoring_queries(
+        self,
+        query: str,
+        snapshot: CatalogSnapshot
+    ) -> Tuple[PreparedText, Optional[PreparedText]]:
+        """
+        The spell-corrected query and, if correction changed it, the original
+
+        Both are encoded for scoring. A misspelling can still be inside a
+        catalog word ("ouwen" in "trouwen" is corrected to "bouwen"), so the
+        original is retrieved and scored as well, and entries keep the
+        better score of the two.
+        """
+        def encode(text: PreparedText) -> PreparedText:
+            return self.score_tokens(self.encode_query(text, snapshot.vocabulary), snapshot)
+
+        prepared = self.prepare_text(query)
+        corrected = self.correct_query(prepared, snapshot.spelling)
+        if corrected is prepared:
+            return encode(prepared), None
+        return encode(corrected), encode(prepared)
 
-            # Check category (lowest priority)
-            if 'category' in service and service['category']:
-                is_match, confidence = self.fuzzy_match(query, service['category'])
+    def encode_query(
+        self,
+        query: PreparedText,
+        vocabulary: Optional[Dict[str, int]]
+    ) -> PreparedText:
+        """
+        Attach the query's keyword bitmask over the snapshot vocabulary
+
+        Words outside the vocabulary get ids past its end, so they still
+        count towards the Jaccard union.
+        """
+        if vocabulary is None:
+            return query
+
+        mask = 0
+        unknown_id = len(vocabulary)
+        for word in query.words:
+            word_id = vocabulary.get(word)
+            if word_id is None:
+                word_id = unknown_id
+                unknown_id += 1
+            mask |= 1 << word_id
+        return PreparedText(query.normalized, query.words, mask, stems=query.stems)
+
+    def score_tokens(
+        self,
+        query: PreparedText,
+        snapshot: CatalogSnapshot,
+        threshold: float = 0.6
+    ) -> PreparedText:
+        """
+        Attach the query's token similarities against the snapshot vocabulary
+
+        Only with the rapidfuzz backend and the damerau scorer; the batch
+        scorer is built once per snapshot. Scoring results are unchanged,
+        _score_damerau just looks similarities up instead of computing them.
+        """
+        batch = self.token_batch(snapshot)
+        if batch is None:
+            return query
+
+        return PreparedText(
+            query.normalized, query.words, query.mask,
+            batch.similarities(query.words, threshold), query.stems
+        )
+
+    def token_batch(self, snapshot: CatalogSnapshot) -> Optional[BatchTokenScorer]:
+        """Batch token scorer of the snapshot vocabulary, see score_tokens"""
+        if self.backend != 'rapidfuzz' or self.scorer != 'damerau' or snapshot.vocabulary is None:
+            return None
+        return snapshot.get_engine("token_batch", lambda s: BatchTokenScorer(s.vocabulary))
+
+    def warm(self, snapshot: CatalogSnapshot) -> None:
+        """
+        Build the structures this matcher creates on first use of a snapshot
+        (token batch scorer, no-match filter, substring indexes) now, so a
+        query's CPU budget does not pay for them
+        """
+        self.token_batch(snapshot)
+        self.match_filter(snapshot)
+        self.substring_index(snapshot)
+        self.substring_index(snapshot, gemeentes=True)
+
+    def match_filter(self, snapshot: CatalogSnapshot) -> Optional[MatchFilter]:
+        """
+        No-match filter for the snapshot, built once on first use
+
+        Only for the heuristic scorer (the damerau scorer also matches by
+        edit distance) and indexed snapshots.
+        """
+        if self.scorer != 'heuristic' or snapshot.vocabulary is None:
+            return None
+        return snapshot.get_engine("match_filter", MatchFilter)
+
+    @staticmethod
+    def _rejected(
+        match_filter: Optional[MatchFilter],
+        dead_key: Tuple[str, str],
+        query: PreparedText,
+        original: Optional[PreparedText]
+    ) -> bool:
+        """
+        True if match_filter proves that neither query nor its original
+        form can match (dead_key is then marked dead)
+        """
+        if match_filter is None or match_filter.may_match(query):
+            return False
+        if original is not None and match_filter.may_match(original):
+            return False
+        match_filter.mark_dead(dead_key)
+        return True
+
+    @staticmethod
+    def _outside(match_filter: Optional[MatchFilter], kind: str) -> Optional[Callable[[str], bool]]:
+        """Texts the filter's dead queries prove are inside no field of kind"""
+        if match_filter is None:
+            return None
+        return functools.partial(match_filter.has_dead_prefix, kind)
+
+    def substring_index(self, snapshot: CatalogSnapshot, gemeentes: bool = False) -> Optional[SubstringIndex]:
+        """
+        Substring index over the services (or gemeente names) of an indexed
+        snapshot, built once on first use
+        """
+        if snapshot.service_prefixes is None:
+            return None
+        if gemeentes:
+            return snapshot.get_engine(
+                "gemeente_substrings", lambda s: SubstringIndex([entry.name] for entry in s.gemeentes)
+            )
+        return snapshot.get_engine(
+            "service_substrings", lambda s: SubstringIndex(s.service_fields(entry) for entry in s.services)
+        )
+
+    def retrieve_candidates(
+        self,
+        query: PreparedText,
+        prefix_index: Optional[PrefixIndex],
+        entries: List,
+        trigram_index: Optional[TrigramIndex] = None,
+        fallback: bool = True,
+        limit: Optional[int] = None,
+        trace: Optional[MatchTrace] = None,
+        prioritize: bool = False,
+        substring_index: Optional[SubstringIndex] = None,
+        original: Optional[PreparedText] = None,
+        outside: Optional[Callable[[str], bool]] = None
+    ) -> List:
+        """
+        First retrieval stage: catalog entries with a term starting with
+        the full query or one of its keywords, or spelled like a keyword
+        (trigram overlap, for typos)
+
+        With a substring_index, every entry the heuristic scorer can match
+        is added (query inside a field, field inside the query, shared
+        words and stems), so results equal a full scan; outside skips its
+        searches for texts known to be inside no field. Falls back to every
+        entry when there is no index or no hit at all (with fallback=False,
+        no hit at all returns an empty list).
+
+        With a limit, at most limit entries are returned: the ones with the
+        highest retrieval score (see _retrieval_scores), or the first limit
+        entries of a fallback. Entries cut off are counted in trace.dropped.
+        With prioritize, index hits are returned best retrieval score first
+        (catalog order on ties) instead of in catalog order.
+
+        With an original (uncorrected) query, its hits are retrieved too,
+        each entry with the better retrieval score of the two.
+        """
+        if prefix_index is None:
+            return self._limit_entries(entries, limit, trace)
+
+        queries = [query] if original is None else [query, original]
+        if limit or prioritize:
+            scores = Counter()
+            for text in queries:
+                scores |= self._retrieval_scores(text, prefix_index, trigram_index, substring_index, outside)
+            doc_ids = scores.keys()
+        else:
+            doc_ids = set()
+            for text in queries:
+                if ' ' in text.normalized:
+                    doc_ids |= prefix_index.lookup(text.normalized)
+                for word in text.words:
+                    doc_ids |= prefix_index.lookup(word)
+                    if trigram_index is not None:
+                        doc_ids |= trigram_index.lookup(word)
+                if substring_index is not None:
+                    doc_ids |= substring_index.candidates(text, outside)
+
+        if not doc_ids:
+            if not fallback:
+                return []
+            return self._limit_entries(entries, limit, trace)
+
+        if limit and len(doc_ids) > limit:
+            if trace is not None:
+                trace.dropped += len(doc_ids) - limit
+            doc_ids = heapq.nsmallest(limit, doc_ids, key=lambda doc_id: (-scores[doc_id], doc_id))
+            if prioritize:
+                return [entries[doc_id] for doc_id in doc_ids]
+        if prioritize:
+            return [entries[doc_id] for doc_id in sorted(doc_ids, key=lambda doc_id: (-scores[doc_id], doc_id))]
+
+        # Keep catalog order so ties rank the same as a full scan
+        return [entries[doc_id] for doc_id in sorted(doc_ids)]
+
+    @staticmethod
+    def _retrieval_scores(
+        query: PreparedText,
+        prefix_index: PrefixIndex,
+        trigram_index: Optional[TrigramIndex],
+        substring_index: Optional[SubstringIndex] = None,
+        outside: Optional[Callable[[str], bool]] = None
+    ) -> Counter:
+        """
+        Retrieved entries with a score from index lookups alone: 3 when
+        the whole query starts a term, per query word 2 for a term equal
+        to it, 1 for a term starting with it and 1 for a trigram hit, and
+        1 for a substring index candidate
+        """
+        scores: Counter = Counter()
+        if ' ' in query.normalized:
+            scores.update(dict.fromkeys(prefix_index.lookup(query.normalized), 3))
+        for word in query.words:
+            hits = prefix_index.lookup(word)
+            if hits:
+                scores.update(prefix_index.postings(word))
+                scores.update(hits)
+            if trigram_index is not None:
+                scores.update(trigram_index.lookup(word))
+        if substring_index is not None:
+            scores.update(substring_index.candidates(query, outside))
+        return scores
+
+    @staticmethod
+    def _limit_entries(entries: List, limit: Optional[int], trace: Optional[MatchTrace]) -> List:
+        """The first limit entries (all with no limit)"""
+        if not limit or len(entries) <= limit:
+            return entries
+        if trace is not None:
+            trace.dropped += len(entries) - limit
+        return entries[:limit]
+
+    def score_service(
+        self,
+        query: PreparedText,
+        entry: ServiceEntry,
+        floor: float = float('-inf')
+    ) -> float:
+        """
+        Best field-weighted confidence of a prepared query against one service
+
+        Fields are checked in descending weight order; a field is skipped
+        once its weight (its best possible score) cannot exceed the best
+        score so far or floor. The result is exact whenever it exceeds floor.
+        """
+        max_confidence = 0.0
+
+        # Check service name (highest priority)
+        is_match, confidence = self.score_prepared(query, entry.name)
+        if is_match:
+            max_confidence = max(max_confidence, confidence * 1.0)
+
+        # Check keywords (high priority)
+        if max(max_confidence, floor) < 0.95:
+            for keyword in entry.keywords:
+                is_match, confidence = self.score_prepared(query, keyword)
                 if is_match:
-                    max_confidence = max(max_confidence, confidence * 0.60)
+                    max_confidence = max(max_confidence, confidence * 0.95)
 
-            if max_confidence >= min_confidence:
-                matches.append((service, max_confidence))
+        # Check description (lower priority)
+        if entry.description is not None and max(max_confidence, floor) < 0.70:
+            is_match, confidence = self.score_prepared(query, entry.description)
+            if is_match:
+                max_confidence = max(max_confidence, confidence * 0.70)
+
+        # Check category (lowest priority)
+        if entry.category is not None and max(max_confidence, floor) < 0.60:
+            is_match, confidence = self.score_prepared(query, entry.category)
+            if is_match:
+                max_confidence = max(max_confidence, confidence * 0.60)
 
-        # Sort by confidence (descending)
-        matches.sort(key=lambda x: x[1], reverse=True)
-        return matches
+        return max_confidence
 
     def combine_matches(
         self,
         query: str,
         gemeente_matches: List[Tuple[Dict, float]],
         service_matches: List[Tuple[Dict, float]],
-        associations: List[Dict],
+        associations: Union[List[Dict], AssociationIndex],
         max_results: int = 5
     ) -> List[Dict]:
         """
@@ -231,92 +827,69 @@ class DutchMatcher:
             query: The search query
             gemeente_matches: List of (gemeente, confidence) tuples
             service_matches: List of (service, confidence) tuples
-            associations: List of associations from database
+            associations: List of associations from database, or a prebuilt
+                AssociationIndex (e.g. CatalogSnapshot.association_index)
             max_results: Maximum number of results to return
 
         Returns:
             List of matched combinations with confidence scores
         """
-        combined_results = []
+        combined_results = TopK(max_results)
 
-        # Build association lookup for quick access
-        association_map = {}
-        for assoc in associations:
-            key = (assoc['gemeente_id'], assoc['service_id'])
-            association_map[key] = assoc
+        if not isinstance(associations, AssociationIndex):
+            associations = AssociationIndex(associations)
 
         # If we have both gemeente and service matches, combine them
         if gemeente_matches and service_matches:
             for service, service_conf in service_matches:
                 for gemeente, gemeente_conf in gemeente_matches:
-                    key = (gemeente['id'], service['id'])
-                    if key in association_map:
+                    if associations.has(gemeente['id'], service['id']):
                         # Combined confidence: weighted average
                         combined_conf = (service_conf * 0.7 + gemeente_conf * 0.3)
-                        combined_results.append({
-                            'service': service,
-                            'gemeente': gemeente['name'],
-                            'confidence': combined_conf
-                        })
+                        if combined_conf > combined_results.threshold():
+                            combined_results.push(combined_conf, {
+                                'service': service,
+                                'gemeente': gemeente['name'],
+                                'confidence': combined_conf
+                            })
 
-        # If only service matches, pair with all associated gemeentes
+        # If only service matches, pair with associated gemeentes that were matched
         elif service_matches:
+            matched_gemeentes = {g['id']: g for g, _ in gemeente_matches or []}
+            gemeente_mask = associations.gemeente_mask(matched_gemeentes)
+
             for service, service_conf in service_matches:
-                # Find all gemeentes associated with this service
-                service_gemeentes = [
-                    assoc for assoc in associations
-                    if assoc['service_id'] == service['id']
-                ]
-
-                if service_gemeentes:
-                    for assoc in service_gemeentes[:3]:  # Limit to top 3 gemeentes per service
-                        # Find the gemeente details
-                        for g_match in gemeente_matches or []:
-                            if g_match[0]['id'] == assoc['gemeente_id']:
-                                gemeente_name = g_match[0]['name']
-                                break
-                        else:
-                            # If gemeente not in matches, use first associated gemeente
-                            gemeente_name = None
-                            # We'd need to look it up from the database here
-                            # For now, skip this combination
-
-                        if gemeente_name:
-                            combined_results.append({
-                                'service': service,
-                                'gemeente': gemeente_name,
-                                'confidence': service_conf * 0.9  # Slight penalty for no gemeente match
-                            })
+                # Limit to top 3 gemeentes per service
+                for gemeente_id in associations.gemeentes_for_service(
+                    service['id'], within=gemeente_mask, limit=3
+                ):
+                    confidence = service_conf * 0.9  # Slight penalty for no gemeente match
+                    combined_results.push(confidence, {
+                        'service': service,
+                        'gemeente': matched_gemeentes[gemeente_id]['name'],
+                        'confidence': confidence
+                    })
 
-        # If only gemeente matches, pair with all associated services
+        # If only gemeente matches, pair with associated services that were matched
         elif gemeente_matches:
-            for gemeente, gemeente_conf in gemeente_matches:
-                # Find all services associated with this gemeente
-                gemeente_services = [
-                    assoc for assoc in associations
-                    if assoc['gemeente_id'] == gemeente['id']
-                ]
-
-                for assoc in gemeente_services[:3]:  # Limit to top 3 services per gemeente
-                    # Find the service details
-                    for s_match in service_matches or []:
-                        if s_match[0]['id'] == assoc['service_id']:
-                            service = s_match[0]
-                            break
-                    else:
-                        # Service not in original matches, skip
-                        continue
+            matched_services = {s['id']: s for s, _ in service_matches or []}
+            service_mask = associations.service_mask(matched_services)
 
-                    combined_results.append({
-                        'service': service,
+            for gemeente, gemeente_conf in gemeente_matches:
+                # Limit to top 3 services per gemeente
+                for service_id in associations.services_for_gemeente(
+                    gemeente['id'], within=service_mask, limit=3
+                ):
+                    confidence = gemeente_conf * 0.85  # Penalty for no service match
+                    combined_results.push(confidence, {
+                        'service': matched_services[service_id],
                         'gemeente': gemeente['name'],
-                        'confidence': gemeente_conf * 0.85  # Penalty for no service match
+                        'confidence': confidence
                     })
 
-        # Sort by confidence and return top results
-        combined_results.sort(key=lambda x: x['confidence'], reverse=True)
-        return combined_results[:max_results]
+        # Top results by confidence
+        return [result for result, _ in combined_results.results()]
 
 
 # Global matcher instance
-dutch_matcher = DutchMatcher()
+dutch_matcher = DutchMatcher(scorer=settings.MATCHER_SCORER, backend=settings.MATCHER_BACKEND)
@@ -0,0 +1,66 @@
+"""
+Damerau-Levenshtein edit distance
+
+Optimal string alignment distance (insertions, deletions, substitutions and
+adjacent transpositions). bounded_edit_distance only fills the diagonal band
+that can still stay within max_distance and stops as soon as every cell of a
+row exceeds it, so hopeless pairs are abandoned after a few characters.
+"""
+
+from typing import List
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Unbounded optimal string alignment distance"""
+    return bounded_edit_distance(a, b, max(len(a), len(b)))
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance, bounded by max_distance
+
+    Returns:
+        The distance if it is <= max_distance, otherwise max_distance + 1
+    """
+    if a == b:
+        return 0
+
+    len_a, len_b = len(a), len(b)
+    over = max_distance + 1
+    if abs(len_a - len_b) > max_distance:
+        return over
+    if not len_a or not len_b:
+        return max(len_a, len_b)
+
+    # Cells outside the band |i - j| <= max_distance are treated as "over"
+    previous2: List[int] = []
+    previous = [j if j <= max_distance else over for j in range(len_b + 1)]
+
+    for i in range(1, len_a + 1):
+        lo = max(1, i - max_distance)
+        hi = min(len_b, i + max_distance)
+        current = [over] * (len_b + 1)
+        current[0] = i if i <= max_distance else over
+        row_min = current[0]
+        char_a = a[i - 1]
+
+        for j in range(lo, hi + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            value = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + cost,
+            )
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value if value <= max_distance else over
+            if value < row_min:
+                row_min = value
+
+        # Early exit: no alignment can come back under the bound
+        if row_min > max_distance:
+            return over
+
+        previous2, previous = previous, current
+
+    return previous[len_b]
@@ -0,0 +1,126 @@
+"""
+Aho-Corasick gemeente-name detector for free-text queries
+
+All normalized gemeente names (including multi-word names like "den haag"
+and "'s-hertogenbosch") are compiled into one automaton. A single pass over
+the query finds every gemeente mention, so "paspoort den haag" can be split
+into a gemeente part and a service part without fuzzy-matching the query
+against every gemeente.
+
+Names and queries are reduced to their words joined by single spaces
+("'s-hertogenbosch" -> "s hertogenbosch"), and mentions must start and end
+on word boundaries.
+"""
+
+from typing import Dict, List, Tuple
+from collections import deque
+import re
+
+
+def word_text(normalized: str) -> str:
+    """Words of an already normalized string, joined by single spaces"""
+    return ' '.join(re.findall(r'\w+', normalized))
+
+
+class GemeenteMention:
+    """A gemeente found in the query, with its span in the word text"""
+
+    __slots__ = ('gemeente', 'start', 'end')
+
+    def __init__(self, gemeente: Dict, start: int, end: int):
+        self.gemeente = gemeente
+        self.start = start
+        self.end = end
+
+
+class GemeenteDetector:
+    """Multi-pattern automaton over gemeente names"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+        self._patterns: List[Tuple[int, Dict]] = []
+
+    def add(self, normalized_name: str, gemeente: Dict) -> None:
+        """Add a gemeente by its normalized name (call freeze() when done)"""
+        pattern = word_text(normalized_name)
+        if not pattern:
+            return
+
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+
+        self._outputs[node].append(len(self._patterns))
+        self._patterns.append((len(pattern), gemeente))
+
+    def freeze(self) -> "GemeenteDetector":
+        """Compute failure links (breadth-first)"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+        return self
+
+    def find_all(self, text: str) -> List[GemeenteMention]:
+        """Every gemeente mention in a word text, including overlapping ones"""
+        mentions = []
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+
+            for pattern_id in self._outputs[node]:
+                length, gemeente = self._patterns[pattern_id]
+                start = i - length + 1
+                end = i + 1
+                if (start == 0 or text[start - 1] == ' ') and (end == len(text) or text[end] == ' '):
+                    mentions.append(GemeenteMention(gemeente, start, end))
+        return mentions
+
+    def detect(self, normalized_query: str) -> Tuple[List[GemeenteMention], str]:
+        """
+        Split a normalized query into gemeente mentions and the remaining text
+
+        Overlapping mentions are resolved leftmost-longest, so "den haag"
+        wins over a gemeente called "haag".
+
+        Returns:
+            Tuple of (mentions in query order, remaining word text)
+        """
+        text = word_text(normalized_query)
+        candidates = sorted(self.find_all(text), key=lambda m: (m.start, -(m.end - m.start)))
+
+        mentions = []
+        position = 0
+        for mention in candidates:
+            if mention.start >= position:
+                mentions.append(mention)
+                position = mention.end
+
+        remainder = []
+        position = 0
+        for mention in mentions:
+            remainder.append(text[position:mention.start])
+            position = mention.end
+        remainder.append(text[position:])
+
+        return mentions, ' '.join(' '.join(remainder).split())
+
+    def __len__(self) -> int:
+        return len(self._patterns)
@@ -0,0 +1,437 @@
+"""
+Memory-mapped binary catalog index file
+
+A read-only file holding a CatalogSnapshot: the catalog rows, the
+prepared (normalized, tokenized) form of every searchable field, the
+vocabulary and the lookup indexes (prefix indexes, trigram indexes,
+spelling corrector). A fresh process can answer suggestions without reading
+the catalog tables, normalizing text or rebuilding indexes. Build it with
+scripts/build_index_file.py.
+
+The file is mmap'ed and the lookup indexes read their tables in place:
+sorted string tables are bisected and posting lists are sliced as uint32
+memoryviews, nothing is unpacked up front. Only the rows and prepared
+fields are materialized into records, and the cheap derived indexes
+(gemeente detector, association bitsets) are rebuilt from them.
+
+Layout (little-endian):
+    header    magic, format version, built_at, catalog fingerprint, section count
+    sections  table of (name, offset, length), then the section data,
+              every section 8-byte aligned
+
+Logical tables are stored as one or more sections:
+    strings   <name>.off (uint32 offsets, n + 1), <name>.dat (utf-8),
+              <name>.nul (uint8 null flags, only if a value is None)
+    lists     <name>.off (uint32 offsets, n + 1), <name>.dat (uint32 values)
+    uint32    <name> (uint32 values)
+    int64     <name> (int64 values)
+
+The fingerprint identifies the catalog contents the file was built from
+(db.get_catalog_fingerprint()), so staleness is one small Postgres query.
+Readers reject files with another FORMAT_VERSION; bump it whenever the
+layout, the text normalization or what the indexes hold changes.
+"""
+
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from bisect import bisect_left
+import gc
+import mmap
+import os
+import struct
+import time
+
+from app.services.catalog import (
+    AssociationRecord, CatalogSnapshot, GemeenteEntry, GemeenteRecord,
+    PreparedText, ServiceEntry, ServiceRecord
+)
+from app.services.prefix_index import PrefixIndex
+from app.services.spelling import SpellingCorrector
+from app.services.trigram_index import TrigramIndex
+
+
+MAGIC = b"ONLSIDX\x00"
+FORMAT_VERSION = 3
+
+_HEADER = struct.Struct("<8sIxxxxd64sI")
+_SECTION = struct.Struct("<32sQQ")
+_ALIGN = 8
+
+
+class IndexFileError(ValueError):
+    """The file is not a readable index file of this format version"""
+
+
+class StringTable(Sequence):
+    """Read-only sequence of strings stored as offsets + utf-8 data"""
+
+    def __init__(self, offsets: memoryview, data: memoryview, nulls: Optional[memoryview] = None):
+        self._offsets = offsets
+        self._data = data
+        self._nulls = nulls
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        if self._nulls is not None and self._nulls[i]:
+            return None
+        return str(self._data[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        # Bulk decode for loading whole tables
+        data = self._data
+        offsets = self._offsets.tolist()
+        nulls = self._nulls.tolist() if self._nulls is not None else None
+        for i in range(len(offsets) - 1):
+            if nulls is not None and nulls[i]:
+                yield None
+            else:
+                yield str(data[offsets[i]:offsets[i + 1]], 'utf-8')
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class ListTable(Sequence):
+    """Read-only sequence of uint32 lists stored as offsets + values"""
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self._offsets = offsets
+        self._data = data
+
+    def __getitem__(self, i: int) -> memoryview:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._data[self._offsets[i]:self._offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[List[int]]:
+        # Bulk decode for loading whole tables
+        values = self._data.tolist()
+        offsets = self._offsets.tolist()
+        for i in range(len(offsets) - 1):
+            yield values[offsets[i]:offsets[i + 1]]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class SortedTable(Mapping):
+    """Read-only mapping over sorted string keys and aligned values (bisect lookup)"""
+
+    def __init__(self, keys: Sequence, values: Sequence, transform: Optional[Callable[[Any], Any]] = None):
+        self._keys = keys
+        self._values = values
+        self._transform = transform
+
+    def __getitem__(self, key: str) -> Any:
+        i = bisect_left(self._keys, key)
+        if i == len(self._keys) or self._keys[i] != key:
+            raise KeyError(key)
+        value = self._values[i]
+        return self._transform(value) if self._transform else value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class IndexFileWriter:
+    """Collects tables and writes them as one index file"""
+
+    def __init__(self):
+        self._sections: List[Tuple[str, bytes]] = []
+
+    def _add(self, name: str, data: bytes) -> None:
+        self._sections.append((name, data))
+
+    def add_strings(self, name: str, values: Sequence[Optional[str]]) -> None:
+        encoded = [(v or '').encode('utf-8') for v in values]
+        offsets = [0]
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        self._add(f"{name}.off", struct.pack(f"<{len(offsets)}I", *offsets))
+        self._add(f"{name}.dat", b''.join(encoded))
+        if any(v is None for v in values):
+            self._add(f"{name}.nul", bytes(v is None for v in values))
+
+    def add_lists(self, name: str, lists: Sequence[Sequence[int]]) -> None:
+        offsets = [0]
+        for values in lists:
+            offsets.append(offsets[-1] + len(values))
+        flat = [value for values in lists for value in values]
+        self._add(f"{name}.off", struct.pack(f"<{len(offsets)}I", *offsets))
+        self._add(f"{name}.dat", struct.pack(f"<{len(flat)}I", *flat))
+
+    def add_uint32(self, name: str, values: Sequence[int]) -> None:
+        self._add(name, struct.pack(f"<{len(values)}I", *values))
+
+    def add_int64(self, name: str, values: Sequence[int]) -> None:
+        self._add(name, struct.pack(f"<{len(values)}q", *values))
+
+    def write(self, path: str, fingerprint: str) -> None:
+        """Write the file atomically (temp file + rename)"""
+        header_size = _HEADER.size + _SECTION.size * len(self._sections)
+        offset = -(-header_size // _ALIGN) * _ALIGN
+        table = []
+        for name, data in self._sections:
+            table.append(_SECTION.pack(name.encode('ascii'), offset, len(data)))
+            offset += -(-len(data) // _ALIGN) * _ALIGN
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(
+                MAGIC, FORMAT_VERSION, time.time(),
+                fingerprint.encode('ascii'), len(self._sections)
+            ))
+            f.write(b''.join(table))
+            for name, data in self._sections:
+                f.write(b'\0' * (-f.tell() % _ALIGN))
+                f.write(data)
+        os.replace(tmp_path, path)
+
+
+class IndexFile:
+    """Read-only mmap of an index file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # empty file
+                raise IndexFileError(f"{path}: {e}")
+        self._buffer = memoryview(self._mmap)
+
+        if len(self._buffer) < _HEADER.size:
+            raise IndexFileError(f"{path}: truncated header")
+        magic, version, built_at, fingerprint, n_sections = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise IndexFileError(f"{path}: not an index file")
+        if version != FORMAT_VERSION:
+            raise IndexFileError(f"{path}: format version {version}, expected {FORMAT_VERSION}")
+
+        self.built_at = built_at
+        self.fingerprint = fingerprint.rstrip(b'\0').decode('ascii')
+        self._sections: Dict[str, Tuple[int, int]] = {}
+        for i in range(n_sections):
+            name, offset, length = _SECTION.unpack_from(self._buffer, _HEADER.size + i * _SECTION.size)
+            if offset + length > len(self._buffer):
+                raise IndexFileError(f"{path}: truncated section")
+            self._sections[name.rstrip(b'\0').decode('ascii')] = (offset, length)
+
+    def _section(self, name: str) -> memoryview:
+        try:
+            offset, length = self._sections[name]
+        except KeyError:
+            raise IndexFileError(f"{self.path}: missing section {name}")
+        return self._buffer[offset:offset + length]
+
+    def has(self, name: str) -> bool:
+        return name in self._sections
+
+    def strings(self, name: str) -> StringTable:
+        nulls = self._section(f"{name}.nul") if self.has(f"{name}.nul") else None
+        return StringTable(self._section(f"{name}.off").cast('I'), self._section(f"{name}.dat"), nulls)
+
+    def lists(self, name: str) -> ListTable:
+        return ListTable(self._section(f"{name}.off").cast('I'), self._section(f"{name}.dat").cast('I'))
+
+    def uint32(self, name: str) -> memoryview:
+        return self._section(name).cast('I')
+
+    def int64(self, name: str) -> memoryview:
+        return self._section(name).cast('q')
+
+
+def _write_prefix_index(writer: IndexFileWriter, name: str, index: PrefixIndex) -> None:
+    terms, docs = index.parts()
+    writer.add_strings(f"{name}.terms", terms)
+    writer.add_lists(f"{name}.docs", docs)
+
+
+def _read_prefix_index(index_file: IndexFile, name: str) -> PrefixIndex:
+    return PrefixIndex.from_parts(index_file.strings(f"{name}.terms"), index_file.lists(f"{name}.docs"))
+
+
+def _write_trigram_index(writer: IndexFileWriter, name: str, index: TrigramIndex) -> None:
+    tokens, token_sizes, postings, token_docs = index.parts()
+    grams = sorted(postings)
+    writer.add_strings(f"{name}.tokens", tokens)
+    writer.add_uint32(f"{name}.sizes", token_sizes)
+    writer.add_lists(f"{name}.token_docs", [sorted(token_docs[t]) for t in tokens])
+    writer.add_strings(f"{name}.grams", grams)
+    writer.add_lists(f"{name}.postings", [postings[g] for g in grams])
+
+
+def _read_trigram_index(index_file: IndexFile, name: str) -> TrigramIndex:
+    tokens = index_file.strings(f"{name}.tokens")
+    return TrigramIndex.from_parts(
+        tokens,
+        index_file.uint32(f"{name}.sizes"),
+        SortedTable(index_file.strings(f"{name}.grams"), index_file.lists(f"{name}.postings")),
+        SortedTable(tokens, index_file.lists(f"{name}.token_docs")),
+    )
+
+
+def _write_spelling(writer: IndexFileWriter, spelling: SpellingCorrector) -> None:
+    words, frequencies, delete_map = spelling.parts()
+    word_ids = {word: i for i, word in enumerate(words)}
+    variants = sorted(delete_map)
+    writer.add_uint32("spelling.settings", [spelling.max_edit_distance, spelling.min_length])
+    writer.add_strings("spelling.words", words)
+    writer.add_uint32("spelling.frequencies", [frequencies[w] for w in words])
+    writer.add_strings("spelling.variants", variants)
+    writer.add_lists("spelling.deletes", [[word_ids[w] for w in delete_map[v]] for v in variants])
+
+
+def _read_spelling(index_file: IndexFile) -> SpellingCorrector:
+    max_edit_distance, min_length = index_file.uint32("spelling.settings")
+    words = index_file.strings("spelling.words")
+    return SpellingCorrector.from_parts(
+        words,
+        SortedTable(words, index_file.uint32("spelling.frequencies")),
+        SortedTable(
+            index_file.strings("spelling.variants"),
+            index_file.lists("spelling.deletes"),
+            transform=lambda ids: [words[i] for i in ids]
+        ),
+        max_edit_distance,
+        min_length,
+    )
+
+
+def write_index_file(path: str, snapshot: CatalogSnapshot, fingerprint: str) -> None:
+    """
+    Serialize a snapshot (built with indexes) and its catalog fingerprint
+
+    Args:
+        path: Output file, replaced atomically
+        snapshot: CatalogSnapshot built with indexes=True
+        fingerprint: Catalog fingerprint the rows were read at
+    """
+    writer = IndexFileWriter()
+
+    services = [entry.service for entry in snapshot.services]
+    keywords = [k for s in services for k in s.get('keywords') or ()]
+    keyword_ranges, start = [], 0
+    for service in services:
+        count = len(service.get('keywords') or ())
+        keyword_ranges.append(range(start, start + count))
+        start += count
+    writer.add_int64("services.id", [s['id'] for s in services])
+    writer.add_strings("services.name", [s['name'] for s in services])
+    writer.add_strings("services.description", [s.get('description') for s in services])
+    writer.add_strings("services.category", [s.get('category') for s in services])
+    writer.add_strings("services.keywords", keywords)
+    writer.add_lists("services.keyword_ids", keyword_ranges)
+
+    gemeentes = [entry.gemeente for entry in snapshot.gemeentes]
+    writer.add_int64("gemeentes.id", [g['id'] for g in gemeentes])
+    writer.add_strings("gemeentes.name", [g['name'] for g in gemeentes])
+
+    associations = snapshot.associations
+    writer.add_int64("associations.gemeente_id", [a['gemeente_id'] for a in associations])
+    writer.add_int64("associations.service_id", [a['service_id'] for a in associations])
+    writer.add_strings("associations.gemeente_name", [a.get('gemeente_name') for a in associations])
+
+    # Prepared fields in snapshot order: service fields, then gemeente names
+    vocabulary = snapshot.vocabulary
+    fields = [f for entry in snapshot.services for f in snapshot.service_fields(entry)]
+    fields.extend(entry.name for entry in snapshot.gemeentes)
+    writer.add_strings("vocabulary", sorted(vocabulary, key=vocabulary.get))
+    writer.add_strings("fields.normalized", [f.normalized for f in fields])
+    writer.add_lists("fields.words", [sorted(vocabulary[w] for w in f.words) for f in fields])
+
+    _write_prefix_index(writer, "service_prefixes", snapshot.service_prefixes)
+    _write_prefix_index(writer, "gemeente_prefixes", snapshot.gemeente_prefixes)
+    _write_trigram_index(writer, "service_trigrams", snapshot.service_trigrams)
+    _write_trigram_index(writer, "gemeente_trigrams", snapshot.gemeente_trigrams)
+    _write_spelling(writer, snapshot.spelling)
+
+    writer.write(path, fingerprint)
+
+
+def load_index_file(path: str, version: int = 0) -> CatalogSnapshot:
+    """
+    Snapshot backed by an index file
+
+    Raises:
+        IndexFileError: If the file is missing sections or has another format version
+        OSError: If the file cannot be opened
+    """
+    index_file = IndexFile(path)
+
+    # Loading allocates tens of thousands of small acyclic objects; the
+    # cyclic collector passes they would trigger cost as much as the load
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _load_snapshot(index_file, version)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _load_snapshot(index_file: IndexFile, version: int) -> CatalogSnapshot:
+    words = list(index_file.strings("vocabulary"))
+    field_texts = iter(index_file.strings("fields.normalized"))
+    field_words = iter(index_file.lists("fields.words"))
+
+    bits = [1 << word_id for word_id in range(len(words))]
+
+    def next_field() -> PreparedText:
+        ids = next(field_words)
+        mask = sum([bits[i] for i in ids])
+        return PreparedText(next(field_texts), frozenset([words[i] for i in ids]), mask)
+
+    keywords = list(index_file.strings("services.keywords"))
+    service_entries = []
+    for service_id, name, description, category, keyword_ids in zip(
+        index_file.int64("services.id"),
+        index_file.strings("services.name"),
+        index_file.strings("services.description"),
+        index_file.strings("services.category"),
+        index_file.lists("services.keyword_ids"),
+    ):
+        record = ServiceRecord({
+            'id': service_id,
+            'name': name,
+            'description': description,
+            'category': category,
+            'keywords': [keywords[i] for i in keyword_ids],
+        })
+        service_entries.append(ServiceEntry(
+            service=record,
+            name=next_field(),
+            keywords=[next_field() for _ in record.keywords],
+            description=next_field() if record.description else None,
+            category=next_field() if record.category else None,
+        ))
+
+    gemeente_entries = [
+        GemeenteEntry(GemeenteRecord({'id': gemeente_id, 'name': name}), next_field())
+        for gemeente_id, name in zip(index_file.int64("gemeentes.id"), index_file.strings("gemeentes.name"))
+    ]
+    associations = [
+        AssociationRecord({'gemeente_id': gemeente_id, 'service_id': service_id, 'gemeente_name': gemeente_name})
+        for gemeente_id, service_id, gemeente_name in zip(
+            index_file.int64("associations.gemeente_id"),
+            index_file.int64("associations.service_id"),
+            index_file.strings("associations.gemeente_name"),
+        )
+    ]
+
+    snapshot = CatalogSnapshot(service_entries, gemeente_entries, associations, version)
+    snapshot.vocabulary = {word: word_id for word_id, word in enumerate(words)}
+    snapshot.service_prefixes = _read_prefix_index(index_file, "service_prefixes")
+    snapshot.gemeente_prefixes = _read_prefix_index(index_file, "gemeente_prefixes")
+    snapshot.service_trigrams = _read_trigram_index(index_file, "service_trigrams")
+    snapshot.gemeente_trigrams = _read_trigram_index(index_file, "gemeente_trigrams")
+    snapshot.spelling = _read_spelling(index_file)
+    snapshot.build_derived_indexes()
+    # Keeps the mapping alive for as long as the snapshot's indexes are used
+    snapshot.index_file = index_file
+    snapshot.fingerprint = index_file.fingerprint
+    return snapshot
@@ -0,0 +1,206 @@
+"""
+Keystroke sessions: incremental narrowing of type-ahead queries
+
+A typing user sends "pa", "pas", "pasp", "paspo" in quick succession. With a
+session token, the services that can still match are carried from one
+keystroke to the next, so a query that extends the previous one is only
+checked against what was left instead of the whole catalog.
+
+The carried set must be a superset of the matches, or results would change.
+For the heuristic scorer and a single-word query w, a service can only
+match when one of its fields
+    - contains w (exact and substring matches, and shared or partial words
+      since a word of the field then contains w), or
+    - is, or has a word that is, a substring of w (field inside the query,
+      partial matches the other way round), or
+    - shares the stem of w
+The first set only shrinks as w grows ("pasp" inside a field implies "pas"
+is), so it is what a session carries and narrows per keystroke; the other
+two are dictionary lookups per request. Anything else is scored normally:
+backspaces and edits mid-string restart from the full catalog, and queries
+with more than one word are not narrowed.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Any
+import re
+import threading
+import time
+import weakref
+
+from app.core.config import settings
+from app.services.catalog import CatalogSnapshot, PreparedText, ServiceEntry
+from app.services.stemmer import stem
+
+_WORD = re.compile(r'\w+')
+
+
+class SessionIndex:
+    """Per-snapshot lookup tables for narrowing (built once on first use)"""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        # All field texts of a service in one string; a single-word query
+        # cannot contain the separator, so it never matches across fields
+        self.texts: List[str] = []
+        # Single-word field texts and field words -> services
+        self.fragments: Dict[str, Set[int]] = {}
+        self.stems: Dict[str, Set[int]] = {}
+        for doc_id, entry in enumerate(snapshot.services):
+            fields = snapshot.service_fields(entry)
+            self.texts.append('\x00'.join(field.normalized for field in fields))
+            for field in fields:
+                if not field.normalized or _WORD.fullmatch(field.normalized):
+                    self.fragments.setdefault(field.normalized, set()).add(doc_id)
+                for word in field.words:
+                    self.fragments.setdefault(word, set()).add(doc_id)
+                for field_stem in field.stems:
+                    self.stems.setdefault(field_stem, set()).add(doc_id)
+        self.max_fragment = max(map(len, self.fragments), default=0)
+
+    def containing(self, word: str, doc_ids: Optional[Sequence[int]] = None) -> List[int]:
+        """Services (of doc_ids, default all) with a field containing word"""
+        texts = self.texts
+        if doc_ids is None:
+            return [doc_id for doc_id, text in enumerate(texts) if word in text]
+        return [doc_id for doc_id in doc_ids if word in texts[doc_id]]
+
+    def inside(self, word: str) -> Set[int]:
+        """Services with a field or field word inside word, or sharing its stem"""
+        doc_ids = set(self.fragments.get('', ()))
+        fragments = self.fragments
+        for start in range(len(word)):
+            for end in range(start + 1, min(len(word), start + self.max_fragment) + 1):
+                hits = fragments.get(word[start:end])
+                if hits:
+                    doc_ids |= hits
+        doc_ids |= self.stems.get(stem(word), set())
+        return doc_ids
+
+
+def session_index(snapshot: CatalogSnapshot) -> SessionIndex:
+    """Session index of the snapshot, built once on first use"""
+    return snapshot.get_engine("keystroke_session", SessionIndex)
+
+
+class KeystrokeSession:
+    """
+    Narrowing state of one typing user
+
+    The state (snapshot, query word, services containing it) is replaced as
+    a whole, so concurrent requests of a session never see a mix of two.
+    """
+
+    def __init__(self):
+        self._state: Optional[tuple] = None
+        self.extended = 0
+        self.restarted = 0
+
+    def narrow(
+        self,
+        snapshot: CatalogSnapshot,
+        query: PreparedText,
+        candidates: List[ServiceEntry]
+    ) -> List[ServiceEntry]:
+        """
+        Candidates that can still match query, in catalog order
+
+        Updates the session with query, so the next keystroke can narrow
+        further. Callers must use the heuristic scorer.
+        """
+        word = query.normalized
+        if query.words != {word}:
+            self._state = None
+            return candidates
+
+        index = session_index(snapshot)
+        state = self._state
+        if state is not None and state[0]() is snapshot and word.startswith(state[1]):
+            containing = index.containing(word, state[2])
+            self.extended += 1
+        else:
+            containing = index.containing(word)
+            self.restarted += 1
+        self._state = (weakref.ref(snapshot), word, containing)
+
+        allowed = index.inside(word)
+        allowed.update(containing)
+        if candidates is snapshot.services:
+            return [candidates[doc_id] for doc_id in sorted(allowed)]
+        dense = snapshot.service_dense
+        return [entry for entry in candidates if dense[entry.service['id']] in allowed]
+
+
+class SessionStore:
+    """Bounded map of session token -> KeystrokeSession with idle expiry"""
+
+    def __init__(self, max_sessions: int = 1024, ttl_seconds: float = 60.0):
+        """
+        Args:
+            max_sessions: Sessions kept before the least recently used is
+                dropped (0 disables sessions)
+            ttl_seconds: Seconds a session lives after its last request
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_sessions > 0
+
+    def session(self, token: str) -> Optional[KeystrokeSession]:
+        """Live session for token, created if missing or expired (None if disabled)"""
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is not None and now >= entry[0]:
+                del self._sessions[token]
+                self.expirations += 1
+                entry = None
+
+            session = entry[1] if entry is not None else KeystrokeSession()
+            if entry is None:
+                self.created += 1
+            self._sessions[token] = (now + self.ttl_seconds, session)
+            self._sessions.move_to_end(token)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+            return session
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring (extended/restarted summed over live sessions)"""
+        with self._lock:
+            sessions = [session for _, session in self._sessions.values()]
+            return {
+                "enabled": self.enabled,
+                "size": len(sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "created": self.created,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "extended": sum(session.extended for session in sessions),
+                "restarted": sum(session.restarted for session in sessions),
+            }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+# Global keystroke session store instance
+session_store = SessionStore(
+    max_sessions=settings.KEYSTROKE_SESSIONS,
+    ttl_seconds=settings.KEYSTROKE_SESSION_TTL
+)
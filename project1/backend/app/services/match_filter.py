@@ -0,0 +1,163 @@
+"""
+No-match fast path for the heuristic scorer
+
+A query whose words have no prefix or trigram hit in the indexes ("xqz",
+"xqzw", ...) falls back to scoring every catalog entry, usually to find
+nothing. MatchFilter decides up front, from Bloom filters over the catalog
+text, whether any field could match at all. It only says "no" when that is
+certain, so results never change.
+
+The heuristic scorer can only match a field when:
+    1. the query equals or is inside the field text
+    2. the field text is inside the query
+    3. the query shares a keyword or a keyword stem with the field (Jaccard)
+    4. a query word (3+ chars) is inside a field word, or the other way round
+
+The filter holds the catalog's character bi- and trigrams, the first (up
+to) three characters of every field text and of every word, and uses the
+snapshot vocabulary, so each case is rejected by one missing n-gram or by
+the absence of any head in the query. A Bloom filter never has false
+negatives; its false positives just mean the full scan runs as before.
+A query probes the filters a dozen times or more, so each is sized for a
+0.1% false positive rate to keep the per-query rate low.
+
+DutchMatcher probes the filter before retrieval, so a rejected query skips
+the index lookups and the scoring of their hits ("zzzz pa" has prefix hits
+for "pa", none of which can match). Queries under two characters have no
+n-gram to miss and are not probed. With the substring index, retrieval
+finds every entry that can match, so a query the filter lets through and
+nothing is retrieved for is dead as well, without a full scan.
+
+Queries proven dead are kept in a small per-snapshot negative cache, so
+repeats (and backspacing to them) return before any text processing. The
+cache is also asked by prefix: a dead query is inside no catalog field, so
+neither is any text starting with it, and the substring index skips its
+searches for extensions ("zzzz" -> "zzzz pa"). An extension is not dead
+itself, it can match again ("xqz" -> "xqz paspoort"), so it is still
+probed and retrieved. A new catalog snapshot starts with a new filter and
+an empty cache.
+"""
+
+from collections import OrderedDict
+from typing import Hashable
+import threading
+
+from app.services.bloom_filter import BloomFilter
+from app.services.catalog import CatalogSnapshot, PreparedText
+
+
+def _ngrams(text: str, n: int):
+    return (text[i:i + n] for i in range(len(text) - n + 1))
+
+
+class MatchFilter:
+    """Bloom filters over catalog text plus a negative cache of dead queries"""
+
+    def __init__(self, snapshot: CatalogSnapshot, dead_capacity: int = 1024, error_rate: float = 0.001):
+        texts = [entry.name.normalized for entry in snapshot.gemeentes]
+        for entry in snapshot.services:
+            texts.extend(field.normalized for field in snapshot.service_fields(entry))
+        self.vocabulary = snapshot.vocabulary or {}
+        self.stems = set()
+
+        # An empty field text is inside every query
+        self.always_matches = any(not text for text in texts)
+
+        grams = set()
+        heads = set()
+        # Keywords and categories repeat across services
+        for entry in snapshot.gemeentes:
+            self.stems.update(entry.name.stems)
+        for entry in snapshot.services:
+            for field in snapshot.service_fields(entry):
+                self.stems.update(field.stems)
+
+        for text in set(texts):
+            heads.add(text[:3])
+            grams.update([text[i:i + 2] for i in range(len(text) - 1)])
+            grams.update([text[i:i + 3] for i in range(len(text) - 2)])
+        word_heads = {word[:3] for word in self.vocabulary if len(word) >= 3}
+
+        self._grams = BloomFilter(len(grams), error_rate)
+        self._grams.update(grams)
+        self._heads = BloomFilter(len(heads), error_rate)
+        self._heads.update(heads)
+        self._word_heads = BloomFilter(len(word_heads), error_rate)
+        self._word_heads.update(word_heads)
+
+        self.dead_capacity = dead_capacity
+        self._dead: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.dead_hits = 0
+
+    def may_match(self, query: PreparedText) -> bool:
+        """False only if the heuristic scorer cannot match any catalog field"""
+        if self.always_matches:
+            return True
+
+        text = query.normalized
+        if len(text) < 2:
+            return True
+
+        # 1. Query inside a field: all of its n-grams occur in the catalog
+        n = min(3, len(text))
+        if all(gram in self._grams for gram in _ngrams(text, n)):
+            return True
+
+        # 2. Field inside the query: the query contains a field's head
+        for i in range(len(text)):
+            for n in (1, 2, 3):
+                if i + n <= len(text) and text[i:i + n] in self._heads:
+                    return True
+
+        # 3. Shared keyword or stem
+        if any(word in self.vocabulary for word in query.words):
+            return True
+        if any(stem in self.stems for stem in query.stems):
+            return True
+
+        # 4. Query word inside a catalog word, or a catalog word inside it
+        for word in query.words:
+            if len(word) < 3:
+                continue
+            grams = list(_ngrams(word, 3))
+            if all(gram in self._grams for gram in grams):
+                return True
+            if any(gram in self._word_heads for gram in grams):
+                return True
+
+        self.rejected += 1
+        return False
+
+    def is_dead(self, key: Hashable) -> bool:
+        """True if key was marked dead (no candidates) for this snapshot"""
+        with self._lock:
+            if key not in self._dead:
+                return False
+            self._dead.move_to_end(key)
+            self.dead_hits += 1
+            return True
+
+    def has_dead_prefix(self, kind: Hashable, text: str) -> bool:
+        """
+        True if text, or a prefix of it, was marked dead under key
+        (kind, prefix): text is then inside no field of kind
+        """
+        with self._lock:
+            dead = self._dead
+            if not dead:
+                return False
+            return any((kind, text[:end]) in dead for end in range(1, len(text) + 1))
+
+    def mark_dead(self, key: Hashable) -> None:
+        with self._lock:
+            self._dead[key] = None
+            self._dead.move_to_end(key)
+            while len(self._dead) > self.dead_capacity:
+                self._dead.popitem(last=False)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the Bloom filters' bit arrays"""
+        return self._grams.nbytes + self._heads.nbytes + self._word_heads.nbytes
@@ -0,0 +1,208 @@
+"""
+Retrieve-then-rerank phases of the suggestion pipeline
+
+Service matching runs in two explicit phases:
+
+    retrieve  - index lookups only (prefix, exact term and trigram postings
+                for DutchMatcher, posting traversal for bm25f, the sparse
+                product for tfidf); hands at most N candidates on
+    rerank    - the expensive per-candidate work: fuzzy field scoring, then
+                association weighting ("associate") and template boosts
+                ("templates") in the suggestion route
+
+N is set per engine (RETRIEVE_LIMITS), so the work after retrieval is
+bounded whatever the catalog size. A MatchBudget bounds the CPU time of a
+request: with one, candidates are scored best retrieval score first and
+scoring stops when the budget runs out, keeping the best results so far
+(the response is marked partial). A MatchTrace collects the time and
+candidate count of every phase of one request; PipelineStats aggregates
+traces per engine for /api/health, including tail latency per phase.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict
+import threading
+import time
+
+
+# Retrieval candidates handed to the rerank phase, per engine (0 = no limit)
+DEFAULT_RETRIEVE_LIMITS = {
+    "dutch": 1000,
+    "sharded": 1000,
+    "tfidf": 1000,
+    "bm25f": 1000,
+}
+
+# Pipeline phases in execution order
+PHASES = ("retrieve", "rerank", "associate", "templates")
+
+
+def parse_retrieve_limits(spec: str) -> Dict[str, int]:
+    """
+    Parse "dutch=500,bm25f=200" into retrieval limits per engine
+
+    Engines missing from spec keep DEFAULT_RETRIEVE_LIMITS; unknown engine
+    names raise ValueError.
+    """
+    limits = dict(DEFAULT_RETRIEVE_LIMITS)
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        engine, _, value = part.partition('=')
+        engine = engine.strip()
+        if engine not in DEFAULT_RETRIEVE_LIMITS:
+            raise ValueError(f"Unknown match engine '{engine}' in retrieve limits")
+        limits[engine] = int(value)
+    return limits
+
+
+class MatchBudget:
+    """
+    CPU time allowance for matching one request
+
+    Measured with time.thread_time, so time the request's thread spends
+    waiting (for the GIL or I/O) is not charged to it.
+    """
+
+    __slots__ = ('deadline', 'exhausted', '_clock')
+
+    def __init__(self, budget_ms: float, clock=time.thread_time):
+        """
+        Args:
+            budget_ms: CPU milliseconds from now (0 or less = unlimited)
+            clock: CPU clock in seconds
+        """
+        self._clock = clock
+        self.deadline = clock() + budget_ms / 1000 if budget_ms > 0 else float('inf')
+        self.exhausted = False
+
+    def expired(self) -> bool:
+        """True once the budget is used up (and from then on)"""
+        if not self.exhausted and self._clock() >= self.deadline:
+            self.exhausted = True
+        return self.exhausted
+
+    def charge(self, ms: float) -> None:
+        """Count CPU time spent for the request elsewhere (e.g. in shard workers)"""
+        self.deadline -= ms / 1000
+
+    def remaining_ms(self) -> float:
+        """CPU milliseconds left (inf if unlimited)"""
+        return max(0.0, (self.deadline - self._clock()) * 1000)
+
+
+class MatchTrace:
+    """Time, candidate count and dropped candidates per phase of one request"""
+
+    __slots__ = ('engine', 'phases', 'dropped', 'partial')
+
+    def __init__(self, engine: str = "dutch"):
+        self.engine = engine
+        # phase -> [milliseconds, candidates]
+        self.phases: Dict[str, list] = {}
+        # Retrieved candidates cut off by the retrieval limit
+        self.dropped = 0
+        # Scoring stopped early because the CPU budget ran out
+        self.partial = False
+
+    def record(self, phase: str, started: float, candidates: int) -> None:
+        """
+        Add a phase run that began at started (time.perf_counter()) and
+        produced candidates; repeated runs of a phase add up
+        """
+        self.add(phase, (time.perf_counter() - started) * 1000, candidates)
+
+    def add(self, phase: str, ms: float, candidates: int) -> None:
+        """Add a phase run measured elsewhere (e.g. in a shard worker)"""
+        entry = self.phases.get(phase)
+        if entry is None:
+            self.phases[phase] = [ms, candidates]
+        else:
+            entry[0] += ms
+            entry[1] += candidates
+
+
+class _PhaseTotals:
+    """Running totals of one phase of one engine"""
+
+    __slots__ = ('calls', 'total_ms', 'max_ms', 'candidates', 'max_candidates', 'recent_ms')
+
+    def __init__(self, window: int):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.candidates = 0
+        self.max_candidates = 0
+        self.recent_ms: Deque[float] = deque(maxlen=window)
+
+    def add(self, ms: float, candidates: int) -> None:
+        self.calls += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.candidates += candidates
+        self.max_candidates = max(self.max_candidates, candidates)
+        self.recent_ms.append(ms)
+
+    def summary(self) -> Dict[str, Any]:
+        recent = sorted(self.recent_ms)
+        p99 = recent[min(len(recent) - 1, int(len(recent) * 0.99))] if recent else 0.0
+        return {
+            "calls": self.calls,
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "p99_ms": round(p99, 3),
+            "max_ms": round(self.max_ms, 3),
+            "mean_candidates": round(self.candidates / self.calls, 1) if self.calls else 0.0,
+            "max_candidates": self.max_candidates,
+        }
+
+
+class PipelineStats:
+    """Thread-safe per-engine, per-phase aggregates of request traces"""
+
+    def __init__(self, window: int = 1024):
+        """
+        Args:
+            window: Recent runs per phase kept for the p99 latency
+        """
+        self.window = window
+        self._totals: Dict[str, Dict[str, _PhaseTotals]] = {}
+        self._dropped: Dict[str, int] = {}
+        self._partial: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, trace: MatchTrace) -> None:
+        """Aggregate a finished request trace"""
+        with self._lock:
+            phases = self._totals.setdefault(trace.engine, {})
+            for phase, (ms, candidates) in trace.phases.items():
+                totals = phases.get(phase)
+                if totals is None:
+                    totals = phases[phase] = _PhaseTotals(self.window)
+                totals.add(ms, candidates)
+            self._dropped[trace.engine] = self._dropped.get(trace.engine, 0) + trace.dropped
+            self._partial[trace.engine] = self._partial.get(trace.engine, 0) + trace.partial
+
+    def clear(self) -> None:
+        with self._lock:
+            self._totals.clear()
+            self._dropped.clear()
+            self._partial.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per engine: phase summaries in pipeline order, dropped candidates and partial requests"""
+        with self._lock:
+            return {
+                engine: {
+                    "phases": {
+                        phase: phases[phase].summary()
+                        for phase in sorted(phases, key=lambda p: PHASES.index(p) if p in PHASES else len(PHASES))
+                    },
+                    "dropped": self._dropped.get(engine, 0),
+                    "partial": self._partial.get(engine, 0),
+                }
+                for engine, phases in self._totals.items()
+            }
+
+
+# Global pipeline stats instance
+pipeline_stats = PipelineStats()
@@ -0,0 +1,112 @@
+"""
+Dutch phonetic keys for spelling variants
+
+Many Dutch misspellings are spellings of the same sound: "rijbewys" and
+"rijbeweis" for "rijbewijs", "paspoordt" for "paspoort", "cadeau" and
+"kado". phonetic_key() folds such spellings to one key, so a catalog word
+and its variants share a key and a misspelled query word finds the catalog
+spelling with one dictionary lookup instead of a fuzzy search. Like the
+symmetric-delete stage, a correction is bounded by edit distance, relative
+to the word's length (see max_distance), and the matcher scores it next to
+the original word, not instead of it.
+
+Folding, in order:
+    1. SPELLING_VARIATIONS (y -> ij, ey -> ei, ouw -> ou, auw -> au)
+    2. Homophones: eau -> o, ei -> ij, au -> ou
+    3. ch -> g, c -> k
+    4. Word-final d / dt -> t ("wordt", "word" -> "wort")
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional
+import re
+
+from app.services.edit_distance import bounded_edit_distance
+
+
+# Common Dutch spelling variations: canonical spelling -> all spellings
+SPELLING_VARIATIONS = {
+    'ij': ['y', 'ij'],
+    'ei': ['ey', 'ei'],
+    'ou': ['ouw', 'ou'],
+    'au': ['auw', 'au'],
+}
+
+_CANONICAL = {
+    spelling: canonical
+    for canonical, spellings in SPELLING_VARIATIONS.items()
+    for spelling in spellings
+}
+# Longest spelling first, so "ouw" is not read as "ou" + "w"
+_VARIATION_PATTERN = re.compile('|'.join(sorted(_CANONICAL, key=len, reverse=True)))
+
+# Sound confusions on top of the spelling variations: (pattern, replacement)
+CONFUSIONS = [
+    (re.compile(r'eau'), 'o'),
+    (re.compile(r'ei'), 'ij'),
+    (re.compile(r'au'), 'ou'),
+    (re.compile(r'ch'), 'g'),
+    (re.compile(r'c'), 'k'),
+    (re.compile(r'dt?$'), 't'),
+]
+
+
+def max_distance(token: str) -> int:
+    """
+    Edits allowed between token and a word with its key: one, plus one per
+    three letters
+
+    One sound change can cost two edits (y -> ij), and keys fold several,
+    but a short word must not turn into a different one.
+    """
+    return 1 + len(token) // 3
+
+
+@lru_cache(maxsize=65536)
+def phonetic_key(word: str) -> str:
+    """Key shared by the spelling variants of a normalized word"""
+    key = _VARIATION_PATTERN.sub(lambda m: _CANONICAL[m.group(0)], word)
+    for pattern, replacement in CONFUSIONS:
+        key = pattern.sub(replacement, key)
+    return key
+
+
+class PhoneticIndex:
+    """Vocabulary words grouped by phonetic key"""
+
+    def __init__(self, words: Iterable[str], frequencies: Mapping[str, int]):
+        """
+        Args:
+            words: Vocabulary words
+            frequencies: Word -> count, most frequent first on equal keys
+        """
+        buckets: Dict[str, List[str]] = {}
+        for word in words:
+            buckets.setdefault(phonetic_key(word), []).append(word)
+        for bucket in buckets.values():
+            bucket.sort(key=lambda w: (-frequencies[w], w))
+        self._buckets = buckets
+
+    def lookup(self, word: str) -> List[str]:
+        """Vocabulary words with the same key as word, most frequent first"""
+        return self._buckets.get(phonetic_key(word), [])
+
+    def correct(self, token: str) -> Optional[str]:
+        """
+        Vocabulary spelling of token, or None if no close word shares its key
+
+        A word with the key is only close if it is at most max_distance(token)
+        edits away. Among several, the closest wins, then the most frequent.
+        """
+        limit = max_distance(token)
+        best = None
+        best_distance = limit + 1
+        for candidate in self.lookup(token):
+            distance = bounded_edit_distance(token, candidate, limit)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best
+
+    def __len__(self) -> int:
+        """Number of distinct keys"""
+        return len(self._buckets)
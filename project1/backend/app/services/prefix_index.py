@@ -0,0 +1,80 @@
+"""
+Prefix completion index
+
+Sorted term array with per-term postings. A prefix lookup bisects to the
+first term starting with the prefix and walks forward while terms still
+match, so it costs O(log terms + len(prefix) + hits) instead of a substring
+scan over every catalog string.
+"""
+
+from typing import Dict, List, Set, Iterable, Tuple, Sequence
+from bisect import bisect_left
+
+
+class PrefixIndex:
+    """Maps term prefixes to the ids of the documents containing the term"""
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        self._terms: List[str] = []
+        self._docs: List[Tuple[int, ...]] = []
+
+    def add(self, term: str, doc_id: int) -> None:
+        """Register a term for a document (call freeze() when done)"""
+        if term:
+            self._postings.setdefault(term, set()).add(doc_id)
+
+    def add_all(self, terms: Iterable[str], doc_id: int) -> None:
+        for term in terms:
+            self.add(term, doc_id)
+
+    def freeze(self) -> "PrefixIndex":
+        """Sort the terms so the index can be queried"""
+        self._terms = sorted(self._postings)
+        self._docs = [tuple(sorted(self._postings[t])) for t in self._terms]
+        return self
+
+    @classmethod
+    def from_parts(cls, terms: Sequence[str], docs: Sequence[Sequence[int]]) -> "PrefixIndex":
+        """
+        Frozen index over prebuilt sorted terms and their doc id lists
+
+        terms and docs only need indexing and len(), so they can be
+        read-only views over a memory-mapped index file.
+        """
+        index = cls()
+        index._terms = terms
+        index._docs = docs
+        return index
+
+    def parts(self) -> Tuple[Sequence[str], Sequence[Sequence[int]]]:
+        """(sorted terms, doc ids per term) of a frozen index, see from_parts()"""
+        return self._terms, self._docs
+
+    def lookup(self, prefix: str) -> Set[int]:
+        """Ids of all documents with a term starting with prefix"""
+        hits: Set[int] = set()
+        if not prefix:
+            return hits
+
+        terms = self._terms
+        i = bisect_left(terms, prefix)
+        while i < len(terms) and terms[i].startswith(prefix):
+            hits.update(self._docs[i])
+            i += 1
+        return hits
+
+    def postings(self, term: str) -> Sequence[int]:
+        """Ids of the documents with exactly term (sorted)"""
+        terms = self._terms
+        i = bisect_left(terms, term)
+        if i < len(terms) and terms[i] == term:
+            return self._docs[i]
+        return ()
+
+    def terms(self) -> List[str]:
+        """All indexed terms in sorted order"""
+        return self._terms
+
+    def __len__(self) -> int:
+        return len(self._terms)
@@ -0,0 +1,449 @@
+"""
+Sharded multi-process service matcher
+
+Partitions the services of a catalog snapshot into contiguous shards, each
+held by its own worker process with its own snapshot and indexes. A query is
+spell-corrected once against the full catalog, scattered to every shard as
+normalized text (with the original text if it was corrected, see
+DutchMatcher.scoring_queries), matched there with DutchMatcher, and the
+per-shard top-k lists are merged into the global top-k.
+
+Results are identical to DutchMatcher.match_services on the whole snapshot:
+shards are contiguous, so merging on (confidence, catalog position) keeps
+catalog order on ties, and the full-scan fallback (damerau scorer only)
+runs when no shard has an index hit (a second scatter), as it would in a
+single process.
+A retrieve_limit is split evenly over the shards and applied per shard, so
+only results under a limit that cuts off candidates can differ.
+
+Requests run concurrently: every message carries a request id, each worker
+answers its messages in order, and a reader thread hands the replies to the
+waiting request. A new snapshot is loaded into the running workers (see
+load() and ShardPool), so a catalog rebuild does not start new processes.
+
+Drop-in alternative to DutchMatcher.match_services: same
+List[Tuple[Dict, float]] return shape. Workers are started with the spawn
+method (safe in threaded servers) and stopped when the matcher is garbage
+collected or close() is called.
+"""
+
+from typing import Any, List, Dict, Tuple, Optional
+from multiprocessing.connection import wait
+import heapq
+import itertools
+import multiprocessing
+import threading
+import time
+import weakref
+
+from app.services.catalog import CatalogSnapshot, PreparedText
+from app.services.dutch_matcher import DutchMatcher
+from app.services.match_pipeline import MatchBudget, MatchTrace
+
+
+def _match_shard(matcher: DutchMatcher, snapshot: CatalogSnapshot, message: Tuple) -> Tuple:
+    """Match one scattered query against a shard snapshot"""
+    texts, min_confidence, top_k, limit, budget_ms, fallback = message
+    cpu_started = time.thread_time()
+    trace = MatchTrace("sharded")
+    # A spent budget still stops scoring (MatchBudget(0) is unlimited)
+    budget = MatchBudget(max(budget_ms, 1e-3)) if budget_ms is not None else None
+    started = time.perf_counter()
+    # The corrected query, then the original if correction changed it
+    queries = [
+        matcher.score_tokens(
+            matcher.encode_query(PreparedText(normalized, frozenset(words)), snapshot.vocabulary),
+            snapshot
+        )
+        for normalized, words in texts
+    ]
+    query = queries[0]
+    original = queries[1] if len(queries) > 1 else None
+    match_filter = matcher.match_filter(snapshot)
+    if match_filter is not None and not any(match_filter.may_match(text) for text in queries):
+        candidates = []
+    else:
+        # With the filter (heuristic scorer) retrieval is exact and
+        # never falls back to a full scan
+        candidates = matcher.retrieve_candidates(
+            query, snapshot.service_prefixes, snapshot.services,
+            snapshot.service_trigrams, fallback=fallback and match_filter is None,
+            limit=limit, trace=trace, prioritize=budget is not None,
+            substring_index=matcher.substring_index(snapshot), original=original
+        )
+    trace.record("retrieve", started, len(candidates))
+    started = time.perf_counter()
+    if budget is None:
+        matches = matcher.score_candidates(query, candidates, min_confidence, top_k, original=original)
+    else:
+        matches = matcher.score_candidates(
+            query, candidates, min_confidence, top_k,
+            budget=budget, positions=snapshot.service_dense, original=original
+        )
+    trace.record("rerank", started, len(matches))
+    return (bool(candidates), [
+        (snapshot.service_dense[entry.service['id']], confidence)
+        for entry, confidence in matches
+    ], trace.phases, trace.dropped, budget is not None and budget.exhausted,
+        (time.thread_time() - cpu_started) * 1000)
+
+
+def _serve_shard(conn, scorer: str, backend: str) -> None:
+    """
+    Worker process: answer (request_id, kind, payload) messages in order
+
+    A "load" message replaces the shard snapshot with one built from the
+    given rows; a "match" message is answered from the current snapshot.
+    Replies are (request_id, ok, result), with the error as result if not ok.
+    """
+    matcher = DutchMatcher(scorer=scorer, backend=backend)
+    snapshot = None
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+
+        request_id, kind, payload = message
+        try:
+            if kind == "load":
+                # A failed load leaves no snapshot to answer from
+                snapshot = None
+                snapshot = CatalogSnapshot.build(matcher, payload, [], [])
+                matcher.warm(snapshot)
+                result = len(snapshot.services)
+            else:
+                result = _match_shard(matcher, snapshot, payload)
+            conn.send((request_id, True, result))
+        except Exception as e:
+            conn.send((request_id, False, repr(e)))
+    conn.close()
+
+
+class _Call:
+    """The replies of every shard to one message"""
+
+    def __init__(self, request_id: int, n_shards: int):
+        self.request_id = request_id
+        self.replies: List[Any] = [None] * n_shards
+        self.remaining = n_shards
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+    def reply(self, shard: int, ok: bool, result: Any) -> None:
+        if ok:
+            self.replies[shard] = result
+        else:
+            self.error = self.error or result
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.done.set()
+
+    def fail(self, error: str) -> None:
+        self.error = self.error or error
+        self.done.set()
+
+
+def _read_replies(connections, calls: Dict[int, _Call], calls_lock: threading.Lock) -> None:
+    """Reader thread: hand every worker reply to the request waiting for it"""
+    shards = {conn: shard for shard, conn in enumerate(connections)}
+    while shards:
+        for conn in wait(list(shards)):
+            try:
+                request_id, ok, result = conn.recv()
+            except (EOFError, OSError):
+                # Worker gone (or shut down): nothing more will arrive
+                del shards[conn]
+                with calls_lock:
+                    for call in calls.values():
+                        call.fail("Shard worker exited")
+                continue
+            with calls_lock:
+                call = calls.get(request_id)
+            if call is not None:
+                call.reply(shards[conn], ok, result)
+
+
+def _shutdown(connections, processes, reader: threading.Thread) -> None:
+    for conn in connections:
+        try:
+            conn.send(None)
+        except (OSError, ValueError):
+            pass
+    for process in processes:
+        process.join(timeout=1.0)
+        if process.is_alive():
+            process.terminate()
+    reader.join(timeout=1.0)
+    for conn in connections:
+        conn.close()
+
+
+class _ShardState:
+    """What a request needs from the snapshot loaded into the workers"""
+
+    def __init__(self, snapshot: CatalogSnapshot, n_shards: int):
+        self.snapshot = snapshot
+        self.spelling = snapshot.spelling
+        self.services = [entry.service for entry in snapshot.services]
+        size = -(-len(self.services) // n_shards)
+        self.offsets = [shard * size for shard in range(n_shards)]
+        self.size = size
+
+
+class ShardedMatcher:
+    """Scatter/gather DutchMatcher over a pool of shard worker processes"""
+
+    def __init__(self, snapshot: CatalogSnapshot, matcher: DutchMatcher, n_shards: int):
+        """
+        Start one worker per shard and wait until every shard is built
+
+        Args:
+            snapshot: Full catalog snapshot (used for spelling correction
+                and to map shard results back to service rows)
+            matcher: DutchMatcher for query normalization; its scorer and
+                backend are used in the workers
+            n_shards: Number of worker processes (capped at the number of
+                services; fixed for the lifetime of the matcher)
+        """
+        self.matcher = matcher
+        n_shards = max(1, min(n_shards, len(snapshot.services)))
+
+        context = multiprocessing.get_context("spawn")
+        self._connections = []
+        self._processes = []
+        for _ in range(n_shards):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_serve_shard,
+                args=(child_conn, matcher.scorer, matcher.backend),
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+
+        # Request id -> replies being gathered; the lock only guards the dict
+        self._calls: Dict[int, _Call] = {}
+        self._calls_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        reader = threading.Thread(
+            target=_read_replies, args=(self._connections, self._calls, self._calls_lock),
+            name="shard-replies", daemon=True
+        )
+        reader.start()
+        self._finalizer = weakref.finalize(self, _shutdown, self._connections, self._processes, reader)
+
+        # Held while a message is written to every pipe, so all workers see
+        # loads and queries in the same order; never while waiting for replies
+        self._send_lock = threading.Lock()
+        self._state: Optional[_ShardState] = None
+        self.load(snapshot)
+
+    @property
+    def n_shards(self) -> int:
+        return len(self._connections)
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """The snapshot loaded into the workers"""
+        return self._state.snapshot
+
+    @property
+    def offsets(self) -> List[int]:
+        return self._state.offsets
+
+    def _send(self, kind: str, payloads: List[Any]) -> _Call:
+        """Send one message per shard (with the send lock held)"""
+        call = _Call(next(self._request_ids), self.n_shards)
+        with self._calls_lock:
+            self._calls[call.request_id] = call
+        try:
+            for conn, payload in zip(self._connections, payloads):
+                conn.send((call.request_id, kind, payload))
+        except (OSError, ValueError):
+            with self._calls_lock:
+                del self._calls[call.request_id]
+            raise
+        return call
+
+    def _gather(self, call: _Call) -> List[Any]:
+        """Wait for the replies of every shard"""
+        try:
+            call.done.wait()
+        finally:
+            with self._calls_lock:
+                del self._calls[call.request_id]
+        if call.error is not None:
+            raise RuntimeError(f"Shard worker failed: {call.error}")
+        return call.replies
+
+    def load(self, snapshot: CatalogSnapshot) -> None:
+        """
+        Load snapshot into the running workers, partitioned over the same
+        number of shards, and wait until every shard is built
+
+        Requests sent before the load are answered from the previous
+        snapshot, requests sent after it from the new one.
+        """
+        state = _ShardState(snapshot, self.n_shards)
+        payloads = [
+            [dict(service) for service in state.services[offset:offset + state.size]]
+            for offset in state.offsets
+        ]
+        with self._send_lock:
+            call = self._send("load", payloads)
+            self._state = state
+        self._gather(call)
+
+    def _scatter(
+        self,
+        message: Tuple,
+        trace: Optional[MatchTrace] = None,
+        budget: Optional[MatchBudget] = None,
+        state: Optional[_ShardState] = None
+    ) -> Optional[List[Tuple[bool, List[Tuple[int, float]]]]]:
+        """
+        Per-shard (had_candidates, matches), or None if state (default: the
+        loaded state) is no longer loaded
+        """
+        with self._send_lock:
+            if state is not None and state is not self._state:
+                return None
+            call = self._send("match", [message] * self.n_shards)
+        replies = self._gather(call)
+
+        exhausted = any(shard_exhausted for _, _, _, _, shard_exhausted, _ in replies)
+        if budget is not None:
+            # Shards run in parallel: charge the slowest shard's CPU time
+            budget.charge(max(cpu_ms for _, _, _, _, _, cpu_ms in replies))
+            budget.exhausted = budget.exhausted or exhausted
+        if trace is not None:
+            # Shards run in parallel: the slowest shard's time, all shards' candidates
+            for phase in ("retrieve", "rerank"):
+                runs = [phases[phase] for _, _, phases, _, _, _ in replies]
+                trace.add(phase, max(ms for ms, _ in runs), sum(candidates for _, candidates in runs))
+            trace.dropped += sum(dropped for _, _, _, dropped, _, _ in replies)
+            trace.partial = trace.partial or exhausted
+        return [(had_candidates, matches) for had_candidates, matches, _, _, _, _ in replies]
+
+    def match_services(
+        self,
+        query: str,
+        min_confidence: float = 0.5,
+        top_k: Optional[int] = None,
+        retrieve_limit: Optional[int] = None,
+        trace: Optional[MatchTrace] = None,
+        budget: Optional[MatchBudget] = None
+    ) -> List[Tuple[Dict, float]]:
+        """
+        Match query against all shards
+
+        Args:
+            query: The search query
+            min_confidence: Minimum confidence threshold
+            top_k: Maximum number of results (None = all above min_confidence)
+            retrieve_limit: Services scored at most, split evenly over the
+                shards (None or 0 = every retrieved service)
+            trace: Records the retrieve and rerank phases of the request
+            budget: CPU budget of the request; every shard gets what is
+                left of it when the query is scattered, and the slowest
+                shard's CPU time is charged to it
+
+        Returns:
+            List of tuples (service, confidence_score) sorted by confidence
+        """
+        replies = None
+        while replies is None:
+            # Corrected against the snapshot the shards hold; if another
+            # snapshot is loaded meanwhile, start over on that one
+            state = self._state
+            replies = self._match(query, min_confidence, top_k, retrieve_limit, trace, budget, state)
+
+        # Each shard's list is sorted by (-confidence, position)
+        shard_lists = [
+            [(offset + position, confidence) for position, confidence in matches]
+            for offset, (_, matches) in zip(state.offsets, replies)
+        ]
+        merged = heapq.merge(*shard_lists, key=lambda match: (-match[1], match[0]))
+        if top_k is not None:
+            merged = itertools.islice(merged, top_k)
+        return [(state.services[position], confidence) for position, confidence in merged]
+
+    def _match(
+        self,
+        query: str,
+        min_confidence: float,
+        top_k: Optional[int],
+        retrieve_limit: Optional[int],
+        trace: Optional[MatchTrace],
+        budget: Optional[MatchBudget],
+        state: _ShardState
+    ) -> Optional[List[Tuple[bool, List[Tuple[int, float]]]]]:
+        """Scatter the query (and the fallback scan) to the shards holding state"""
+        original = self.matcher.prepare_text(query)
+        prepared = self.matcher.correct_query(original, state.spelling)
+        texts = [(prepared.normalized, tuple(prepared.words))]
+        if prepared is not original:
+            texts.append((original.normalized, tuple(original.words)))
+        shard_limit = -(-retrieve_limit // self.n_shards) if retrieve_limit else None
+        message = (texts, min_confidence, top_k, shard_limit)
+
+        budget_ms = budget.remaining_ms() if budget is not None else None
+        replies = self._scatter(message + (budget_ms, False), trace, budget, state)
+        # The heuristic scorer's retrieval is exact: nothing to scan for
+        if replies is None or self.matcher.scorer == 'heuristic' or any(had for had, _ in replies):
+            return replies
+        # No index hit in any shard: full scan everywhere, with what is
+        # left of the budget
+        if budget is not None and budget.expired():
+            if trace is not None:
+                trace.partial = True
+            return replies
+        budget_ms = budget.remaining_ms() if budget is not None else None
+        return self._scatter(message + (budget_ms, True), trace, budget, state)
+
+    def close(self) -> None:
+        """Stop the worker processes"""
+        self._finalizer()
+
+
+class ShardPool:
+    """
+    The process's ShardedMatcher, started on first use and kept across
+    catalog snapshots: a newer snapshot is loaded into the running workers
+    """
+
+    def __init__(self):
+        self._engine: Optional[ShardedMatcher] = None
+        self._lock = threading.Lock()
+
+    def get(self, snapshot: CatalogSnapshot, matcher: DutchMatcher, n_shards: int) -> ShardedMatcher:
+        """
+        The matcher with snapshot loaded, unless the workers already hold
+        a snapshot built later (a request that started before a rebuild)
+
+        Args:
+            snapshot: Catalog snapshot of the request
+            matcher: DutchMatcher for query normalization (used on first use)
+            n_shards: Number of worker processes (used on first use)
+        """
+        with self._lock:
+            engine = self._engine
+            if engine is None:
+                self._engine = ShardedMatcher(snapshot, matcher, n_shards)
+            elif snapshot is not engine.snapshot and snapshot.built_at > engine.snapshot.built_at:
+                engine.load(snapshot)
+            return self._engine
+
+    def close(self) -> None:
+        """Stop the workers; the next get() starts new ones"""
+        with self._lock:
+            if self._engine is not None:
+                self._engine.close()
+                self._engine = None
+
+
+# Global shard pool instance
+shard_pool = ShardPool()
@@ -0,0 +1,145 @@
+"""
+Symmetric-delete spelling correction for Dutch query tokens
+
+SymSpell-style: every catalog word is expanded at build time into all
+strings reachable by deleting up to max_edit_distance characters. A query
+token is corrected by generating its own deletes and looking them up, so
+correction costs a few dictionary lookups instead of comparing against the
+whole vocabulary.
+
+Before that, a token is looked up by its Dutch phonetic key (see
+app/services/phonetic.py): "rijbewys" or "paspoordt" sound like a catalog
+word and are corrected with one lookup, even beyond the edit budget.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+from bisect import bisect_left
+
+from app.services.edit_distance import bounded_edit_distance
+from app.services.phonetic import PhoneticIndex
+
+
+def deletes(word: str, max_distance: int) -> Set[str]:
+    """All strings obtained by deleting up to max_distance characters"""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            for i in range(len(item)):
+                next_frontier.add(item[:i] + item[i + 1:])
+        next_frontier -= results
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+class SpellingCorrector:
+    """Corrects query tokens against the catalog vocabulary"""
+
+    def __init__(self, max_edit_distance: int = 2, min_length: int = 4):
+        self.max_edit_distance = max_edit_distance
+        self.min_length = min_length
+        self._frequencies: Dict[str, int] = {}
+        self._deletes: Dict[str, List[str]] = {}
+        self._sorted_words: List[str] = []
+        self.phonetic: Optional[PhoneticIndex] = None
+
+    def add(self, word: str, count: int = 1) -> None:
+        """Add a vocabulary word (call freeze() when done)"""
+        if word:
+            self._frequencies[word] = self._frequencies.get(word, 0) + count
+
+    def add_all(self, words: Iterable[str]) -> None:
+        for word in words:
+            self.add(word)
+
+    def freeze(self) -> "SpellingCorrector":
+        """Build the delete dictionary"""
+        delete_map: Dict[str, List[str]] = {}
+        for word in self._frequencies:
+            for variant in deletes(word, self.max_edit_distance):
+                delete_map.setdefault(variant, []).append(word)
+        self._deletes = delete_map
+        self._sorted_words = sorted(self._frequencies)
+        self.phonetic = PhoneticIndex(self._sorted_words, self._frequencies)
+        return self
+
+    @classmethod
+    def from_parts(
+        cls,
+        sorted_words: Sequence[str],
+        frequencies: Mapping[str, int],
+        delete_map: Mapping[str, Sequence[str]],
+        max_edit_distance: int = 2,
+        min_length: int = 4
+    ) -> "SpellingCorrector":
+        """
+        Frozen corrector over prebuilt tables (see parts())
+
+        The tables only need indexing, len() and get(), so they can be
+        read-only views over a memory-mapped index file.
+        """
+        corrector = cls(max_edit_distance, min_length)
+        corrector._sorted_words = sorted_words
+        corrector._frequencies = frequencies
+        corrector._deletes = delete_map
+        corrector.phonetic = PhoneticIndex(sorted_words, frequencies)
+        return corrector
+
+    def parts(self) -> Tuple[Sequence[str], Mapping[str, int], Mapping[str, Sequence[str]]]:
+        """(sorted vocabulary, word frequencies, delete variant -> words)"""
+        return self._sorted_words, self._frequencies, self._deletes
+
+    def is_known(self, token: str) -> bool:
+        """True if token is a vocabulary word or the prefix of one"""
+        if token in self._frequencies:
+            return True
+        i = bisect_left(self._sorted_words, token)
+        return i < len(self._sorted_words) and self._sorted_words[i].startswith(token)
+
+    def correct(self, token: str) -> Optional[str]:
+        """
+        Closest vocabulary word within the edit distance budget
+
+        Returns None for known words, prefixes of known words (type-ahead),
+        short tokens, and tokens without a close enough correction.
+        A word with the same phonetic key is preferred over the edit
+        budget (it has its own, relative to the token's length, see
+        phonetic.max_distance); ties on distance go to the most frequent word.
+        """
+        if len(token) < self.min_length or self.is_known(token):
+            return None
+
+        if self.phonetic is not None:
+            corrected = self.phonetic.correct(token)
+            if corrected is not None:
+                return corrected
+
+        max_distance = 1 if len(token) < 6 else self.max_edit_distance
+        candidates = set()
+        for variant in deletes(token, max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        best = None
+        best_key = None
+        for candidate in candidates:
+            distance = bounded_edit_distance(token, candidate, max_distance)
+            if distance > max_distance:
+                continue
+            key = (distance, -self._frequencies[candidate], candidate)
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
+
+    def correct_words(self, words: Iterable[str]) -> Dict[str, str]:
+        """Mapping of misspelled word -> correction for the words that have one"""
+        corrections = {}
+        for word in words:
+            corrected = self.correct(word)
+            if corrected is not None:
+                corrections[word] = corrected
+        return corrections
+
+    def __len__(self) -> int:
+        return len(self._frequencies)
@@ -0,0 +1,153 @@
+"""
+Dutch stemmer
+
+Snowball-style suffix stripping (the Snowball Dutch algorithm, steps 1-4)
+so that inflected forms share a stem: "vergunningen" and "vergunning",
+"parkeren" and "parkeer". Two steps are added for verb forms, which
+Snowball leaves alone: a final d, t or dt after a consonant is removed
+("verhuisd", "aanvraagt", "wordt"), and a final z or v is devoiced to s
+or f ("verhuizen" -> "verhuis", like "verhuisd"). Every doubled final
+consonant is undoubled, not just kk, dd and tt ("opzeggen", "opzegt").
+
+Stems are only compared with each other, never shown, so over-stemming
+("kant" -> "kan") just makes two catalog words share a stem. Input is a
+normalized word: lowercase and without diacritics.
+
+stem() is memoized, so repeated query tokens cost one cache lookup.
+"""
+
+from functools import lru_cache
+from typing import Iterable, FrozenSet, Tuple
+
+
+VOWELS = frozenset('aeiouyè')
+
+
+def _mark_consonants(word: str) -> str:
+    """Upper-case initial y, y after a vowel and i between vowels (consonants)"""
+    chars = list(word)
+    for i, char in enumerate(chars):
+        if char == 'y' and (i == 0 or chars[i - 1] in VOWELS):
+            chars[i] = 'Y'
+        elif char == 'i' and 0 < i < len(chars) - 1 and chars[i - 1] in VOWELS and chars[i + 1] in VOWELS:
+            chars[i] = 'I'
+    return ''.join(chars)
+
+
+def _regions(word: str) -> Tuple[int, int]:
+    """Start of R1 (at least 3) and R2"""
+    r1 = r2 = len(word)
+    for i in range(1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r2 = i + 1
+            break
+    return max(3, r1), r2
+
+
+def _undouble(word: str) -> str:
+    # Snowball only undoubles kk, dd and tt; "opzeggen" needs gg -> g for "opzegt"
+    if len(word) >= 2 and word[-1] == word[-2] and word[-1] not in VOWELS:
+        return word[:-1]
+    return word
+
+
+def _strip_en(word: str, start: int, r1: int) -> str:
+    """Remove the en(e) at start if in R1 and after a non-vowel other than 'gem'"""
+    stem = word[:start]
+    if start >= r1 and stem and stem[-1] not in VOWELS and not stem.endswith('gem'):
+        return _undouble(stem)
+    return word
+
+
+def _strip_e(word: str, r1: int) -> Tuple[str, bool]:
+    """Step 2: final e in R1 after a non-vowel"""
+    if word.endswith('e') and len(word) - 1 >= r1 and len(word) > 1 and word[-2] not in VOWELS:
+        return _undouble(word[:-1]), True
+    return word, False
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Stem of a normalized Dutch word"""
+    if len(word) < 3:
+        return word
+
+    word = _mark_consonants(word)
+    r1, r2 = _regions(word)
+
+    # Step 1: plural and genitive endings
+    if word.endswith('heden'):
+        if len(word) - 5 >= r1:
+            word = word[:-5] + 'heid'
+    elif word.endswith('ene'):
+        word = _strip_en(word, len(word) - 3, r1)
+    elif word.endswith('en'):
+        word = _strip_en(word, len(word) - 2, r1)
+    elif word.endswith(('se', 's')):
+        start = len(word) - (2 if word.endswith('se') else 1)
+        if start >= r1 and start > 0 and word[start - 1] not in VOWELS and word[start - 1] != 'j':
+            word = word[:start]
+
+    # Step 2: final e
+    word, e_removed = _strip_e(word, r1)
+
+    # Step 3a: heid
+    if word.endswith('heid') and len(word) - 4 >= r2 and word[-5:-4] != 'c':
+        word = word[:-4]
+        if word.endswith('en'):
+            word = _strip_en(word, len(word) - 2, r1)
+
+    # Step 3b: derivational suffixes
+    if word.endswith(('end', 'ing')):
+        if len(word) - 3 >= r2:
+            word = word[:-3]
+            if word.endswith('ig') and len(word) - 2 >= r2 and word[-3:-2] != 'e':
+                word = word[:-2]
+            else:
+                word = _undouble(word)
+    elif word.endswith('ig'):
+        if len(word) - 2 >= r2 and word[-3:-2] != 'e':
+            word = word[:-2]
+    elif word.endswith('lijk'):
+        if len(word) - 4 >= r2:
+            word, _ = _strip_e(word[:-4], r1)
+    elif word.endswith('baar'):
+        if len(word) - 4 >= r2:
+            word = word[:-4]
+    elif word.endswith('bar'):
+        if len(word) - 3 >= r2 and e_removed:
+            word = word[:-3]
+
+    # Verb endings: -dt, -d, -t after a consonant
+    for suffix in ('dt', 'd', 't'):
+        if word.endswith(suffix):
+            start = len(word) - len(suffix)
+            if start >= r1 and word[start - 1] not in VOWELS:
+                word = word[:start]
+            break
+
+    # Final devoicing: z -> s, v -> f
+    if word.endswith('z'):
+        word = word[:-1] + 's'
+    elif word.endswith('v'):
+        word = word[:-1] + 'f'
+
+    # Step 4: undouble the vowel of a closed final syllable (maan -> man)
+    if (
+        len(word) >= 4
+        and word[-4] not in VOWELS
+        and word[-3] == word[-2] and word[-3] in 'aeou'
+        and word[-1] not in VOWELS and word[-1] != 'I'
+    ):
+        word = word[:-2] + word[-1]
+
+    return word.lower()
+
+
+def stems(words: Iterable[str]) -> FrozenSet[str]:
+    """Stems of a set of words"""
+    return frozenset([stem(word) for word in words])
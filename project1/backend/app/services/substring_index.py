@@ -0,0 +1,122 @@
+"""
+Substring index: every entry the heuristic scorer can match
+
+The prefix and trigram indexes find entries with a term that starts like,
+or is spelled like, a query word. The heuristic scorer also matches when
+    - the query is inside a field (exact and substring matches),
+    - a field is inside the query,
+    - a field shares a keyword or a keyword stem with the query (Jaccard), or
+    - a keyword of one is inside a keyword of the other (partial matches)
+and none of these needs a shared prefix, so description-only words,
+infixes ("vergunning" in "parkeervergunning") and compounds of catalog
+words in the query ("afvalmelding") are missed by prefix lookups.
+
+This index answers each case exactly:
+    - "inside a field": a substring search over all field texts joined into
+      one string, resuming at the next entry after a hit, so the cost is one
+      search per matching entry
+    - "field inside the query": every word of the field, its longest
+      included, is then inside a query word, so the substrings of the query
+      words are looked up in a map from the longest word of each field
+      (fields without a word always qualify)
+    - shared keywords, and field keywords inside query words: the same map
+      also holds every keyword of a field; shared stems: a stem map
+so the union is a superset of the entries the scorer matches.
+"""
+
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import re
+
+from app.services.catalog import PreparedText
+
+_WORD = re.compile(r'\w+')
+
+# Separates fields and entries in the joined text; never in normalized text
+_SEPARATOR = '\x00'
+
+
+class SubstringIndex:
+    """Exact candidate sets for substring, word and stem matches"""
+
+    def __init__(self, entries: Iterable[List[PreparedText]]):
+        """
+        Args:
+            entries: The prepared fields of every entry, in doc id order
+        """
+        parts: List[str] = []
+        self._starts: List[int] = []
+        # Longest word and keywords of a field -> entries; entries with a
+        # field without words
+        self.fragments: Dict[str, Set[int]] = {}
+        self.stems: Dict[str, Set[int]] = {}
+        self.always: Set[int] = set()
+        offset = 0
+        for doc_id, fields in enumerate(entries):
+            self._starts.append(offset)
+            for field in fields:
+                parts.append(field.normalized)
+                offset += len(field.normalized) + 1
+                words = _WORD.findall(field.normalized)
+                if not words:
+                    self.always.add(doc_id)
+                    continue
+                self.fragments.setdefault(max(words, key=len), set()).add(doc_id)
+                for word in field.words:
+                    self.fragments.setdefault(word, set()).add(doc_id)
+                for field_stem in field.stems:
+                    self.stems.setdefault(field_stem, set()).add(doc_id)
+            if not fields:
+                parts.append('')
+                offset += 1
+        self._text = _SEPARATOR.join(parts)
+        self.max_fragment = max(map(len, self.fragments), default=0)
+
+    def containing(self, text: str) -> Set[int]:
+        """Entries with a field containing text"""
+        doc_ids: Set[int] = set()
+        if not text:
+            return set(range(len(self._starts)))
+
+        starts = self._starts
+        find = self._text.find
+        position = find(text)
+        while position >= 0:
+            doc_id = bisect_right(starts, position) - 1
+            doc_ids.add(doc_id)
+            if doc_id + 1 >= len(starts):
+                break
+            position = find(text, starts[doc_id + 1])
+        return doc_ids
+
+    def inside(self, text: str) -> Set[int]:
+        """Entries with a field, or a field word, inside text"""
+        doc_ids = set(self.always)
+        fragments = self.fragments
+        max_fragment = self.max_fragment
+        for word in set(_WORD.findall(text)):
+            for start in range(len(word)):
+                for end in range(start + 1, min(len(word), start + max_fragment) + 1):
+                    hits = fragments.get(word[start:end])
+                    if hits:
+                        doc_ids |= hits
+        return doc_ids
+
+    def candidates(self, query: PreparedText, outside: Optional[Callable[[str], bool]] = None) -> Set[int]:
+        """
+        Superset of the entries the heuristic scorer can match to query
+
+        Args:
+            outside: True for texts known to be inside no field (such as
+                extensions of a query that matched nothing); the search
+                for them is skipped
+        """
+        doc_ids = self.inside(query.normalized)
+        for text in [query.normalized] + [word for word in query.words if len(word) >= 3]:
+            if outside is None or not outside(text):
+                doc_ids |= self.containing(text)
+        for query_stem in query.stems:
+            hits = self.stems.get(query_stem)
+            if hits:
+                doc_ids |= hits
+        return doc_ids
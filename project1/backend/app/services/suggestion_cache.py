@@ -0,0 +1,105 @@
+"""
+In-process cache of suggestion results
+
+Type-ahead traffic repeats the same prefixes over and over, so finished
+suggestion lists are kept in a bounded LRU map with a time-to-live. Keys
+include the catalog version (CatalogStore.version, bumped by every admin
+write), so entries computed before a catalog change are never served
+again; the TTL bounds staleness for writes made by other instances.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import threading
+import time
+
+from app.core.config import settings
+
+
+class SuggestionCache:
+    """Thread-safe LRU map with a per-entry time-to-live and hit/miss counters"""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 30.0):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is
+                evicted (0 disables the cache)
+            ttl_seconds: Seconds an entry is served after it was stored
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for key, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store value, evicting the least recently used entries if full"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global suggestion cache instance
+suggestion_cache = SuggestionCache(
+    max_entries=settings.SUGGESTION_CACHE_SIZE,
+    ttl_seconds=settings.SUGGESTION_CACHE_TTL
+)
@@ -18,6 +18,8 @@ Acceptance Criteria:
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from app.services.topk import TopK
+
 
 class QuestionTemplate:
     """Represents a Dutch question template with placeholders"""
@@ -151,20 +153,28 @@ class QuestionTemplateEngine:
             - service: Service information
             - gemeente: Gemeente name
         """
-        suggestions = []
+        suggestions = TopK(max_results)
+
+        # Determine best templates based on query intent (same for every service)
+        selected_templates = self._select_templates_for_query(query)[:3]  # Use top 3 templates per service
+        max_boost = max((t.confidence_boost for t in selected_templates), default=0.0)
 
         for service_match in matched_services[:max_results * 2]:  # Generate more than needed
             service = service_match['service']
             gemeente = service_match.get('gemeente')
             base_confidence = service_match.get('confidence', 0.5)
 
-            # Determine best templates based on query intent
-            selected_templates = self._select_templates_for_query(query)
+            # None of this service's suggestions can displace the current top results
+            if min(1.0, base_confidence + max_boost) <= suggestions.threshold():
+                continue
 
-            for template in selected_templates[:3]:  # Use top 3 templates per service
+            for template in selected_templates:
+                confidence = min(1.0, base_confidence + template.confidence_boost)
+                if confidence <= suggestions.threshold():
+                    continue
                 suggestion = {
                     "suggestion": template.generate(service['name'], gemeente),
-                    "confidence": min(1.0, base_confidence + template.confidence_boost),
+                    "confidence": confidence,
                     "service": {
                         "id": service['id'],
                         "name": service['name'],
@@ -173,15 +183,37 @@ class QuestionTemplateEngine:
                     },
                     "gemeente": gemeente
                 }
-                suggestions.append(suggestion)
+                suggestions.push(confidence, suggestion)
 
-        # Sort by confidence and return top results
-        suggestions.sort(key=lambda x: x['confidence'], reverse=True)
-        return suggestions[:max_results]
+        # Top results by confidence
+        return [suggestion for suggestion, _ in suggestions.results()]
 
     def _select_templates_for_query(self, query: str) -> List[QuestionTemplate]:
         """
         Select the most appropriate templates based on query keywords
+        (see detect_intents)
+        """
+        detected_intents = self.detect_intents(query)
+
+        # Return templates matching detected intents, sorted by confidence boost
+        matching_templates = [
+            t for t in self.templates
+            if t.intent in detected_intents
+        ]
+
+        # Sort by confidence boost (descending)
+        matching_templates.sort(key=lambda t: t.confidence_boost, reverse=True)
+
+        # If we have few matches, add some general templates
+        if len(matching_templates) < 3:
+            general_templates = [t for t in self.templates if t.intent == "procedure"]
+            matching_templates.extend(general_templates[:3 - len(matching_templates)])
+
+        return matching_templates
+
+    def detect_intents(self, query: str) -> List[str]:
+        """
+        Intents of a query, the only part of it template selection uses
 
         Keywords trigger specific intents:
         - "hoe", "aanvragen" -> procedure
@@ -212,21 +244,7 @@ class QuestionTemplateEngine:
         if not detected_intents:
             detected_intents = ["procedure"]
 
-        # Return templates matching detected intents, sorted by confidence boost
-        matching_templates = [
-            t for t in self.templates
-            if t.intent in detected_intents
-        ]
-
-        # Sort by confidence boost (descending)
-        matching_templates.sort(key=lambda t: t.confidence_boost, reverse=True)
-
-        # If we have few matches, add some general templates
-        if len(matching_templates) < 3:
-            general_templates = [t for t in self.templates if t.intent == "procedure"]
-            matching_templates.extend(general_templates[:3 - len(matching_templates)])
-
-        return matching_templates
+        return detected_intents
 
 
 # Global template engine instance
@@ -0,0 +1,156 @@
+"""
+Vectorized character n-gram TF-IDF engine for service matching
+
+Every service (name, keywords, description, category) is a field-weighted,
+L2-normalized TF-IDF vector over padded character trigrams, stored column
+by column (one posting array per trigram). A query is scored against the
+whole catalog with one sparse matrix-vector product (np.bincount over the
+query trigrams' postings) and top-k is selected with np.argpartition.
+
+Drop-in alternative to DutchMatcher.match_services: same
+List[Tuple[Dict, float]] return shape, scores are cosine similarities.
+Requires numpy (see requirements-full.txt).
+"""
+
+from typing import List, Dict, Tuple, Optional
+import math
+import time
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+from app.services.catalog import CatalogSnapshot, DEFAULT_FIELD_WEIGHTS
+from app.services.match_pipeline import MatchTrace
+from app.services.trigram_index import trigrams
+
+
+def numpy_available() -> bool:
+    """True if the TF-IDF engine can be used"""
+    return np is not None
+
+
+class TfidfEngine:
+    """Scores a query against every service with one sparse matrix-vector product"""
+
+    def __init__(
+        self,
+        snapshot: CatalogSnapshot,
+        matcher,
+        field_weights: Optional[Dict[str, float]] = None
+    ):
+        if np is None:
+            raise ImportError("TfidfEngine requires numpy (pip install -r requirements-full.txt)")
+
+        self.matcher = matcher
+        self.field_weights = dict(DEFAULT_FIELD_WEIGHTS, **(field_weights or {}))
+        self.services = [entry.service for entry in snapshot.services]
+        self._build(snapshot)
+
+    def _ngram_counts(self, words) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for word in words:
+            for gram in trigrams(word):
+                counts[gram] = counts.get(gram, 0) + 1
+        return counts
+
+    def _build(self, snapshot: CatalogSnapshot) -> None:
+        weights = self.field_weights
+        doc_vectors: List[Dict[str, float]] = []
+        document_frequency: Dict[str, int] = {}
+
+        # Field-weighted term frequencies per service
+        for entry in snapshot.services:
+            vector: Dict[str, float] = {}
+            fields = [
+                (weights['name'], entry.name.words),
+                (weights['keywords'], [w for k in entry.keywords for w in k.words]),
+                (weights['description'], entry.description.words if entry.description else ()),
+                (weights['category'], entry.category.words if entry.category else ()),
+            ]
+            for weight, words in fields:
+                for gram, count in self._ngram_counts(words).items():
+                    vector[gram] = vector.get(gram, 0.0) + weight * count
+            for gram in vector:
+                document_frequency[gram] = document_frequency.get(gram, 0) + 1
+            doc_vectors.append(vector)
+
+        n_docs = len(doc_vectors)
+        self.vocabulary = {gram: i for i, gram in enumerate(sorted(document_frequency))}
+        self.idf = np.array(
+            [math.log((1 + n_docs) / (1 + document_frequency[g])) + 1.0 for g in sorted(document_frequency)],
+            dtype=np.float32
+        )
+
+        # Column-wise (CSC) postings: doc indices and weights per n-gram
+        columns: List[List[Tuple[int, float]]] = [[] for _ in self.vocabulary]
+        for doc_id, vector in enumerate(doc_vectors):
+            tfidf = {g: tf * self.idf[self.vocabulary[g]] for g, tf in vector.items()}
+            norm = math.sqrt(sum(v * v for v in tfidf.values())) or 1.0
+            for gram, value in tfidf.items():
+                columns[self.vocabulary[gram]].append((doc_id, value / norm))
+
+        indptr = [0]
+        for column in columns:
+            indptr.append(indptr[-1] + len(column))
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array([d for column in columns for d, _ in column], dtype=np.int32)
+        self.data = np.array([v for column in columns for _, v in column], dtype=np.float32)
+        self.n_docs = n_docs
+
+    def score(self, words) -> "np.ndarray":
+        """Cosine similarity of the query words against every service"""
+        query = {}
+        for gram, count in self._ngram_counts(words).items():
+            column = self.vocabulary.get(gram)
+            if column is not None:
+                query[column] = count * self.idf[column]
+
+        if not query:
+            return np.zeros(self.n_docs, dtype=np.float32)
+
+        norm = math.sqrt(sum(v * v for v in query.values()))
+        slices = [slice(self.indptr[c], self.indptr[c + 1]) for c in query]
+        indices = np.concatenate([self.indices[s] for s in slices])
+        values = np.concatenate([self.data[s] * (query[c] / norm) for s, c in zip(slices, query)])
+        return np.bincount(indices, weights=values, minlength=self.n_docs)
+
+    def match_services(
+        self,
+        query: str,
+        min_confidence: float = 0.2,
+        top_k: Optional[int] = None,
+        retrieve_limit: Optional[int] = None,
+        trace: Optional[MatchTrace] = None
+    ) -> List[Tuple[Dict, float]]:
+        """
+        Match query against all services
+
+        Args:
+            query: The search query
+            min_confidence: Minimum cosine similarity
+            top_k: Maximum number of results (None = all above min_confidence)
+            retrieve_limit: Caps top_k (None or 0 = no cap); ranking is the
+                retrieve phase here, the route reranks what it returns
+            trace: Records the retrieve phase of the request
+
+        Returns:
+            List of tuples (service, confidence_score) sorted by confidence
+        """
+        started = time.perf_counter()
+        if retrieve_limit:
+            top_k = retrieve_limit if top_k is None else min(top_k, retrieve_limit)
+        # Sorted, so the floating-point sums do not depend on set iteration order
+        scores = self.score(sorted(self.matcher.prepare_text(query).words))
+        if top_k is not None and top_k < self.n_docs:
+            top = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            top = np.arange(self.n_docs)
+
+        top = top[scores[top] >= min_confidence]
+        # Highest score first, catalog order on ties
+        top = top[np.lexsort((top, -scores[top]))]
+        if trace is not None:
+            trace.record("retrieve", started, len(top))
+        return [(self.services[i], float(scores[i])) for i in top]
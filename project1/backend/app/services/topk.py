@@ -0,0 +1,64 @@
+"""
+Bounded top-k selection
+
+Keeps the k best-scoring items in a min-heap, so a pipeline stage that only
+needs k results never sorts or holds more than k candidates. threshold()
+is the score a new item has to beat, which lets callers skip work for
+candidates that can no longer make the cut.
+
+Ties keep insertion order, so results are identical to a stable
+sort(reverse=True) followed by [:k]. Items pushed out of order can pass
+their own order instead, which then ranks ties (lower first).
+"""
+
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+import heapq
+
+T = TypeVar('T')
+
+
+class TopK(Generic[T]):
+    """The k highest-scoring items seen so far (k=None keeps everything)"""
+
+    def __init__(self, k: Optional[int] = None):
+        self.k = k
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._seq = 0
+
+    def threshold(self) -> float:
+        """Score a new item must exceed to be kept"""
+        if self.k is not None and len(self._heap) >= self.k:
+            return self._heap[0][0] if self.k > 0 else float('inf')
+        return float('-inf')
+
+    def push(self, score: float, item: T, order: Optional[int] = None) -> bool:
+        """
+        Offer an item; returns True if it was kept
+
+        order ranks the item among equal scores instead of insertion order;
+        either pass it for every item or for none.
+        """
+        if order is None:
+            if score <= self.threshold():
+                return False
+            order = self._seq
+            self._seq += 1
+        elif self.k is not None and len(self._heap) >= self.k:
+            if self.k == 0 or (score, -order) <= self._heap[0][:2]:
+                return False
+
+        # Among equal scores the latest (highest order) item sorts lowest, so it is evicted first
+        entry = (score, -order, item)
+        if self.k is not None and len(self._heap) >= self.k:
+            heapq.heapreplace(self._heap, entry)
+        else:
+            heapq.heappush(self._heap, entry)
+        return True
+
+    def results(self) -> List[Tuple[T, float]]:
+        """Kept items as (item, score), best first"""
+        ordered = sorted(self._heap, key=lambda e: (-e[0], -e[1]))
+        return [(item, score) for score, _, item in ordered]
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -0,0 +1,115 @@
+"""
+Character-trigram inverted index for typo-tolerant candidate generation
+
+Every catalog token is split into padded character trigrams with a posting
+list per trigram. A (possibly misspelled) query word is matched by counting
+shared trigrams, and only tokens whose Dice overlap reaches min_similarity
+are returned, so the expensive scorer only sees a small candidate set.
+"""
+
+from typing import Dict, List, Mapping, Sequence, Set, Tuple
+
+
+def trigrams(word: str) -> List[str]:
+    """Padded character trigrams of a word ("id" -> [" id", "id "])"""
+    padded = f" {word} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class TrigramIndex:
+    """Maps catalog tokens to documents, searchable by trigram overlap"""
+
+    def __init__(self, min_similarity: float = 0.5):
+        self.min_similarity = min_similarity
+        self._token_docs: Dict[str, Set[int]] = {}
+        self._tokens: List[str] = []
+        self._token_sizes: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+
+    def add(self, token: str, doc_id: int) -> None:
+        """Register a token for a document (call freeze() when done)"""
+        if token:
+            self._token_docs.setdefault(token, set()).add(doc_id)
+
+    def add_all(self, tokens, doc_id: int) -> None:
+        for token in tokens:
+            self.add(token, doc_id)
+
+    def freeze(self) -> "TrigramIndex":
+        """Build the trigram posting lists"""
+        self._tokens = sorted(self._token_docs)
+        self._token_sizes = []
+        postings: Dict[str, List[int]] = {}
+        for token_id, token in enumerate(self._tokens):
+            grams = set(trigrams(token))
+            self._token_sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(token_id)
+        self._postings = postings
+        return self
+
+    @classmethod
+    def from_parts(
+        cls,
+        tokens: Sequence[str],
+        token_sizes: Sequence[int],
+        postings: Mapping[str, Sequence[int]],
+        token_docs: Mapping[str, Sequence[int]],
+        min_similarity: float = 0.5
+    ) -> "TrigramIndex":
+        """
+        Frozen index over prebuilt tables (see parts())
+
+        The tables only need indexing, len() and get(), so they can be
+        read-only views over a memory-mapped index file.
+        """
+        index = cls(min_similarity)
+        index._tokens = tokens
+        index._token_sizes = token_sizes
+        index._postings = postings
+        index._token_docs = token_docs
+        return index
+
+    def parts(self) -> Tuple[Sequence[str], Sequence[int], Mapping[str, Sequence[int]], Mapping[str, Sequence[int]]]:
+        """(sorted tokens, trigram count per token, token ids per trigram, doc ids per token)"""
+        return self._tokens, self._token_sizes, self._postings, self._token_docs
+
+    def similar_tokens(self, word: str) -> List[Tuple[str, float]]:
+        """
+        Catalog tokens sharing enough trigrams with word
+
+        Returns:
+            List of (token, dice_similarity), best first
+        """
+        grams = set(trigrams(word))
+        if not grams:
+            return []
+
+        overlap: Dict[int, int] = {}
+        for gram in grams:
+            for token_id in self._postings.get(gram, ()):
+                overlap[token_id] = overlap.get(token_id, 0) + 1
+
+        size = len(grams)
+        results = []
+        for token_id, shared in overlap.items():
+            similarity = 2.0 * shared / (size + self._token_sizes[token_id])
+            if similarity >= self.min_similarity:
+                results.append((self._tokens[token_id], similarity))
+
+        results.sort(key=lambda x: x[1], reverse=True)
+        return results
+
+    def lookup(self, word: str) -> Set[int]:
+        """Ids of documents containing a token similar to word"""
+        doc_ids: Set[int] = set()
+        for token, _ in self.similar_tokens(word):
+            doc_ids.update(self._token_docs[token])
+        return doc_ids
+
+    def token_docs(self, token: str) -> Set[int]:
+        """Ids of documents containing exactly this token"""
+        return set(self._token_docs.get(token, ()))
+
+    def __len__(self) -> int:
+        return len(self._tokens)
@@ -0,0 +1,774 @@
+"""
+Matcher benchmarks on a synthetic catalog.
+Runs without a database; the catalog is generated from Dutch service terms.
+
+Usage:
+    cd backend && python scripts/benchmark_matcher.py [section ...] [--services N]
+
+Sections:
+    candidates  - Scored-candidate count per query: full scan vs prefix vs prefix+trigram
+    scorer      - Heuristic vs bounded Damerau-Levenshtein scorer on the same candidates
+    rapidfuzz   - Damerau scorer: python token similarities vs the rapidfuzz batch backend
+    tfidf       - NumPy TF-IDF engine vs DutchMatcher.match_services (top 10)
+    jaccard     - Set-based vs bitmask Jaccard over every service field
+    associations - Association list scans vs the bitset association index
+    topk        - match_services: sort all matches vs bounded top-k selection
+    bm25f       - BM25F inverted index (MaxScore top 10, exhaustive) vs DutchMatcher.match_services
+    shards      - ShardedMatcher latency per shard count (1, 2, 4, 8 worker processes)
+    memory      - Footprint and allocated blocks of dict rows vs compact records; peak memory and retained blocks per request (equal on both)
+    indexfile   - Cold start: building the snapshot from rows vs loading the mmap index file
+    deadprefix  - Keystrokes of queries that match nothing: full-scan fallback vs no-match filter
+    compounds   - Head/modifier queries on compound-only keywords: full scan vs compound postings
+    phonetic    - Spelling correction of sound-alike variants: symmetric deletes vs phonetic key lookup
+    stemmer     - Inflected queries: word-only Jaccard vs stem Jaccard, and stem memo hit rate
+    sessions    - Typing word by word: every keystroke scored in full vs narrowed by a keystroke session
+    canonical   - Raw query variants per cache key: strip/lower vs canonical text vs order-free keyword key
+    rerank      - Retrieve/rerank phase times per retrieve limit N, and top-10 agreement with no limit
+    budget      - Pathological queries (pasted paragraph, long token): uncapped vs capped vs capped + CPU budget
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import argparse
+import random
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Tuple
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.canonical import QueryCanonicalizer, cap_words, fold_text, keyword_set_key
+from app.services.catalog import AssociationRecord, CatalogSnapshot, PreparedText, ServiceRecord
+from app.services.batch_scorer import rapidfuzz_available
+from app.services.dutch_matcher import DutchMatcher, _token_similarity
+from app.services.edit_distance import bounded_edit_distance, edit_distance
+from app.services.tfidf_engine import TfidfEngine, numpy_available
+from app.services.bm25f_engine import Bm25fEngine
+from app.services.index_file import load_index_file, write_index_file
+from app.services.keystroke_session import KeystrokeSession, SessionIndex
+from app.services.match_pipeline import MatchBudget, MatchTrace
+from app.services.sharded_matcher import ShardedMatcher
+from app.services.stemmer import stem
+from app.services.template_engine import template_engine
+
+
+MODIFIERS = [
+    "parkeer", "bouw", "kap", "bewoners", "evenementen", "horeca", "standplaats",
+    "omgevings", "drank", "exploitatie", "terras", "sloop", "uitrit", "ligplaats",
+    "afval", "geboorte", "overlijdens", "huwelijks", "verhuis", "woning",
+]
+HEADS = [
+    "vergunning", "ontheffing", "subsidie", "melding", "aanvraag", "container",
+    "aangifte", "toeslag", "verklaring", "registratie",
+]
+ACTIONS = ["aanvragen", "wijzigen", "verlengen", "doorgeven", "opzeggen", "melden"]
+CATEGORIES = [
+    "Verkeer & Vervoer", "Bouwen & Wonen", "Afval & Milieu", "Burgerlijke Stand",
+    "Documenten & Identiteit", "Ondernemen", "Wonen & Leven", "Groen & Natuur",
+]
+GEMEENTE_NAMES = [
+    "Amsterdam", "Rotterdam", "Den Haag", "Utrecht", "Eindhoven", "Groningen",
+    "Tilburg", "Almere", "Breda", "Nijmegen", "'s-Hertogenbosch", "Apeldoorn",
+    "Haarlem", "Arnhem", "Enschede", "Amersfoort", "Zaanstad", "Zwolle",
+]
+
+QUERIES = [
+    # Type-ahead prefixes (tests/load/test_suggestions_load.py)
+    "park", "paspo", "rijbe", "verhu", "geboo", "huwe", "overl", "uitke", "afval", "water",
+    # Typos
+    "rijbeweis", "paspoordt", "verhuizng", "afvalcontaner", "kapvergunnig",
+    # Free text
+    "parkeervergunning amsterdam", "paspoort den haag", "vergunning", "aanvragen",
+]
+
+
+def build_catalog(n_services: int, n_gemeentes: int = 340, seed: int = 42) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """Generate services, gemeentes and associations"""
+    rng = random.Random(seed)
+
+    services = [
+        {"id": 1, "name": "Paspoort aanvragen", "description": "Nieuw paspoort aanvragen of verlengen",
+         "keywords": ["paspoort", "identiteitsbewijs", "reisdocument"], "category": "Documenten & Identiteit"},
+        {"id": 2, "name": "Rijbewijs aanvragen", "description": "Rijbewijs aanvragen of verlengen",
+         "keywords": ["rijbewijs", "autorijbewijs"], "category": "Verkeer & Vervoer"},
+    ]
+    while len(services) < n_services:
+        modifier = rng.choice(MODIFIERS)
+        head = rng.choice(HEADS)
+        action = rng.choice(ACTIONS)
+        compound = modifier + head
+        services.append({
+            "id": len(services) + 1,
+            "name": f"{compound.capitalize()} {action}",
+            "description": f"{action.capitalize()} van een {compound} bij de gemeente voor {rng.choice(MODIFIERS)}",
+            "keywords": [compound, modifier, head] + rng.sample(ACTIONS, 2),
+            "category": rng.choice(CATEGORIES),
+        })
+
+    gemeentes = [{"id": i + 1, "name": name} for i, name in enumerate(GEMEENTE_NAMES)]
+    while len(gemeentes) < n_gemeentes:
+        gemeentes.append({"id": len(gemeentes) + 1, "name": f"Gemeente {len(gemeentes) + 1}"})
+
+    associations = []
+    for gemeente in gemeentes:
+        for service in rng.sample(services, min(len(services), 20)):
+            associations.append({
+                "id": len(associations) + 1,
+                "gemeente_id": gemeente["id"],
+                "gemeente_name": gemeente["name"],
+                "service_id": service["id"],
+                "service_name": service["name"],
+            })
+
+    return services, gemeentes, associations
+
+
+def timed(fn, repeat: int = 5) -> float:
+    """Best wall time of fn() in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def bench_candidates(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Scored-candidate count per query before and after the trigram stage"""
+    print(f"{'query':<30}{'full scan':>10}{'prefix':>10}{'+trigram':>10}{'ms before':>11}{'ms after':>10}")
+
+    totals = [0, 0, 0]
+    for query in QUERIES:
+        prepared = matcher.prepare_text(query)
+        prefix_only = matcher.retrieve_candidates(prepared, snapshot.service_prefixes, snapshot.services)
+        with_trigram = matcher.retrieve_candidates(
+            prepared, snapshot.service_prefixes, snapshot.services, snapshot.service_trigrams
+        )
+        counts = [len(snapshot.services), len(prefix_only), len(with_trigram)]
+        totals = [t + c for t, c in zip(totals, counts)]
+
+        before = timed(lambda: [matcher.score_service(prepared, e) for e in prefix_only])
+        after = timed(lambda: [matcher.score_service(prepared, e) for e in with_trigram])
+        print(f"{query:<30}{counts[0]:>10}{counts[1]:>10}{counts[2]:>10}{before:>11.2f}{after:>10.2f}")
+
+    print(f"{'TOTAL':<30}{totals[0]:>10}{totals[1]:>10}{totals[2]:>10}")
+
+
+def bench_scorer(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Heuristic vs Damerau-Levenshtein scorer on identical candidate sets"""
+    heuristic = DutchMatcher(scorer="heuristic")
+    damerau = DutchMatcher(scorer="damerau")
+
+    print(f"{'query':<30}{'cands':>7}{'heur ms':>9}{'hits':>6}{'dl ms':>8}{'hits':>6}")
+    totals = [0.0, 0.0]
+    for query in QUERIES:
+        prepared = matcher.prepare_text(query)
+        candidates = matcher.retrieve_candidates(
+            prepared, snapshot.service_prefixes, snapshot.services, snapshot.service_trigrams
+        )
+        row = []
+        for i, scorer in enumerate([heuristic, damerau]):
+            ms = timed(lambda: [scorer.score_service(prepared, e) for e in candidates])
+            hits = sum(1 for e in candidates if scorer.score_service(prepared, e) >= 0.5)
+            totals[i] += ms
+            row += [ms, hits]
+        print(f"{query:<30}{len(candidates):>7}{row[0]:>9.2f}{row[1]:>6}{row[2]:>8.2f}{row[3]:>6}")
+    print(f"{'TOTAL':<30}{'':>7}{totals[0]:>9.2f}{'':>6}{totals[1]:>8.2f}")
+
+    # Bounded vs unbounded distance on all catalog words against one typo
+    words = list(snapshot.service_trigrams._token_docs)
+    unbounded = timed(lambda: [edit_distance("kapvergunnig", w) for w in words])
+    bounded = timed(lambda: [bounded_edit_distance("kapvergunnig", w, 2) for w in words])
+    print(f"\n'kapvergunnig' vs {len(words)} words: unbounded {unbounded:.2f}ms, bounded(k=2) {bounded:.2f}ms")
+
+
+def bench_rapidfuzz(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """match_services with the damerau scorer per token similarity backend (top 10)"""
+    if not rapidfuzz_available():
+        print("rapidfuzz not installed, skipping")
+        return
+
+    python = DutchMatcher(scorer="damerau")
+    batch = DutchMatcher(scorer="damerau", backend="rapidfuzz")
+    batch.match_services("", snapshot)  # build the batch scorer
+
+    def cold(query):
+        _token_similarity.cache_clear()
+        return python.match_services(query, snapshot, top_k=10)
+
+    print(f"{'query':<30}{'py cold':>9}{'py warm':>9}{'batch':>9}  same")
+    totals = [0.0, 0.0, 0.0]
+    for query in QUERIES:
+        row = [
+            timed(lambda: cold(query)),
+            timed(lambda: python.match_services(query, snapshot, top_k=10)),
+            timed(lambda: batch.match_services(query, snapshot, top_k=10)),
+        ]
+        same = python.match_services(query, snapshot, top_k=10) == batch.match_services(query, snapshot, top_k=10)
+        totals = [t + ms for t, ms in zip(totals, row)]
+        print(f"{query:<30}{row[0]:>9.2f}{row[1]:>9.2f}{row[2]:>9.2f}  {'yes' if same else 'NO'}")
+    print(f"{'TOTAL':<30}{totals[0]:>9.2f}{totals[1]:>9.2f}{totals[2]:>9.2f}")
+
+
+def bench_tfidf(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """TF-IDF matrix-vector scoring vs the Python matcher loop"""
+    if not numpy_available():
+        print("numpy not installed, skipping")
+        return
+
+    start = time.perf_counter()
+    engine = TfidfEngine(snapshot, matcher)
+    print(f"engine built in {(time.perf_counter() - start) * 1000:.0f}ms, "
+          f"{len(engine.vocabulary)} trigrams, {len(engine.data)} postings")
+
+    print(f"{'query':<30}{'tfidf ms':>10}{'matcher ms':>12}  top tfidf result")
+    totals = [0.0, 0.0]
+    for query in QUERIES:
+        tfidf_ms = timed(lambda: engine.match_services(query, top_k=10))
+        matcher_ms = timed(lambda: matcher.match_services(query, snapshot), repeat=1)
+        totals[0] += tfidf_ms
+        totals[1] += matcher_ms
+        top = engine.match_services(query, top_k=1)
+        label = f"{top[0][0]['name']} ({top[0][1]:.2f})" if top else "-"
+        print(f"{query:<30}{tfidf_ms:>10.3f}{matcher_ms:>12.2f}  {label}")
+    print(f"{'TOTAL':<30}{totals[0]:>10.3f}{totals[1]:>12.2f}")
+
+
+def bench_bm25f(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """BM25F with MaxScore pruning vs exhaustive BM25F vs the Python matcher loop"""
+    start = time.perf_counter()
+    engine = Bm25fEngine(snapshot, matcher)
+    n_postings = sum(len(ids) for fields in engine.postings.values() for ids, _ in fields)
+    print(f"engine built in {(time.perf_counter() - start) * 1000:.0f}ms, "
+          f"{len(engine.terms)} terms, {n_postings} postings")
+
+    print(f"{'query':<30}{'pruned ms':>10}{'full ms':>9}{'matcher ms':>12}{'scored':>8}{'skipped':>9}  top result")
+    totals = [0.0, 0.0, 0.0]
+    for query in QUERIES:
+        words = sorted(matcher.correct_query(matcher.prepare_text(query), snapshot.spelling).words)
+        pruned_ms = timed(lambda: engine.match_services(query, top_k=10))
+        full_ms = timed(lambda: engine.match_services(query))
+        matcher_ms = timed(lambda: matcher.match_services(query, snapshot, top_k=10), repeat=1)
+        _, stats = engine.rank(words, 10, 0.1)
+        totals[0] += pruned_ms
+        totals[1] += full_ms
+        totals[2] += matcher_ms
+        top = engine.match_services(query, top_k=1)
+        label = f"{top[0][0]['name']} ({top[0][1]:.2f})" if top else "-"
+        print(f"{query:<30}{pruned_ms:>10.3f}{full_ms:>9.3f}{matcher_ms:>12.2f}"
+              f"{stats.scored:>8}{stats.skipped:>9}  {label}")
+    print(f"{'TOTAL':<30}{totals[0]:>10.3f}{totals[1]:>9.3f}{totals[2]:>12.2f}")
+
+
+def bench_jaccard(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Jaccard intersection/union with frozensets vs int bitmask popcounts"""
+    fields = [f for entry in snapshot.services for f in snapshot.service_fields(entry)]
+    print(f"{len(fields)} fields, vocabulary of {len(snapshot.vocabulary)} words")
+    print(f"{'query':<30}{'sets ms':>10}{'masks ms':>10}")
+
+    for query in ["vergunning aanvragen", "paspoort den haag", "afval container melden"]:
+        prepared = matcher.encode_query(matcher.prepare_text(query), snapshot.vocabulary)
+        words, mask = prepared.words, prepared.mask
+
+        def with_sets():
+            for f in fields:
+                len(words & f.words) / len(words | f.words)
+
+        def with_masks():
+            for f in fields:
+                (mask & f.mask).bit_count() / (mask | f.mask).bit_count()
+
+        print(f"{query:<30}{timed(with_sets):>10.2f}{timed(with_masks):>10.2f}")
+
+
+def bench_associations(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Per-service association scans (old route code) vs AssociationIndex"""
+    associations = snapshot.associations
+    index = snapshot.association_index
+    service_ids = [e.service["id"] for e in snapshot.services[:50]]
+
+    def scan():
+        for service_id in service_ids:
+            rows = [a for a in associations if a["service_id"] == service_id]
+            rows[0]["gemeente_name"] if rows else None
+
+    def lookup():
+        for service_id in service_ids:
+            index.first_gemeente_name(service_id)
+
+    print(f"first gemeente for 50 services: scan {timed(scan):.2f}ms, index {timed(lookup):.3f}ms")
+
+    gemeente_matches = matcher.match_gemeentes("amsterdam rotterdam utrecht", snapshot)
+    service_matches = matcher.match_services("vergunning", snapshot)
+    with_list = timed(lambda: matcher.combine_matches("q", gemeente_matches, service_matches, associations))
+    with_index = timed(lambda: matcher.combine_matches("q", gemeente_matches, service_matches, index))
+    print(f"combine_matches ({len(gemeente_matches)} x {len(service_matches)}): "
+          f"list {with_list:.2f}ms, index {with_index:.2f}ms")
+
+
+def bench_topk(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Full sort of every match vs TopK with field skipping (k = 10, as the route uses)"""
+    for query in QUERIES:
+        full = timed(lambda: matcher.match_services(query, snapshot)[:10])
+        bounded = timed(lambda: matcher.match_services(query, snapshot, top_k=10))
+        print(f"{query!r:32} sort {full:7.2f}ms  top-k {bounded:7.2f}ms")
+
+
+def bench_shards(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """
+    Scatter/gather over worker processes vs the in-process matcher (top 10):
+    one request at a time, QUERIES from 4 threads at once, and loading a
+    rebuilt snapshot into the running workers vs starting them
+    """
+    print(f"{os.cpu_count()} CPUs")
+    in_process = [timed(lambda: matcher.match_services(q, snapshot, top_k=10), repeat=3) for q in QUERIES]
+    print(f"{'in-process':<12} total {sum(in_process):8.2f}ms  max {max(in_process):7.2f}ms")
+
+    for n_shards in (1, 2, 4, 8):
+        start = time.perf_counter()
+        engine = ShardedMatcher(snapshot, matcher, n_shards)
+        startup_ms = (time.perf_counter() - start) * 1000
+        try:
+            latencies = [timed(lambda: engine.match_services(q, top_k=10), repeat=3) for q in QUERIES]
+            with ThreadPoolExecutor(4) as pool:
+                concurrent_ms = timed(lambda: list(pool.map(lambda q: engine.match_services(q, top_k=10), QUERIES)))
+            same = all(
+                engine.match_services(q, top_k=10) == matcher.match_services(q, snapshot, top_k=10)
+                for q in QUERIES
+            )
+            rebuilt = CatalogSnapshot.build(matcher, [dict(entry.service) for entry in snapshot.services], [], [])
+            start = time.perf_counter()
+            engine.load(rebuilt)
+            load_ms = (time.perf_counter() - start) * 1000
+        finally:
+            engine.close()
+        print(f"{n_shards} shard(s)   total {sum(latencies):8.2f}ms  max {max(latencies):7.2f}ms  "
+              f"4 threads {concurrent_ms:8.2f}ms  startup {startup_ms:6.0f}ms  load {load_ms:6.0f}ms  "
+              f"{'identical' if same else 'DIFFERENT'} results")
+
+
+def db_rows(rows: List[Dict]) -> List[Dict]:
+    """Rows as db.get_all_* returns them: fresh strings and timestamp columns per row"""
+    now = datetime.now()
+
+    def fresh(value):
+        if isinstance(value, str):
+            return value.encode().decode()
+        if isinstance(value, (list, tuple)):
+            return [fresh(v) for v in value]
+        return value
+
+    return [dict({k: fresh(v) for k, v in row.items()}, created_at=now.replace(), updated_at=now.replace())
+            for row in rows]
+
+
+def traced(fn) -> Tuple[object, int, int]:
+    """Result of fn() with the memory it retains and its peak, in bytes"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current - before, peak - before
+
+
+def allocations(fn) -> int:
+    """Memory blocks fn() allocated and still holds when it returns (tracemalloc)"""
+    tracemalloc.start()
+    result = fn()
+    blocks = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    tracemalloc.stop()
+    del result
+    return sum(stat.count for stat in blocks.statistics('filename'))
+
+
+def bench_memory(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Dict-row snapshot (compact=False) vs compact records with interned strings"""
+    services = [dict(e.service) for e in snapshot.services]
+    gemeentes = [dict(e.gemeente) for e in snapshot.gemeentes]
+    associations = [dict(a) for a in snapshot.associations]
+
+    for label, rows, record in (("service rows", services, ServiceRecord),
+                                ("association rows", associations, AssociationRecord)):
+        _, as_dicts, _ = traced(lambda: db_rows(rows))
+        _, as_records, _ = traced(lambda: [record(row) for row in db_rows(rows)])
+        dict_blocks = allocations(lambda: db_rows(rows))
+        record_blocks = allocations(lambda: [record(row) for row in db_rows(rows)])
+        print(f"{label:16}: dicts {as_dicts / 1024:7.0f} KiB in {dict_blocks:7} blocks, "
+              f"records {as_records / 1024:7.0f} KiB in {record_blocks:7} blocks")
+
+    compact_snapshot = None
+    for compact in (False, True):
+        label = "records" if compact else "dicts"
+        # Rows are created inside the trace: the dict snapshot keeps them alive
+        built, retained, _ = traced(lambda: CatalogSnapshot.build(
+            matcher, db_rows(services), db_rows(gemeentes), db_rows(associations), compact=compact
+        ))
+        compact_snapshot = built
+        print(f"snapshot with {label:7}: {retained / 1024 / 1024:6.1f} MiB")
+
+    # Matches are passed by reference on both paths, so records only shrink
+    # the resident snapshot; a request allocates the same either way
+    def request(query):
+        matches = [
+            {"service": service, "confidence": confidence,
+             "gemeente": compact_snapshot.association_index.first_gemeente_name(service["id"])}
+            for service, confidence in matcher.match_services(query, compact_snapshot, top_k=10)
+        ]
+        return template_engine.generate_suggestions(query, matches, 5)
+
+    peaks = []
+    blocks = []
+    for query in QUERIES:
+        request(query)  # warm caches
+        peaks.append(traced(lambda: request(query))[2])
+        blocks.append(allocations(lambda: request(query)))
+    print(f"request (either path): mean peak {sum(peaks) / len(peaks) / 1024:6.1f} KiB, "
+          f"max {max(peaks) / 1024:6.1f} KiB, "
+          f"{sum(blocks) / len(blocks):5.1f} blocks retained per query (max {max(blocks)})")
+
+
+def bench_indexfile(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Snapshot build from catalog rows vs index file load, and first-query latency"""
+    services = [dict(e.service) for e in snapshot.services]
+    gemeentes = [dict(e.gemeente) for e in snapshot.gemeentes]
+    associations = [dict(a) for a in snapshot.associations]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.idx")
+        start = time.perf_counter()
+        write_index_file(path, snapshot, "benchmark")
+        write_ms = (time.perf_counter() - start) * 1000
+        print(f"write {write_ms:7.0f}ms  file {os.path.getsize(path) / 1024 / 1024:6.1f} MiB")
+
+        loaders = (
+            ("build", lambda: CatalogSnapshot.build(matcher, services, gemeentes, associations)),
+            ("load", lambda: load_index_file(path)),
+        )
+        results = {}
+        for label, load in loaders:
+            startup = timed(load, repeat=3)
+            results[label] = loaded = load()
+            first = [timed(lambda: matcher.match_services(q, loaded, top_k=10), repeat=1) for q in QUERIES]
+            print(f"{label:6} {startup:7.0f}ms  first queries total {sum(first):7.2f}ms")
+
+        same = all(
+            [(s['id'], c) for s, c in matcher.match_services(q, results["load"], top_k=10)]
+            == [(s['id'], c) for s, c in matcher.match_services(q, snapshot, top_k=10)]
+            for q in QUERIES
+        )
+        print(f"{'identical' if same else 'DIFFERENT'} results")
+        results.clear()
+
+
+def bench_deadprefix(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Per-keystroke latency of dead queries with and without the no-match filter"""
+    start = time.perf_counter()
+    match_filter = matcher.match_filter(snapshot)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"filter built in {build_ms:.0f}ms, {match_filter.nbytes / 1024:.1f} KiB of Bloom bits")
+
+    def full_scan(query):
+        prepared = matcher.encode_query(
+            matcher.correct_query(matcher.prepare_text(query), snapshot.spelling), snapshot.vocabulary
+        )
+        candidates = matcher.retrieve_candidates(
+            prepared, snapshot.service_prefixes, snapshot.services, snapshot.service_trigrams
+        )
+        return matcher.score_candidates(prepared, candidates, top_k=10)
+
+    # Substring indexes are built before the first keystroke, as in the route
+    matcher.warm(snapshot)
+    print(f"{'keystroke':<16}{'scan ms':>9}{'filter ms':>11}{'repeat ms':>11}  result")
+    totals = [0.0, 0.0]
+    for typed in ("xqzwer", "qqpvk", "zzzz park"):
+        # Fresh dead cache per typed query: keystrokes build on earlier ones,
+        # repeats hit the dead cache
+        snapshot._engines.pop("match_filter", None)
+        matcher.match_filter(snapshot)
+        for end in range(2, len(typed) + 1):
+            query = typed[:end]
+            scan = timed(lambda: full_scan(query), repeat=3)
+            start = time.perf_counter()
+            result = matcher.match_services(query, snapshot, top_k=10)
+            first = (time.perf_counter() - start) * 1000
+            repeat = timed(lambda: matcher.match_services(query, snapshot, top_k=10))
+            totals[0] += scan
+            totals[1] += first
+            print(f"{query!r:<16}{scan:>9.2f}{first:>11.3f}{repeat:>11.3f}  {len(result)} matches")
+    print(f"{'TOTAL':<16}{totals[0]:>9.2f}{totals[1]:>11.3f}")
+
+
+def bench_compounds(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Compound parts through the prefix index vs a substring scan over every service"""
+    # Real catalogs mostly list "parkeervergunning", not "parkeer" and "vergunning"
+    # separately: keep the split keywords on every tenth service only
+    services = [
+        dict(entry.service, keywords=[k for k in entry.service["keywords"] if k not in MODIFIERS + HEADS])
+        if i % 10 else entry.service
+        for i, entry in enumerate(snapshot.services)
+    ]
+    gemeentes = [dict(entry.gemeente) for entry in snapshot.gemeentes]
+    start = time.perf_counter()
+    compound_snapshot = CatalogSnapshot.build(matcher, services, gemeentes, [])
+    print(f"snapshot with compound postings built in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    print(f"{'query':<14}{'scan ms':>9}{'index ms':>10}{'unsplit':>9}{'candidates':>12}"
+          f"{'scan hits':>11}{'index hits':>12}")
+    for query in ("vergunning", "container", "aangifte", "subsidie", "toeslag", "parkeer", "omgevings", "sloop"):
+        prepared = matcher.prepare_text(query)
+        # What the prefix index held before compound postings
+        unsplit = sum(
+            1 for e in compound_snapshot.services
+            if any(w.startswith(query) for field in [e.name] + e.keywords for w in field.words)
+        )
+        candidates = matcher.retrieve_candidates(
+            prepared, compound_snapshot.service_prefixes, compound_snapshot.services
+        )
+        scan = timed(lambda: matcher.score_candidates(prepared, compound_snapshot.services, top_k=10))
+        indexed = timed(lambda: matcher.score_candidates(prepared, candidates, top_k=10))
+        scan_hits = sum(1 for e in compound_snapshot.services if matcher.score_service(prepared, e) > 0)
+        index_hits = sum(1 for e in candidates if matcher.score_service(prepared, e) > 0)
+        print(f"{query:<14}{scan:>9.2f}{indexed:>10.2f}{unsplit:>9}{len(candidates):>12}"
+              f"{scan_hits:>11}{index_hits:>12}")
+
+
+def bench_phonetic(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Correcting spelling variants with and without the phonetic key index"""
+    spelling = snapshot.spelling
+    words, _, _ = spelling.parts()
+    swaps = [("ij", "y"), ("ij", "ei"), ("ou", "au"), ("c", "k"), ("g", "ch")]
+    variants = sorted({
+        word.replace(old, new, 1) for word in words for old, new in swaps if old in word
+    } | {word[:-1] + "dt" for word in words if word.endswith("t")})
+    variants = [v for v in variants if len(v) >= spelling.min_length and not spelling.is_known(v)]
+    print(f"{len(variants)} variants of {len(words)} words, {len(spelling.phonetic)} phonetic keys")
+
+    phonetic = spelling.phonetic
+    results = {}
+    try:
+        spelling.phonetic = None
+        symspell = timed(lambda: results.__setitem__("symspell", [spelling.correct(v) for v in variants]), repeat=3)
+    finally:
+        spelling.phonetic = phonetic
+    keyed = timed(lambda: results.__setitem__("phonetic", [spelling.correct(v) for v in variants]), repeat=3)
+
+    for name, ms in (("symspell", symspell), ("phonetic", keyed)):
+        found = sum(1 for corrected in results[name] if corrected is not None)
+        print(f"{name:<10}{ms:>9.2f}ms {ms * 1000 / max(1, len(variants)):>8.1f}us/token {found:>6} corrected")
+
+
+def bench_stemmer(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Inflected query words scored with and without their stems"""
+    stem.cache_clear()
+    start = time.perf_counter()
+    distinct = {word for word in snapshot.vocabulary}
+    catalog_stems = {stem(word) for word in distinct}
+    print(f"{len(distinct)} catalog words -> {len(catalog_stems)} stems "
+          f"({(time.perf_counter() - start) * 1000:.1f}ms cold)")
+
+    queries = [
+        "vergunningen", "subsidies", "containers", "verlengd", "wijzigt",
+        "meldt", "opzegt", "doorgeeft", "aanvraagt", "toeslagen verlengd",
+    ]
+    print(f"{'query':<26}{'words ms':>10}{'stems ms':>10}{'words':>7}{'stems':>7}{'raised':>8}")
+    for query in queries:
+        prepared = matcher.encode_query(matcher.prepare_text(query), snapshot.vocabulary)
+        # An empty stem set never matches, like scoring before stems existed
+        unstemmed = PreparedText(prepared.normalized, prepared.words, prepared.mask, stems=frozenset())
+        candidates = matcher.retrieve_candidates(
+            prepared, snapshot.service_prefixes, snapshot.services, snapshot.service_trigrams
+        )
+        results = {}
+        before = timed(lambda: results.__setitem__("words", matcher.score_candidates(unstemmed, candidates)))
+        after = timed(lambda: results.__setitem__("stems", matcher.score_candidates(prepared, candidates)))
+        word_scores = {id(entry): confidence for entry, confidence in results["words"]}
+        raised = sum(1 for entry, confidence in results["stems"] if confidence > word_scores.get(id(entry), 0.0))
+        print(f"{query:<26}{before:>10.2f}{after:>10.2f}{len(results['words']):>7}{len(results['stems']):>7}"
+              f"{raised:>8}")
+
+    for _ in range(3):
+        for query in queries:
+            matcher.prepare_text(query)
+    info = stem.cache_info()
+    print(f"stem memo: {info.hits} hits, {info.misses} misses, {info.currsize} entries")
+
+
+def bench_sessions(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Total latency of typing a word keystroke by keystroke, with and without a session"""
+    snapshot.get_engine("keystroke_session", SessionIndex)
+    print(f"{'typed':<22}{'keys':>5}{'full ms':>9}{'session ms':>12}  results")
+    totals = [0.0, 0.0]
+    for word in ("paspoort", "parkeervergunning", "parkeervergunnnig", "gemeente", "bijde",
+                 "aangiftes", "verlengd", "toeslagregistratie"):
+        queries = [word[:end] for end in range(2, len(word) + 1)]
+        results = {}
+
+        def full():
+            results["full"] = [matcher.match_services(q, snapshot, top_k=10) for q in queries]
+
+        def narrowed():
+            session = KeystrokeSession()
+            results["session"] = [matcher.match_services(q, snapshot, top_k=10, session=session) for q in queries]
+
+        full_ms = timed(full, repeat=3)
+        session_ms = timed(narrowed, repeat=3)
+        totals[0] += full_ms
+        totals[1] += session_ms
+        same = "identical" if results["full"] == results["session"] else "DIFFERENT"
+        print(f"{word:<22}{len(queries):>5}{full_ms:>9.2f}{session_ms:>12.2f}  {same}")
+    print(f"{'TOTAL':<22}{'':>5}{totals[0]:>9.2f}{totals[1]:>12.2f}")
+
+
+def bench_canonical(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """How many raw query variants collapse into one key, and what canonicalizing costs"""
+    rng = random.Random(7)
+    accents = str.maketrans("aeiou", "áëïóü")
+    bases = [f"{modifier}{head}" for modifier in MODIFIERS[:10] for head in HEADS[:5]]
+    traffic = []
+    for base in bases:
+        for _ in range(20):
+            words = [base, rng.choice(["aanvragen", "kosten", "den haag", "utrecht"])]
+            if rng.random() < 0.3:
+                words.reverse()
+            if rng.random() < 0.3:
+                words.insert(1, rng.choice(["de", "een", "voor"]))
+            text = " ".join(words)
+            if rng.random() < 0.3:
+                text = text.title()
+            if rng.random() < 0.2:
+                text = text.translate(accents)
+            if rng.random() < 0.2:
+                text = text.replace(" ", "  ") + " "
+            traffic.append(text)
+
+    order_free = keyword_set_key(snapshot, matcher, template_engine.detect_intents)
+    keys = {
+        "strip/lower": lambda text: text.strip().lower(),
+        "canonical text": None,
+        "order-free": order_free,
+    }
+    print(f"{len(traffic)} requests, {len(set(traffic))} distinct raw queries")
+    print(f"{'key':<16}{'keys':>7}{'variants/key':>14}{'hit rate':>10}{'us/query':>10}")
+    for name, key in keys.items():
+        canonicalizer = QueryCanonicalizer(max_keys=len(traffic))
+        start = time.perf_counter()
+        if name == "strip/lower":
+            seen = [key(text) for text in traffic]
+        else:
+            seen = [canonicalizer.canonicalize(text, key).key for text in traffic]
+        elapsed = time.perf_counter() - start
+        n_keys = len(set(seen))
+        variants = len(set(zip(seen, traffic))) / n_keys
+        print(f"{name:<16}{n_keys:>7}{variants:>14.2f}{1 - n_keys / len(traffic):>9.1%}"
+              f"{elapsed * 1e6 / len(traffic):>10.1f}")
+
+    ascii_text = [fold_text(text) for text in traffic]
+    print(f"fold_text: {timed(lambda: [fold_text(t) for t in traffic]) * 1000 / len(traffic):.2f}us/query raw, "
+          f"{timed(lambda: [fold_text(t) for t in ascii_text]) * 1000 / len(traffic):.2f}us/query ASCII")
+
+
+def bench_rerank(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """Phase times and result agreement of the retrieve-then-rerank pipeline per limit"""
+    queries = QUERIES + ["aan", "ver", "be", "ge"]
+    print(f"{'N':>6}{'retrieve ms':>13}{'rerank ms':>11}{'max rerank':>12}{'candidates':>12}{'dropped':>9}{'top10 same':>12}")
+    unlimited = {query: matcher.match_services(query, snapshot, top_k=10) for query in queries}
+    for limit in (0, 1000, 200, 50):
+        retrieve_ms = rerank_ms = max_rerank = 0.0
+        candidates = dropped = same = 0
+        for query in queries:
+            for _ in range(3):
+                trace = MatchTrace()
+                results = matcher.match_services(query, snapshot, top_k=10, retrieve_limit=limit, trace=trace)
+            retrieve_ms += trace.phases["retrieve"][0]
+            rerank = trace.phases["rerank"][0] if "rerank" in trace.phases else 0.0
+            rerank_ms += rerank
+            max_rerank = max(max_rerank, rerank)
+            candidates += trace.phases["retrieve"][1]
+            dropped += trace.dropped
+            same += results == unlimited[query]
+        print(f"{limit or 'none':>6}{retrieve_ms:>13.2f}{rerank_ms:>11.2f}{max_rerank:>12.2f}{candidates:>12}"
+              f"{dropped:>9}{same:>8}/{len(queries)}")
+
+
+def bench_budget(matcher: DutchMatcher, snapshot: CatalogSnapshot) -> None:
+    """CPU time of pathological queries with word caps and a per-request CPU budget"""
+    rng = random.Random(7)
+    vocabulary = [f"{modifier}{head}" for modifier in MODIFIERS for head in HEADS] + ["aanvragen", "de", "voor"]
+    queries = {
+        "typical": "parkeervergunning aanvragen",
+        "paragraph": " ".join(rng.choice(vocabulary) for _ in range(200)),
+        "long token": "".join(rng.choice(vocabulary) for _ in range(60))[:600],
+    }
+    configs = [("uncapped", 0, 0, 0), ("capped", 12, 40, 0), ("capped+50ms", 12, 40, 50)]
+    print(f"{'query':<12}{'config':<14}{'cpu ms':>9}{'partial':>9}{'top10 same':>12}")
+    for name, raw in queries.items():
+        baseline = matcher.match_services(raw, snapshot, top_k=10)
+        for config, max_words, max_word_length, budget_ms in configs:
+            text, _ = cap_words(fold_text(raw), max_words, max_word_length)
+            budget = MatchBudget(budget_ms) if budget_ms else None
+            trace = MatchTrace()
+            start = time.thread_time()
+            results = matcher.match_services(text, snapshot, top_k=10, trace=trace, budget=budget)
+            elapsed = (time.thread_time() - start) * 1000
+            print(f"{name:<12}{config:<14}{elapsed:>9.1f}{str(trace.partial):>9}{str(results == baseline):>12}")
+
+
+SECTIONS = {
+    "candidates": bench_candidates,
+    "scorer": bench_scorer,
+    "rapidfuzz": bench_rapidfuzz,
+    "tfidf": bench_tfidf,
+    "bm25f": bench_bm25f,
+    "jaccard": bench_jaccard,
+    "associations": bench_associations,
+    "topk": bench_topk,
+    "shards": bench_shards,
+    "memory": bench_memory,
+    "indexfile": bench_indexfile,
+    "deadprefix": bench_deadprefix,
+    "compounds": bench_compounds,
+    "phonetic": bench_phonetic,
+    "stemmer": bench_stemmer,
+    "sessions": bench_sessions,
+    "canonical": bench_canonical,
+    "rerank": bench_rerank,
+    "budget": bench_budget,
+}
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="DutchMatcher benchmarks")
+    # No choices=: argparse checks an empty positional list against them
+    parser.add_argument("sections", nargs="*", metavar="section",
+                        help=f"Sections to run (default: all): {', '.join(SECTIONS)}")
+    parser.add_argument("--services", type=int, default=2000, help="Number of synthetic services")
+    args = parser.parse_args()
+    unknown = [name for name in args.sections if name not in SECTIONS]
+    if unknown:
+        parser.error(f"unknown section(s): {', '.join(unknown)}")
+
+    matcher = DutchMatcher()
+    services, gemeentes, associations = build_catalog(args.services)
+
+    start = time.perf_counter()
+    snapshot = CatalogSnapshot.build(matcher, services, gemeentes, associations)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print("=" * 60)
+    print(f"Catalog: {len(services)} services, {len(gemeentes)} gemeentes, "
+          f"{len(associations)} associations (snapshot built in {build_ms:.0f}ms)")
+    print("=" * 60)
+
+    for name in args.sections or list(SECTIONS):
+        print(f"\n## {name}")
+        SECTIONS[name](matcher, snapshot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Build the memory-mapped catalog index file.
+Reads the catalog from the database, builds the snapshot and its indexes,
+and writes them to the file the API loads at startup (CATALOG_INDEX_FILE).
+
+Usage:
+    cd backend && python scripts/build_index_file.py [PATH] [--check]
+
+Rebuild after catalog changes (or let the API fall back to the database:
+a stale file is detected by its catalog fingerprint and ignored).
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.models.database import db
+from app.services.catalog import CatalogSnapshot
+from app.services.dutch_matcher import dutch_matcher
+from app.services.index_file import IndexFile, IndexFileError, write_index_file
+
+
+def check(path: str) -> int:
+    """Exit status 0 if the file exists and matches the current catalog"""
+    try:
+        index_file = IndexFile(path)
+    except (IndexFileError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    if index_file.fingerprint != db.get_catalog_fingerprint():
+        print(f"❌ {path} is stale")
+        return 1
+    print(f"✅ {path} is up to date")
+    return 0
+
+
+def build(path: str) -> int:
+    """Write the index file for the current catalog"""
+    start = time.perf_counter()
+    # Fingerprint first: a write between the two reads makes the file look
+    # stale (and get rebuilt), never current with old rows
+    fingerprint = db.get_catalog_fingerprint()
+    services = db.get_all_services()
+    gemeentes = db.get_all_gemeentes()
+    associations = db.get_all_associations()
+
+    snapshot = CatalogSnapshot.build(dutch_matcher, services, gemeentes, associations)
+    write_index_file(path, snapshot, fingerprint)
+
+    print(f"✅ Wrote {path}: {len(services)} services, {len(gemeentes)} gemeentes, "
+          f"{len(associations)} associations in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Build the catalog index file")
+    parser.add_argument("path", nargs="?", default=settings.CATALOG_INDEX_FILE,
+                        help="Output file (default: CATALOG_INDEX_FILE)")
+    parser.add_argument("--check", action="store_true",
+                        help="Only check whether the file matches the current catalog")
+    args = parser.parse_args()
+
+    if not args.path:
+        parser.error("no path given and CATALOG_INDEX_FILE is not set")
+
+    sys.exit(check(args.path) if args.check else build(args.path))
+
+
+if __name__ == "__main__":
+    main()
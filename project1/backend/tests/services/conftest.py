@@ -0,0 +1,194 @@
+"""
+Shared sample catalog for matcher tests.
+Mirrors the seed data in scripts/seed_data.py.
+Also a fake clock and a suggestion route with generation stubbed out.
+"""
+import asyncio
+
+import pytest
+
+from app.routes import suggestions as suggestions_route
+from app.services.canonical import QueryCanonicalizer
+from app.services.catalog import CatalogSnapshot
+from app.services.catalog_store import catalog_store
+from app.services.dutch_matcher import DutchMatcher
+from app.services.keystroke_session import SessionStore
+from app.services.suggestion_cache import SuggestionCache
+
+
+SERVICES = [
+    {
+        "id": 1,
+        "name": "Parkeervergunning aanvragen",
+        "description": "Aanvragen van een bewonersvergunning voor parkeren in uw wijk",
+        "keywords": ["parkeren", "bewonersvergunning", "auto", "parkeerplaats", "vergunning"],
+        "category": "Verkeer & Vervoer",
+    },
+    {
+        "id": 2,
+        "name": "Paspoort aanvragen",
+        "description": "Nieuw paspoort aanvragen of verlengen",
+        "keywords": ["paspoort", "identiteitsbewijs", "reisdocument", "ID"],
+        "category": "Documenten & Identiteit",
+    },
+    {
+        "id": 3,
+        "name": "Rijbewijs aanvragen",
+        "description": "Rijbewijs aanvragen of verlengen",
+        "keywords": ["rijbewijs", "rijbewijs verlengen", "autorijbewijs", "motor"],
+        "category": "Verkeer & Vervoer",
+    },
+    {
+        "id": 4,
+        "name": "Afvalcontainer aanvragen",
+        "description": "Container aanvragen voor GFT, papier of restafval",
+        "keywords": ["afval", "container", "gft", "restafval", "papier"],
+        "category": "Afval & Milieu",
+    },
+    {
+        "id": 5,
+        "name": "Verhuizing doorgeven",
+        "description": "Verhuizing doorgeven aan de gemeente (adreswijziging)",
+        "keywords": ["verhuizen", "adreswijziging", "inschrijven", "verhuizing", "BRP"],
+        "category": "Wonen & Leven",
+    },
+    {
+        "id": 6,
+        "name": "Bouwvergunning aanvragen",
+        "description": "Vergunning aanvragen voor bouwen of verbouwen",
+        "keywords": ["bouwen", "verbouwen", "vergunning", "aanbouw", "uitbouw"],
+        "category": "Bouwen & Wonen",
+    },
+    {
+        "id": 7,
+        "name": "Huwelijk voltrekken",
+        "description": "Trouwen of geregistreerd partnerschap aangaan",
+        "keywords": ["trouwen", "huwelijk", "partnerschap", "trouwdag"],
+        "category": "Burgerlijke Stand",
+    },
+]
+
+GEMEENTES = [
+    {"id": 1, "name": "Amsterdam"},
+    {"id": 2, "name": "Rotterdam"},
+    {"id": 3, "name": "Utrecht"},
+    {"id": 4, "name": "Den Haag"},
+    {"id": 5, "name": "Eindhoven"},
+    {"id": 6, "name": "'s-Hertogenbosch"},
+]
+
+# Every gemeente offers every service, except 's-Hertogenbosch (no huwelijk)
+ASSOCIATIONS = [
+    {
+        "id": g["id"] * 100 + s["id"],
+        "gemeente_id": g["id"],
+        "gemeente_name": g["name"],
+        "service_id": s["id"],
+        "service_name": s["name"],
+    }
+    for g in GEMEENTES
+    for s in SERVICES
+    if not (g["id"] == 6 and s["id"] == 7)
+]
+
+
+@pytest.fixture
+def matcher():
+    return DutchMatcher()
+
+
+@pytest.fixture
+def services():
+    return [dict(s) for s in SERVICES]
+
+
+@pytest.fixture
+def gemeentes():
+    return [dict(g) for g in GEMEENTES]
+
+
+@pytest.fixture
+def associations():
+    return [dict(a) for a in ASSOCIATIONS]
+
+
+@pytest.fixture
+def snapshot(matcher, services, gemeentes, associations):
+    return CatalogSnapshot.build(matcher, services, gemeentes, associations)
+
+
+@pytest.fixture(scope="module")
+def module_snapshot():
+    """Snapshot shared by all tests of a module, for engines that are slow to start"""
+    matcher = DutchMatcher()
+    return CatalogSnapshot.build(
+        matcher,
+        [dict(s) for s in SERVICES],
+        [dict(g) for g in GEMEENTES],
+        [dict(a) for a in ASSOCIATIONS]
+    )
+
+
+class FakeClock:
+    """Clock that only moves when a test sets now"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class RouteStub:
+    """
+    Suggestion generation stub for the suggestion route
+
+    Records the query, session and budget of every generate call; with
+    exhaust_budget set, each call uses up the request's budget.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.exhaust_budget = False
+
+    def generate(self, query, max_results, suggestion_engine, session=None, budget=None, snapshot=None):
+        self.calls.append((query, session, budget))
+        if self.exhaust_budget:
+            budget.exhausted = True
+        return []
+
+    @property
+    def queries(self):
+        return [query for query, _, _ in self.calls]
+
+    @property
+    def sessions(self):
+        return [session for _, session, _ in self.calls]
+
+    def request(self, query, **fields):
+        request = suggestions_route.SuggestionRequest(query=query, **fields)
+        return asyncio.run(suggestions_route.get_suggestions(request))
+
+
+@pytest.fixture
+def route(monkeypatch):
+    """
+    Installs a RouteStub on the suggestion route with a fresh cache,
+    canonicalizer and session store; keyword arguments replace any of
+    these route globals
+    """
+    def install(**overrides):
+        stub = RouteStub()
+        monkeypatch.setattr(catalog_store, "version", catalog_store.version)
+        route_globals = {
+            "_generate_suggestions": stub.generate,
+            "suggestion_cache": SuggestionCache(max_entries=16),
+            "query_canonicalizer": QueryCanonicalizer(),
+            "session_store": SessionStore(max_sessions=4),
+        }
+        route_globals.update(overrides)
+        for name, value in route_globals.items():
+            monkeypatch.setattr(suggestions_route, name, value)
+        return stub
+
+    return install
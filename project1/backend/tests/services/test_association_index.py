@@ -0,0 +1,60 @@
+"""
+Unit tests for the gemeente/service association index.
+"""
+from app.services.association_index import AssociationIndex, iter_bits
+
+
+class TestAssociationIndex:
+    """Test bitset pair checks and narrowing."""
+
+    def test_iter_bits(self):
+        assert list(iter_bits(0b101001)) == [0, 3, 5]
+        assert list(iter_bits(0)) == []
+
+    def test_pair_checks(self, associations):
+        index = AssociationIndex(associations)
+
+        assert index.has(1, 7)
+        assert not index.has(6, 7)  # 's-Hertogenbosch has no huwelijk
+        assert not index.has(99, 1)
+        assert not index.has(1, 99)
+
+    def test_gemeentes_for_service_in_association_order(self, associations):
+        index = AssociationIndex(associations)
+
+        assert index.gemeentes_for_service(7) == [1, 2, 3, 4, 5]
+        assert index.gemeentes_for_service(1, limit=2) == [1, 2]
+        assert index.first_gemeente_name(1) == "Amsterdam"
+        assert index.first_gemeente_name(99) is None
+
+    def test_narrow_with_mask(self, associations):
+        index = AssociationIndex(associations)
+        within = index.gemeente_mask([4, 6])
+
+        assert index.gemeentes_for_service(7, within=within) == [4]
+        assert index.services_for_gemeente(6, within=index.service_mask([2, 7])) == [2]
+
+
+class TestCombineMatches:
+    """Test combine_matches on the association index."""
+
+    def test_combines_associated_pairs(self, matcher, snapshot):
+        gemeente_matches = matcher.match_gemeentes("den bosch hertogenbosch", snapshot)
+        service_matches = matcher.match_services("huwelijk paspoort", snapshot)
+
+        results = matcher.combine_matches(
+            "huwelijk paspoort", gemeente_matches, service_matches, snapshot.association_index
+        )
+
+        assert results
+        assert all(r["service"]["id"] != 7 for r in results if r["gemeente"] == "'s-Hertogenbosch")
+
+    def test_list_and_index_inputs_agree(self, matcher, snapshot, associations):
+        gemeente_matches = matcher.match_gemeentes("amsterdam", snapshot)
+        service_matches = matcher.match_services("vergunning", snapshot)
+
+        assert matcher.combine_matches(
+            "q", gemeente_matches, service_matches, associations
+        ) == matcher.combine_matches(
+            "q", gemeente_matches, service_matches, snapshot.association_index
+        )
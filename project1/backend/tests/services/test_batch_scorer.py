@@ -0,0 +1,92 @@
+"""
+Unit tests for the rapidfuzz batch token scorer backend.
+"""
+import pytest
+
+from app.services import batch_scorer
+from app.services.batch_scorer import BatchTokenScorer, rapidfuzz_available
+from app.services.dutch_matcher import DutchMatcher, _token_similarity
+
+requires_rapidfuzz = pytest.mark.skipif(not rapidfuzz_available(), reason="rapidfuzz not installed")
+
+QUERIES = [
+    "park", "paspo", "rijbe", "aanvragen", "vergunning", "rijbeweis", "verhuizng",
+    "afvalcontaner", "huwelijk amsterdam", "parkeervergunning aanvragen", "wijk", "xqz",
+]
+
+
+@requires_rapidfuzz
+class TestBatchTokenScorer:
+    """Test batch similarities against the per-pair token similarity."""
+
+    @pytest.mark.parametrize("q_word", ["park", "rijbeweis", "verhuizng", "gft", "wijk", "ab"])
+    def test_similarities_match_token_similarity(self, snapshot, q_word):
+        batch = BatchTokenScorer(snapshot.vocabulary)
+        similarities = batch.similarities(frozenset([q_word]), 0.6)
+        max_distance = int(len(q_word) * 0.4)
+
+        for word, word_id in snapshot.vocabulary.items():
+            expected = _token_similarity(q_word, word, max_distance)
+            assert similarities.rows[q_word].get(word, 0.0) == expected
+            assert bool(similarities.masks[q_word] >> word_id & 1) == (expected > 0.0)
+
+    def test_prefixes_are_grouped(self, snapshot):
+        batch = BatchTokenScorer(snapshot.vocabulary)
+        prefixes, ids_by_prefix = batch.prefixes(4)
+
+        assert len(prefixes) == len(set(prefixes))
+        for prefix, ids in zip(prefixes, ids_by_prefix):
+            assert all(batch.words[i].startswith(prefix) and len(batch.words[i]) > 4 for i in ids)
+
+
+@requires_rapidfuzz
+class TestRapidfuzzBackend:
+    """Test that the backend does not change damerau rankings."""
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_services_match_python_backend(self, snapshot, query):
+        python = DutchMatcher(scorer="damerau")
+        batch = DutchMatcher(scorer="damerau", backend="rapidfuzz")
+
+        assert batch.match_services(query, snapshot) == python.match_services(query, snapshot)
+        assert batch.match_services(query, snapshot, top_k=2) == python.match_services(query, snapshot, top_k=2)
+
+    @pytest.mark.parametrize("query", ["amsterdm", "den haag", "hertogenbosch", "utr"])
+    def test_gemeentes_match_python_backend(self, snapshot, query):
+        python = DutchMatcher(scorer="damerau")
+        batch = DutchMatcher(scorer="damerau", backend="rapidfuzz")
+
+        assert batch.match_gemeentes(query, snapshot) == python.match_gemeentes(query, snapshot)
+
+    def test_similarities_only_for_damerau(self, snapshot, matcher):
+        heuristic = DutchMatcher(scorer="heuristic", backend="rapidfuzz")
+        damerau = DutchMatcher(scorer="damerau", backend="rapidfuzz")
+        query = matcher.prepare_text("rijbeweis")
+
+        assert heuristic.score_tokens(query, snapshot).similarities is None
+        assert damerau.score_tokens(query, snapshot).similarities is not None
+
+    def test_other_threshold_ignores_similarities(self, snapshot):
+        batch = DutchMatcher(scorer="damerau", backend="rapidfuzz")
+        python = DutchMatcher(scorer="damerau")
+        query = batch.score_tokens(batch.prepare_text("rijbeweis"), snapshot, threshold=0.9)
+        target = snapshot.services[2].name
+
+        assert batch.score_prepared(query, target, 0.6) == python.score_prepared(query, target, 0.6)
+
+
+class TestBackendSelection:
+    """Test backend validation and the fallback without rapidfuzz."""
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            DutchMatcher(backend="levenshtein")
+
+    def test_falls_back_without_rapidfuzz(self, monkeypatch, snapshot):
+        monkeypatch.setattr(batch_scorer, "process", None)
+
+        matcher = DutchMatcher(scorer="damerau", backend="rapidfuzz")
+        assert matcher.backend == "python"
+        assert matcher.match_services("rijbeweis", snapshot)
+        with pytest.raises(ImportError):
+            BatchTokenScorer(snapshot.vocabulary)
@@ -0,0 +1,97 @@
+"""
+Unit tests for the BM25F inverted-index engine.
+"""
+import pytest
+
+from app.services.bm25f_engine import Bm25fEngine
+from app.services.catalog import CatalogSnapshot, parse_field_weights
+
+
+@pytest.fixture
+def engine(snapshot, matcher):
+    return Bm25fEngine(snapshot, matcher)
+
+
+class TestBm25fEngine:
+    """Test BM25F scoring over per-field postings."""
+
+    def test_return_shape(self, engine):
+        """Same List[Tuple[Dict, float]] shape as DutchMatcher.match_services."""
+        matches = engine.match_services("paspoort")
+
+        assert matches[0][0]["id"] == 2
+        assert 0.0 < matches[0][1] <= 1.0
+        assert all(a[1] >= b[1] for a, b in zip(matches, matches[1:]))
+
+    def test_prefix_and_typo(self, engine):
+        assert engine.match_services("park")[0][0]["id"] == 1
+        assert engine.match_services("rijbeweis")[0][0]["id"] == 3
+
+    def test_only_query_postings_are_scored(self, engine):
+        scores, _ = engine.score(["bouwen"])
+
+        assert set(scores) == {5}  # dense id of Bouwvergunning aanvragen
+
+    def test_name_outranks_description(self, engine):
+        """A term in the name weighs more than the same term in a description."""
+        matches = dict((s["id"], c) for s, c in engine.match_services("vergunning", min_confidence=0.0))
+
+        assert matches[6] > matches[1]
+
+    def test_top_k(self, engine):
+        full = engine.match_services("aanvragen", min_confidence=0.0)
+
+        assert engine.match_services("aanvragen", min_confidence=0.0, top_k=2) == full[:2]
+
+    def test_unknown_query(self, engine):
+        assert engine.match_services("xq") == []
+
+    def test_field_weights_configurable(self, snapshot, matcher):
+        engine = Bm25fEngine(snapshot, matcher, field_weights={"description": 0.0})
+        scores, _ = engine.score(["trouwen"])  # keyword and description of Huwelijk
+
+        assert engine.field_weights["name"] == 1.0
+        assert scores[6] < Bm25fEngine(snapshot, matcher).score(["trouwen"])[0][6]
+
+    def test_empty_catalog(self, matcher):
+        engine = Bm25fEngine(CatalogSnapshot.build(matcher, [], [], []), matcher)
+
+        assert engine.match_services("paspoort") == []
+
+
+class TestParseFieldWeights:
+    """Test the MATCH_FIELD_WEIGHTS format."""
+
+    def test_parse(self):
+        assert parse_field_weights("name=1.0, description=0.5") == {"name": 1.0, "description": 0.5}
+        assert parse_field_weights("") == {}
+
+    def test_unknown_field(self):
+        with pytest.raises(ValueError, match="Unknown service field"):
+            parse_field_weights("title=1.0")
+
+
+class TestEarlyTermination:
+    """Test top-k early termination against exhaustive scoring."""
+
+    def test_rank_matches_exhaustive(self, engine):
+        for words in (["aanvragen"], ["vergunning"], ["aanvragen", "paspoort"], ["park", "verlengen"]):
+            scores, max_score = engine.score(words)
+            exhaustive = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            for top_k in (1, 2, 5):
+                ranked, _ = engine.rank(words, top_k, 0.0)
+                assert ranked == [(d, s / max_score) for d, s in exhaustive[:top_k]]
+
+    def test_common_term_skips_postings(self, engine):
+        """Five services contain "aanvragen"; the top 1 needs only the best one."""
+        ranked, stats = engine.rank(["aanvragen"], 1, 0.0)
+
+        assert len(ranked) == 1
+        assert stats.scored == 1
+        assert stats.skipped == 4
+
+    def test_stats_accumulate(self, engine):
+        engine.match_services("aanvragen", top_k=1)
+        engine.match_services("aanvragen", top_k=1)
+
+        assert engine.stats.scored == 2
@@ -0,0 +1,162 @@
+"""
+Unit tests for query canonicalization and its collapse metrics.
+"""
+from itertools import groupby
+
+import pytest
+
+from app.core.config import settings
+from app.routes import suggestions as suggestions_route
+from app.services.canonical import QueryCanonicalizer, cap_words, fold_text
+from app.services.catalog_store import catalog_store
+
+
+class TestFoldText:
+    """Test the canonical text of a query."""
+
+    @pytest.mark.parametrize("raw,folded", [
+        ("  Paspoort  ", "paspoort"),
+        ("PASPOORT\taanvragen", "paspoort aanvragen"),
+        ("paspóórt", "paspoort"),
+        ("Súdwest-Fryslân", "sudwest-fryslan"),
+        ("ĳzer", "ijzer"),
+        ("ﬁets", "fiets"),
+        ("Straße", "strasse"),
+        ("naïef  \n café", "naief cafe"),
+    ])
+    def test_fold(self, raw, folded):
+        assert fold_text(raw) == folded
+
+    @pytest.mark.parametrize("raw", ["Ëindhóven", "ᴬmsterdam", "ϒ", "paspoort"])
+    def test_idempotent(self, raw):
+        assert fold_text(fold_text(raw)) == fold_text(raw)
+
+    def test_matcher_normalizes_with_fold(self, matcher, snapshot):
+        assert matcher.normalize_text("  Rĳbewijs AANVRAGEN ") == "rijbewijs aanvragen"
+        assert matcher.match_services("PASPÓÓRT  ", snapshot) == matcher.match_services("paspoort", snapshot)
+
+
+class TestCapWords:
+    """Test the caps on query words and word length."""
+
+    @pytest.mark.parametrize("text,max_words,max_word_length,capped", [
+        ("paspoort aanvragen den haag", 2, 0, ("paspoort aanvragen", True)),
+        ("paspoort aanvragen?", 2, 0, ("paspoort aanvragen?", False)),
+        ("paspoort aanvragen", 0, 0, ("paspoort aanvragen", False)),
+        ("paspoortaanvragen den", 0, 8, ("paspoort den", True)),
+        ("s-hertogenbosch", 0, 10, ("s-hertogenbo", True)),
+        ("aaaa bbbb cccc", 2, 2, ("aa bb", True)),
+    ])
+    def test_cap(self, text, max_words, max_word_length, capped):
+        assert cap_words(text, max_words, max_word_length) == capped
+
+    def test_canonicalizer_counts_truncated(self):
+        canonicalizer = QueryCanonicalizer(max_words=2)
+        first = canonicalizer.canonicalize("Paspoort aanvragen in Den Haag")
+        second = canonicalizer.canonicalize("paspoort aanvragen")
+
+        assert (first.text, first.truncated) == ("paspoort aanvragen", True)
+        assert first.key == second.key
+        assert not second.truncated
+        assert canonicalizer.stats()["truncated"] == 1
+
+
+class TestCollapseMetrics:
+    """Test the raw-variant counts per canonical key."""
+
+    def test_variants_collapse(self):
+        canonicalizer = QueryCanonicalizer()
+        for raw in ["Paspoort", "paspoort ", "PASPOORT", "paspoort", "rijbewijs"]:
+            canonicalizer.canonicalize(raw)
+        stats = canonicalizer.stats()
+
+        assert canonicalizer.variants("paspoort") == 4
+        assert stats["queries"] == 5
+        assert stats["keys"] == 2
+        assert stats["raw_variants"] == 5
+        assert stats["variants_histogram"] == {"1": 1, "2": 0, "3-4": 1, "5+": 0}
+        assert stats["top_keys"] == [{"canonical": "paspoort", "variants": 4}]
+
+    def test_custom_key(self):
+        canonicalizer = QueryCanonicalizer()
+        key = lambda text: tuple(sorted(text.split()))
+        first = canonicalizer.canonicalize("Paspoort aanvragen", key)
+        second = canonicalizer.canonicalize("aanvragen paspoort", key)
+
+        assert first.key == second.key
+        assert (first.text, second.text) == ("paspoort aanvragen", "aanvragen paspoort")
+        assert canonicalizer.variants(first.key) == 2
+
+    def test_bounded(self):
+        canonicalizer = QueryCanonicalizer(max_keys=2, max_variants=2)
+        for raw in ["a1", "A1", "a1 ", "b1", "c1"]:
+            canonicalizer.canonicalize(raw)
+
+        assert len(canonicalizer) == 2
+        assert canonicalizer.stats()["evictions"] == 1
+        assert canonicalizer.variants("a1") == 0
+        assert canonicalizer.variants("b1") == 1
+
+    def test_variants_past_cap_are_counted(self):
+        canonicalizer = QueryCanonicalizer(max_variants=2)
+        for raw in ["ab", "AB", "Ab", "aB"]:
+            canonicalizer.canonicalize(raw)
+
+        assert canonicalizer.variants("ab") == 4
+
+    def test_disabled(self):
+        canonicalizer = QueryCanonicalizer(max_keys=0)
+
+        assert canonicalizer.canonicalize(" Ab ").text == "ab"
+        assert canonicalizer.stats()["keys"] == 0
+
+
+class TestSuggestionRouteCanonical:
+    """Test that the route scores the canonical text and caches by its key."""
+
+    def test_variants_share_cache_entry(self, route):
+        stub = route()
+
+        assert stub.request("Paspóórt  aanvragen").cached is False
+        assert stub.request("paspoort aanvragen").cached is True
+        assert stub.queries == ["paspoort aanvragen"]
+        assert suggestions_route.query_canonicalizer.variants("paspoort aanvragen") == 2
+
+    def test_response_echoes_raw_query(self, route):
+        assert route().request("Paspóórt").query == "Paspóórt"
+
+
+class TestOrderFreeKey:
+    """Test that queries sharing an order-free key get the same suggestions."""
+
+    QUERIES = [
+        "paspoort aanvragen", "aanvragen paspoort", "paspoort de aanvragen",
+        "paspoort aanvragen den haag", "den haag paspoort aanvragen", "den haag de paspoort aanvragen",
+        "hoe paspoort", "paspoort hoe", "wat kost een rijbewijs", "rijbewijs kost wat",
+        "den haag", "utrecht amsterdam paspoort", "amsterdam utrecht paspoort",
+    ]
+
+    @pytest.fixture
+    def bm25f(self, monkeypatch, module_snapshot):
+        monkeypatch.setattr(settings, "MATCH_ENGINE", "bm25f")
+        monkeypatch.setattr(settings, "DATABASE_URL", "postgresql://test")
+        monkeypatch.setattr(catalog_store, "get", lambda: module_snapshot)
+
+    def test_dutch_matcher_keys_on_text(self, monkeypatch):
+        monkeypatch.setattr(settings, "MATCH_ENGINE", "dutch")
+
+        assert suggestions_route._order_free_key("template") is None
+
+    def test_same_key_same_suggestions(self, bm25f):
+        key = suggestions_route._order_free_key("template")
+        results = sorted(
+            (key(query), query, suggestions_route._generate_suggestions_from_database(query, 5))
+            for query in self.QUERIES
+        )
+        groups = [list(group) for _, group in groupby(results, key=lambda item: item[0])]
+
+        for group in groups:
+            assert all(suggestions == group[0][2] for _, _, suggestions in group)
+        assert len(groups) < len(self.QUERIES)
+        assert key("paspoort aanvragen") == key("paspoort de aanvragen") == key("aanvragen paspoort")
+        assert key("utrecht amsterdam paspoort") != key("amsterdam utrecht paspoort")
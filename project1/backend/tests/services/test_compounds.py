@@ -0,0 +1,83 @@
+"""
+Unit tests for compound splitting and the compound postings in the prefix index.
+"""
+import pytest
+
+from app.services.catalog import CatalogSnapshot
+from app.services.compounds import CompoundSplitter
+
+
+LEXICON = ["vergunning", "container", "afval", "rest", "bewoner", "rijbewijs", "auto", "paspoort"]
+
+SERVICES = [
+    {"id": 1, "name": "Parkeervergunning aanvragen", "description": None,
+     "keywords": ["bewonersvergunning"], "category": None},
+    {"id": 2, "name": "Afvalcontainer aanvragen", "description": None,
+     "keywords": ["restafvalcontainer"], "category": None},
+    {"id": 3, "name": "Vergunning aanvragen", "description": "Container plaatsen op straat",
+     "keywords": ["bewoner"], "category": None},
+    {"id": 4, "name": "Paspoort aanvragen", "description": None, "keywords": [], "category": None},
+]
+
+
+class TestCompoundSplitter:
+    """Test splitting against a lexicon."""
+
+    @pytest.fixture
+    def splitter(self):
+        return CompoundSplitter(LEXICON)
+
+    @pytest.mark.parametrize("word,parts", [
+        ("parkeervergunning", ["parkeer", "vergunning"]),
+        ("afvalcontainer", ["afval", "container"]),
+        ("autorijbewijs", ["auto", "rijbewijs"]),
+        ("restafvalcontainer", ["rest", "afval", "container"]),
+    ])
+    def test_split(self, splitter, word, parts):
+        assert splitter.split(word) == parts
+
+    def test_linking_s(self, splitter):
+        assert splitter.split("bewonersvergunning") == ["bewoners", "bewoner", "vergunning"]
+
+    @pytest.mark.parametrize("word", ["vergunning", "paspoort", "aanvragen", "xvergunning", ""])
+    def test_not_a_compound(self, splitter, word):
+        assert splitter.split(word) == []
+
+    def test_parts_skips_duplicates_and_words(self, splitter):
+        parts = splitter.parts(["parkeervergunning", "vergunning", "bewonersvergunning"])
+
+        assert parts == ["parkeer", "bewoners", "bewoner"]
+
+    def test_short_lexicon_words_are_not_heads(self):
+        assert CompoundSplitter(["pas"]).split("reispas") == []
+
+
+class TestCompoundPostings:
+    """Test that heads and modifiers hit compounds through the prefix index."""
+
+    @pytest.fixture
+    def compound_snapshot(self, matcher):
+        return CatalogSnapshot.build(matcher, SERVICES, [], [])
+
+    @pytest.mark.parametrize("query,ids", [
+        ("vergunning", {0, 2}),
+        ("container", {1}),
+        ("afval", {1}),
+        ("bewoner", {0, 2}),
+        ("parkeer", {0}),
+    ])
+    def test_prefix_lookup(self, compound_snapshot, query, ids):
+        assert compound_snapshot.service_prefixes.lookup(query) == ids
+
+    def test_head_query_retrieves_compounds(self, matcher, compound_snapshot):
+        prepared = matcher.prepare_text("vergunning")
+        candidates = matcher.retrieve_candidates(
+            prepared, compound_snapshot.service_prefixes, compound_snapshot.services
+        )
+
+        assert [entry.service['id'] for entry in candidates] == [1, 3]
+        matches = matcher.match_services("vergunning", compound_snapshot)
+        assert {service['id'] for service, _ in matches} == {1, 3}
+
+    def test_unrelated_service_not_retrieved(self, compound_snapshot):
+        assert 3 not in compound_snapshot.service_prefixes.lookup("vergunning")
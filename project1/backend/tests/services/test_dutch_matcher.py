@@ -0,0 +1,191 @@
+"""
+Unit tests for the Dutch matcher.
+Tests normalization, fuzzy scoring and matching against a catalog snapshot.
+"""
+import random
+import re
+
+import pytest
+
+from app.services.catalog import CatalogSnapshot, PreparedText
+from app.services.dutch_matcher import DutchMatcher
+
+
+class TestNormalization:
+    """Test text normalization and preparation."""
+
+    def test_normalize_diacritics(self, matcher):
+        """Test diacritics are folded and whitespace trimmed."""
+        assert matcher.normalize_text("  Ëindhóven ") == "eindhoven"
+
+    def test_prepare_text_drops_stop_words(self, matcher):
+        """Test prepared keywords exclude stop words and short words."""
+        prepared = matcher.prepare_text("Hoe vraag ik een paspoort aan")
+
+        assert prepared.normalized == "hoe vraag ik een paspoort aan"
+        assert prepared.words == frozenset({"vraag", "paspoort"})
+        assert prepared.length == len(prepared.normalized)
+
+
+class TestFuzzyMatch:
+    """Test fuzzy_match scoring cascade."""
+
+    def test_exact_match(self, matcher):
+        assert matcher.fuzzy_match("Amsterdam", "amsterdam") == (True, 1.0)
+
+    def test_substring_match(self, matcher):
+        is_match, confidence = matcher.fuzzy_match("park", "Parkeervergunning aanvragen")
+
+        assert is_match
+        assert 0.7 < confidence <= 0.95
+
+    def test_no_match(self, matcher):
+        assert matcher.fuzzy_match("xqz", "Paspoort aanvragen") == (False, 0.0)
+
+
+class TestCatalogSnapshot:
+    """Test matching against a prebuilt catalog snapshot."""
+
+    def test_snapshot_prepares_all_fields(self, snapshot, services):
+        """Test every service field is prepared once at build time."""
+        assert len(snapshot.services) == len(services)
+        entry = snapshot.services[0]
+
+        assert entry.name.normalized == "parkeervergunning aanvragen"
+        assert len(entry.keywords) == len(services[0]["keywords"])
+        assert entry.description is not None
+        assert entry.category.normalized == "verkeer & vervoer"
+
+    def test_snapshot_matches_list_input(self, matcher, snapshot, services, gemeentes):
+        """Test snapshot and raw-list inputs produce identical results."""
+        def ids(matches):
+            return [(row["id"], confidence) for row, confidence in matches]
+
+        for query in ["park", "paspo", "verhu", "bouwen aanvragen", "den haag"]:
+            assert ids(matcher.match_services(query, snapshot)) == ids(matcher.match_services(query, services))
+            assert ids(matcher.match_gemeentes(query, snapshot)) == ids(matcher.match_gemeentes(query, gemeentes))
+
+    def test_indexed_retrieval_matches_full_scan(self, matcher, snapshot, services, gemeentes):
+        """Test random queries find the same services and gemeentes as the full scan of a list."""
+        def ids(matches):
+            return [(row["id"], confidence) for row, confidence in matches]
+
+        # The list path has no spelling corrector; compare retrieval alone
+        snapshot.spelling = None
+        words = sorted({
+            word for entry in snapshot.services for field in snapshot.service_fields(entry)
+            for word in re.findall(r'\w+', field.normalized)
+        } | {word for entry in snapshot.gemeentes for word in entry.name.words})
+        rng = random.Random(11)
+        queries = ["verlengen", "partnerschap", "afvalmelding", "msterdam", "dam"]
+        for _ in range(300):
+            word = rng.choice(words)
+            start = rng.randrange(len(word))
+            queries.append(rng.choice([
+                word,
+                word[start:start + rng.randint(2, 8)],
+                word + rng.choice(words),
+                " ".join(rng.sample(words, rng.randint(2, 3))),
+            ]))
+
+        for query in queries:
+            assert ids(matcher.match_services(query, snapshot)) == ids(matcher.match_services(query, services)), query
+            assert ids(matcher.match_gemeentes(query, snapshot)) == ids(matcher.match_gemeentes(query, gemeentes)), query
+
+    def test_match_services_ranking(self, matcher, snapshot):
+        """Test the best matching service is ranked first."""
+        matches = matcher.match_services("paspoort", snapshot)
+
+        assert matches[0][0]["id"] == 2
+        assert all(a[1] >= b[1] for a, b in zip(matches, matches[1:]))
+
+    def test_empty_optional_fields(self, matcher):
+        """Test services without keywords or description are handled."""
+        snapshot = CatalogSnapshot.build(
+            matcher,
+            [{"id": 1, "name": "Paspoort", "description": "", "category": "", "keywords": None}],
+            [],
+            []
+        )
+
+        assert snapshot.services[0].keywords == []
+        assert snapshot.services[0].description is None
+        assert matcher.match_services("paspoort", snapshot)[0][1] == 1.0
+
+    def test_records_are_compact_rows(self, matcher):
+        """Test snapshot rows keep only the used columns, with interned strings."""
+        rows = [
+            {"id": 1, "name": "Paspoort aanvragen", "description": None,
+             "category": "Documenten", "keywords": ["paspoort"], "created_at": object()},
+            {"id": 2, "name": "ID-kaart aanvragen", "description": "ID-kaart",
+             "category": "".join(["Documen", "ten"]), "keywords": None, "created_at": object()},
+        ]
+        snapshot = CatalogSnapshot.build(matcher, rows, [], [])
+        first, second = (entry.service for entry in snapshot.services)
+
+        assert dict(first) == {"id": 1, "name": "Paspoort aanvragen", "description": None,
+                               "category": "Documenten", "keywords": ("paspoort",)}
+        assert "created_at" not in first
+        assert second.get("keywords") == ()
+        assert first["category"] is second["category"]
+        assert snapshot.service(2) is second
+        assert snapshot.service(99) is None
+
+
+class TestDamerauScorer:
+    """Test the bounded Damerau-Levenshtein scorer mode."""
+
+    def test_unknown_scorer_raises(self):
+        with pytest.raises(ValueError, match="Unknown scorer"):
+            DutchMatcher(scorer="cosine")
+
+    def test_typo_matches(self):
+        matcher = DutchMatcher(scorer="damerau")
+
+        is_match, confidence = matcher.fuzzy_match("rijbeweis", "Rijbewijs aanvragen")
+
+        assert is_match
+        assert confidence >= 0.6
+
+    def test_prefix_matches(self):
+        matcher = DutchMatcher(scorer="damerau")
+
+        assert matcher.fuzzy_match("Amsterdam", "amsterdam") == (True, 1.0)
+        assert matcher.fuzzy_match("park", "Parkeervergunning")[0]
+        assert matcher.fuzzy_match("xqz", "Paspoort aanvragen") == (False, 0.0)
+
+    def test_ranking_on_snapshot(self, services):
+        matcher = DutchMatcher(scorer="damerau")
+        snapshot = CatalogSnapshot.build(matcher, services, [], [])
+
+        assert matcher.match_services("paspo", snapshot)[0][0]["id"] == 2
+        assert matcher.match_services("verhuizng", snapshot)[0][0]["id"] == 5
+
+
+class TestBitmaskJaccard:
+    """Test vocabulary bitmasks used for Jaccard scoring."""
+
+    def test_fields_have_masks(self, snapshot):
+        vocabulary = snapshot.vocabulary
+        name = snapshot.services[1].name  # Paspoort aanvragen
+
+        assert name.mask == (1 << vocabulary["paspoort"]) | (1 << vocabulary["aanvragen"])
+        assert snapshot.gemeentes[0].name.mask == 1 << vocabulary["amsterdam"]
+
+    def test_most_frequent_word_is_bit_zero(self, snapshot):
+        assert snapshot.vocabulary["aanvragen"] == 0
+
+    def test_unknown_query_words_count_in_union(self, matcher, snapshot):
+        query = matcher.encode_query(matcher.prepare_text("paspoort onbekend"), snapshot.vocabulary)
+
+        assert query.mask.bit_count() == 2
+        assert query.mask & (1 << len(snapshot.vocabulary))
+
+    def test_mask_scoring_matches_set_scoring(self, matcher, snapshot):
+        for query in ["rijbewijs verlengen motor", "afval papier", "trouwen partnerschap"]:
+            plain = matcher.prepare_text(query)
+            encoded = matcher.encode_query(plain, snapshot.vocabulary)
+            for entry in snapshot.services:
+                for field in snapshot.service_fields(entry):
+                    unmasked = PreparedText(field.normalized, field.words)
+                    assert matcher.score_prepared(encoded, field) == matcher.score_prepared(plain, unmasked)
@@ -0,0 +1,33 @@
+"""
+Unit tests for bounded Damerau-Levenshtein distance.
+"""
+from app.services.edit_distance import bounded_edit_distance, edit_distance
+
+
+class TestEditDistance:
+    """Test optimal string alignment distance."""
+
+    def test_edit_distance(self):
+        assert edit_distance("paspoort", "paspoort") == 0
+        assert edit_distance("paspoordt", "paspoort") == 1
+        assert edit_distance("rijbeweis", "rijbewijs") == 2
+        assert edit_distance("verhiuzing", "verhuizing") == 1  # transposition
+        assert edit_distance("", "afval") == 5
+
+    def test_bounded_within_limit(self):
+        assert bounded_edit_distance("rijbeweis", "rijbewijs", 2) == 2
+        assert bounded_edit_distance("paspoordt", "paspoort", 2) == 1
+
+    def test_bounded_over_limit(self):
+        """Distances over the bound are reported as max_distance + 1."""
+        assert bounded_edit_distance("rijbeweis", "rijbewijs", 1) == 2
+        assert bounded_edit_distance("parkeren", "paspoort", 2) == 3
+        assert bounded_edit_distance("id", "identiteitsbewijs", 3) == 4
+
+    def test_bounded_matches_unbounded(self):
+        words = ["afval", "afvalcontainer", "container", "afvla", "contianer", "vergunning"]
+        for a in words:
+            for b in words:
+                exact = edit_distance(a, b)
+                for k in range(4):
+                    assert bounded_edit_distance(a, b, k) == min(exact, k + 1)
@@ -0,0 +1,61 @@
+"""
+Unit tests for the Aho-Corasick gemeente detector.
+"""
+from app.services.gemeente_detector import GemeenteDetector, word_text
+
+
+def build_detector(names):
+    detector = GemeenteDetector()
+    for i, name in enumerate(names, start=1):
+        detector.add(name, {"id": i, "name": name})
+    return detector.freeze()
+
+
+class TestGemeenteDetector:
+    """Test gemeente detection and query splitting."""
+
+    def test_word_text(self):
+        assert word_text("'s-hertogenbosch") == "s hertogenbosch"
+        assert word_text("  den   haag ") == "den haag"
+
+    def test_detects_single_and_multi_word_names(self):
+        detector = build_detector(["amsterdam", "den haag", "'s-hertogenbosch"])
+
+        mentions, rest = detector.detect("parkeervergunning amsterdam")
+        assert [m.gemeente["name"] for m in mentions] == ["amsterdam"]
+        assert rest == "parkeervergunning"
+
+        mentions, rest = detector.detect("paspoort den haag aanvragen")
+        assert [m.gemeente["name"] for m in mentions] == ["den haag"]
+        assert rest == "paspoort aanvragen"
+
+        mentions, rest = detector.detect("rijbewijs 's-hertogenbosch")
+        assert [m.gemeente["name"] for m in mentions] == ["'s-hertogenbosch"]
+        assert rest == "rijbewijs"
+
+    def test_word_boundaries(self):
+        detector = build_detector(["ede", "breda"])
+
+        mentions, rest = detector.detect("vergunning bredase")
+        assert mentions == []
+        assert rest == "vergunning bredase"
+
+    def test_leftmost_longest(self):
+        detector = build_detector(["haag", "den haag"])
+
+        mentions, rest = detector.detect("den haag paspoort")
+        assert [m.gemeente["name"] for m in mentions] == ["den haag"]
+        assert rest == "paspoort"
+
+    def test_multiple_mentions(self):
+        detector = build_detector(["amsterdam", "utrecht"])
+
+        mentions, rest = detector.detect("verhuizen amsterdam utrecht")
+        assert [m.gemeente["name"] for m in mentions] == ["amsterdam", "utrecht"]
+        assert rest == "verhuizen"
+
+    def test_snapshot_detector(self, snapshot):
+        mentions, rest = snapshot.gemeente_detector.detect("paspoort den haag")
+
+        assert [m.gemeente["id"] for m in mentions] == [4]
+        assert rest == "paspoort"
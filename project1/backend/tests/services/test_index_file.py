@@ -0,0 +1,206 @@
+"""
+Unit tests for the memory-mapped catalog index file.
+"""
+import struct
+
+import pytest
+
+from app.services import catalog_store as catalog_store_module
+from app.services.catalog import CatalogSnapshot
+from app.services.catalog_store import CatalogStore
+from app.services.index_file import (
+    FORMAT_VERSION, MAGIC, IndexFile, IndexFileError, IndexFileWriter,
+    load_index_file, write_index_file
+)
+
+
+QUERIES = ["park", "paspo", "aanvragen", "vergunning", "rijbeweis", "verhuizng", "wijk", "xqz"]
+
+
+@pytest.fixture
+def index_path(tmp_path, snapshot):
+    path = str(tmp_path / "catalog.idx")
+    write_index_file(path, snapshot, "fp-1")
+    return path
+
+
+class FakeDatabase:
+    """Counts the catalog reads CatalogStore makes"""
+
+    def __init__(self, fingerprint, services, gemeentes, associations):
+        self.fingerprint = fingerprint
+        self.rows = (services, gemeentes, associations)
+        self.reads = 0
+
+    def get_catalog_fingerprint(self):
+        if self.fingerprint is None:
+            raise ConnectionError("database is down")
+        return self.fingerprint
+
+    def get_all_services(self):
+        self.reads += 1
+        return self.rows[0]
+
+    def get_all_gemeentes(self):
+        return self.rows[1]
+
+    def get_all_associations(self):
+        return self.rows[2]
+
+
+class TestIndexFile:
+    """Test that a loaded snapshot answers like the one it was written from."""
+
+    def test_round_trip_rows(self, index_path, snapshot):
+        loaded = load_index_file(index_path, version=3)
+
+        assert loaded.version == 3
+        assert loaded.fingerprint == "fp-1"
+        assert [dict(e.service) for e in loaded.services] == [dict(e.service) for e in snapshot.services]
+        assert [dict(e.gemeente) for e in loaded.gemeentes] == [dict(e.gemeente) for e in snapshot.gemeentes]
+        assert [dict(a) for a in loaded.associations] == [dict(a) for a in snapshot.associations]
+
+    def test_round_trip_prepared_fields(self, index_path, snapshot):
+        loaded = load_index_file(index_path)
+
+        assert loaded.vocabulary == snapshot.vocabulary
+        for a, b in zip(loaded.services, snapshot.services):
+            for x, y in zip(loaded.service_fields(a), snapshot.service_fields(b)):
+                assert (x.normalized, x.words, x.mask) == (y.normalized, y.words, y.mask)
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_matches_built_snapshot(self, index_path, snapshot, matcher, query):
+        loaded = load_index_file(index_path)
+
+        def ids(matches):
+            return [(item['id'], confidence) for item, confidence in matches]
+
+        assert ids(matcher.match_services(query, loaded)) == ids(matcher.match_services(query, snapshot))
+        assert ids(matcher.match_gemeentes(query, loaded)) == ids(matcher.match_gemeentes(query, snapshot))
+
+    def test_gemeente_detector_and_associations(self, index_path):
+        loaded = load_index_file(index_path)
+
+        mentions, remainder = loaded.gemeente_detector.detect("paspoort den haag")
+        assert [m.gemeente['name'] for m in mentions] == ["Den Haag"]
+        assert remainder == "paspoort"
+        assert loaded.association_index.first_gemeente_name(7) == "Amsterdam"
+
+    def test_missing_optional_fields(self, tmp_path, matcher):
+        snapshot = CatalogSnapshot.build(matcher, [{"id": 9, "name": "Paspoort", "keywords": None}], [], [])
+        path = str(tmp_path / "catalog.idx")
+        write_index_file(path, snapshot, "fp")
+
+        service = load_index_file(path).services[0]
+        assert service.service['description'] is None
+        assert service.service['category'] is None
+        assert service.keywords == [] and service.description is None
+
+    def test_string_table_nulls(self, tmp_path):
+        writer = IndexFileWriter()
+        writer.add_strings("values", ["a", None, "", "é"])
+        path = str(tmp_path / "strings.idx")
+        writer.write(path, "fp")
+
+        table = IndexFile(path).strings("values")
+        assert list(table) == ["a", None, "", "é"]
+        assert [table[i] for i in range(len(table))] == ["a", None, "", "é"]
+
+
+class TestIndexFileErrors:
+    """Test that unreadable files raise IndexFileError."""
+
+    def test_other_format_version(self, index_path):
+        with open(index_path, 'r+b') as f:
+            f.seek(len(MAGIC))
+            f.write(struct.pack("<I", FORMAT_VERSION + 1))
+
+        with pytest.raises(IndexFileError, match="format version"):
+            load_index_file(index_path)
+
+    def test_not_an_index_file(self, tmp_path):
+        path = tmp_path / "other.idx"
+        path.write_bytes(b"x" * 200)
+
+        with pytest.raises(IndexFileError):
+            IndexFile(str(path))
+
+    def test_missing_section(self, tmp_path):
+        path = str(tmp_path / "empty.idx")
+        IndexFileWriter().write(path, "fp")
+
+        with pytest.raises(IndexFileError, match="missing section"):
+            load_index_file(path)
+
+
+class TestCatalogStoreIndexFile:
+    """Test that CatalogStore starts from the file only while it is current."""
+
+    def fake_db(self, monkeypatch, fingerprint, services, gemeentes, associations):
+        fake = FakeDatabase(fingerprint, services, gemeentes, associations)
+        monkeypatch.setattr(catalog_store_module, "db", fake)
+        return fake
+
+    def test_current_file_skips_catalog_reads(self, monkeypatch, index_path, services, gemeentes, associations):
+        fake = self.fake_db(monkeypatch, "fp-1", services, gemeentes, associations)
+        store = CatalogStore(max_age_seconds=0, index_path=index_path)
+
+        snapshot = store.get()
+        assert snapshot.index_file is not None
+        assert fake.reads == 0
+
+    def test_stale_file_builds_from_database(self, monkeypatch, index_path, services, gemeentes, associations):
+        fake = self.fake_db(monkeypatch, "fp-2", services, gemeentes, associations)
+        store = CatalogStore(max_age_seconds=0, index_path=index_path)
+
+        snapshot = store.get()
+        assert snapshot.index_file is None
+        assert snapshot.fingerprint == "fp-2"
+        assert fake.reads == 1
+
+    def test_unreadable_file_builds_from_database(self, monkeypatch, tmp_path, services, gemeentes, associations):
+        fake = self.fake_db(monkeypatch, "fp-1", services, gemeentes, associations)
+        store = CatalogStore(max_age_seconds=0, index_path=str(tmp_path / "missing.idx"))
+
+        assert store.get().index_file is None
+        assert fake.reads == 1
+
+    def test_expired_snapshot_reused_while_catalog_unchanged(
+        self, monkeypatch, index_path, services, gemeentes, associations
+    ):
+        fake = self.fake_db(monkeypatch, "fp-2", services, gemeentes, associations)
+        store = CatalogStore(max_age_seconds=1e-9, index_path=index_path)
+
+        first = store.get()
+        assert store.get() is first
+        assert fake.reads == 1
+
+        fake.fingerprint = "fp-3"
+        assert store.get() is not first
+        assert fake.reads == 2
+
+    def test_database_down_loads_file(self, monkeypatch, index_path, services, gemeentes, associations):
+        fake = self.fake_db(monkeypatch, None, services, gemeentes, associations)
+        store = CatalogStore(max_age_seconds=0, index_path=index_path)
+
+        snapshot = store.get()
+        assert snapshot.index_file is not None
+        assert snapshot.fingerprint == "fp-1"
+        assert fake.reads == 0
+
+    def test_database_down_keeps_current_snapshot(
+        self, monkeypatch, index_path, services, gemeentes, associations
+    ):
+        fake = self.fake_db(monkeypatch, "fp-2", services, gemeentes, associations)
+        store = CatalogStore(max_age_seconds=1e-9, index_path=index_path)
+
+        first = store.get()
+        fake.fingerprint = None
+        assert store.get() is first
+
+    def test_database_down_without_file_raises(self, monkeypatch, tmp_path, services, gemeentes, associations):
+        self.fake_db(monkeypatch, None, services, gemeentes, associations)
+        store = CatalogStore(max_age_seconds=0, index_path=str(tmp_path / "missing.idx"))
+
+        with pytest.raises(ConnectionError):
+            store.get()
@@ -0,0 +1,151 @@
+"""
+Unit tests for keystroke sessions (incremental narrowing of type-ahead queries).
+"""
+import pytest
+
+from app.services.catalog import CatalogSnapshot
+from app.services.keystroke_session import KeystrokeSession, SessionIndex, SessionStore
+from app.services.suggestion_cache import SuggestionCache
+
+
+TYPED = [
+    "paspoort", "parkeervergunning", "rijbeweis", "verhuisd", "afvalcontainer",
+    "gemeente", "adreswijziging", "motorrijbewijs", "idkaart", "xqzw",
+]
+
+
+def keystrokes(word):
+    return [word[:end] for end in range(2, len(word) + 1)]
+
+
+class TestNarrowing:
+    """Test that narrowed results equal full scoring."""
+
+    @pytest.mark.parametrize("word", TYPED)
+    def test_typing_matches_full_scoring(self, matcher, snapshot, word):
+        session = KeystrokeSession()
+        for query in keystrokes(word):
+            expected = matcher.match_services(query, snapshot, top_k=10)
+            assert matcher.match_services(query, snapshot, top_k=10, session=session) == expected
+
+    def test_backspace_and_edits_match_full_scoring(self, matcher, snapshot):
+        session = KeystrokeSession()
+        for query in ["pas", "pasp", "pas", "par", "park", "pak", "pa", "id", "ids", "paspoort a"]:
+            expected = matcher.match_services(query, snapshot)
+            assert matcher.match_services(query, snapshot, session=session) == expected
+
+    def test_extension_narrows(self, matcher, snapshot):
+        session = KeystrokeSession()
+        for query in keystrokes("paspoort"):
+            matcher.match_services(query, snapshot, session=session)
+
+        assert session.restarted == 1
+        assert session.extended == len(keystrokes("paspoort")) - 1
+
+    def test_backspace_restarts(self, matcher, snapshot):
+        session = KeystrokeSession()
+        for query in ["pasp", "pas"]:
+            matcher.match_services(query, snapshot, session=session)
+
+        assert session.restarted == 2
+        assert session.extended == 0
+
+    def test_new_snapshot_restarts(self, matcher, services, gemeentes, associations, snapshot):
+        session = KeystrokeSession()
+        matcher.match_services("pas", snapshot, session=session)
+        other = CatalogSnapshot.build(matcher, services, gemeentes, associations)
+        matcher.match_services("pasp", other, session=session)
+
+        assert session.restarted == 2
+
+    def test_multi_word_queries_are_not_narrowed(self, matcher, snapshot):
+        session = KeystrokeSession()
+        matcher.match_services("paspoort", snapshot, session=session)
+        matcher.match_services("paspoort d", snapshot, session=session)
+        matcher.match_services("paspoort de", snapshot, session=session)
+
+        assert session.extended == 0 and session.restarted == 1
+
+    def test_damerau_scorer_ignores_session(self, snapshot):
+        from app.services.dutch_matcher import DutchMatcher
+        session = KeystrokeSession()
+        DutchMatcher(scorer="damerau").match_services("pas", snapshot, session=session)
+
+        assert session.restarted == 0
+
+    def test_field_inside_query_is_kept(self, matcher):
+        services = [
+            {"id": 1, "name": "Identiteitskaart", "keywords": ["id"]},
+            {"id": 2, "name": "Paspoort", "keywords": ["reisdocument"]},
+        ]
+        snapshot = CatalogSnapshot.build(matcher, services, [], [])
+        session = KeystrokeSession()
+        for query in ["pa", "pas", "pasid"]:
+            expected = matcher.match_services(query, snapshot)
+            assert matcher.match_services(query, snapshot, session=session) == expected
+
+
+class TestSessionIndex:
+    """Test the per-snapshot narrowing tables."""
+
+    def test_containing(self, snapshot):
+        index = SessionIndex(snapshot)
+        ids = index.containing("vergunning")
+
+        assert [snapshot.services[i].service['id'] for i in ids] == [1, 6]
+        assert index.containing("vergunningen", ids) == []
+
+    def test_inside(self, snapshot):
+        index = SessionIndex(snapshot)
+        ids = index.inside("xxmotorxx")
+
+        assert {snapshot.services[i].service['id'] for i in ids} == {3}
+
+
+class TestSessionStore:
+    """Test the bounded session store with expiry."""
+
+    def test_same_token_same_session(self):
+        store = SessionStore(max_sessions=4)
+
+        assert store.session("a") is store.session("a")
+        assert store.session("a") is not store.session("b")
+        assert store.stats()["created"] == 2
+
+    def test_expiry(self, monkeypatch):
+        store = SessionStore(max_sessions=4, ttl_seconds=10)
+        now = [1000.0]
+        monkeypatch.setattr("app.services.keystroke_session.time.monotonic", lambda: now[0])
+        first = store.session("a")
+        now[0] += 5
+        assert store.session("a") is first
+        now[0] += 11
+
+        assert store.session("a") is not first
+        assert store.stats()["expirations"] == 1
+
+    def test_bounded(self):
+        store = SessionStore(max_sessions=2)
+        first = store.session("a")
+        store.session("b")
+        store.session("c")
+
+        assert len(store) == 2
+        assert store.stats()["evictions"] == 1
+        assert store.session("a") is not first
+
+    def test_disabled(self):
+        assert SessionStore(max_sessions=0).session("a") is None
+
+
+class TestSuggestionRouteSession:
+    """Test that the route passes the request's session to the matcher."""
+
+    def test_session_token(self, route):
+        stub = route(suggestion_cache=SuggestionCache(max_entries=0))
+        stub.request("pas", session_token="tab-1")
+        stub.request("pasp", session_token="tab-1")
+        stub.request("pasp")
+
+        assert stub.sessions[0] is not None and stub.sessions[0] is stub.sessions[1]
+        assert stub.sessions[2] is None
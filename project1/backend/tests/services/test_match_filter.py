@@ -0,0 +1,166 @@
+"""
+Unit tests for the Bloom filter and the no-match fast path.
+"""
+import pytest
+
+from app.services.bloom_filter import BloomFilter
+from app.services.catalog import CatalogSnapshot
+from app.services.dutch_matcher import DutchMatcher
+from app.services.match_filter import MatchFilter
+
+
+def full_scan(matcher, query, snapshot):
+    """match_services without the filter: score every entry when nothing is retrieved"""
+    prepared = matcher.encode_query(
+        matcher.correct_query(matcher.prepare_text(query), snapshot.spelling), snapshot.vocabulary
+    )
+    candidates = matcher.retrieve_candidates(
+        prepared, snapshot.service_prefixes, snapshot.services, snapshot.service_trigrams
+    )
+    return [(entry.service, confidence) for entry, confidence in matcher.score_candidates(prepared, candidates)]
+
+
+class TestBloomFilter:
+    """Test membership without false negatives."""
+
+    def test_no_false_negatives(self):
+        items = [f"item{i}" for i in range(2000)]
+        bloom = BloomFilter(len(items))
+        bloom.update(items)
+
+        assert all(item in bloom for item in items)
+        assert len(bloom) == 2000
+
+    def test_probes_are_spread(self):
+        bloom = BloomFilter(10, error_rate=1e-6)
+        for i in range(5000):
+            assert len(set(bloom._positions(f"item{i}"))) > 1
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        bloom.update(f"in{i}" for i in range(1000))
+
+        false_positives = sum(f"out{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+
+def strict_filter(snapshot):
+    """Filter without practical false positives (str hashes differ per process)"""
+    return MatchFilter(snapshot, error_rate=1e-9)
+
+
+class TestMatchFilter:
+    """Test that only queries that cannot match are rejected."""
+
+    @pytest.mark.parametrize("query", ["xqz", "xqzw", "xqzwe", "qq", "zzzz zzzz"])
+    def test_rejects_dead_queries(self, snapshot, matcher, query):
+        match_filter = strict_filter(snapshot)
+
+        assert not match_filter.may_match(matcher.prepare_text(query))
+        assert full_scan(matcher, query, snapshot) == []
+
+    @pytest.mark.parametrize("query", [
+        "rvergunning",     # inside a field text
+        "xqz paspoort",    # shared keyword
+        "xqzparkeren",     # catalog word inside a query word
+        "ergunnin",        # query word inside a catalog word
+        "motor xq",        # field text inside the query
+        "gf",              # two characters inside a field
+    ])
+    def test_keeps_possible_matches(self, snapshot, matcher, query):
+        match_filter = MatchFilter(snapshot)
+
+        assert match_filter.may_match(matcher.prepare_text(query))
+
+    @pytest.mark.parametrize("query", [
+        "xqz", "xqzw", "xqz paspoort", "xqzparkeren", "ergunnin", "motor xq", "wijk", "vvv",
+    ])
+    def test_matches_full_scan(self, snapshot, matcher, query):
+        assert matcher.match_services(query, snapshot) == full_scan(matcher, query, snapshot)
+
+    def test_empty_field_matches_everything(self, matcher):
+        snapshot = CatalogSnapshot.build(matcher, [{"id": 1, "name": "", "keywords": ["paspoort"]}], [], [])
+
+        assert MatchFilter(snapshot).may_match(matcher.prepare_text("xqz"))
+        assert matcher.match_services("xqz", snapshot) == full_scan(matcher, "xqz", snapshot)
+
+
+class TestNegativeCache:
+    """Test the per-snapshot cache of dead queries."""
+
+    @pytest.fixture(autouse=True)
+    def install_strict_filter(self, snapshot):
+        snapshot.get_engine("match_filter", strict_filter)
+
+    def test_repeat_is_served_from_cache(self, snapshot, matcher):
+        assert matcher.match_services("xqzw", snapshot) == []
+        match_filter = matcher.match_filter(snapshot)
+        rejected = match_filter.rejected
+
+        assert matcher.match_services("XQZW ", snapshot) == []
+        assert match_filter.rejected == rejected
+        assert match_filter.dead_hits == 1
+
+    def test_extension_is_checked_again(self, snapshot, matcher):
+        assert matcher.match_services("xqz", snapshot) == []
+        assert matcher.match_services("xqz paspoort", snapshot)
+
+    def test_probed_before_retrieval(self, monkeypatch, snapshot, matcher):
+        # "pa" has prefix hits, none of which can match
+        def retrieve(*args, **kwargs):
+            raise AssertionError("retrieved a rejected query")
+
+        monkeypatch.setattr(matcher, "retrieve_candidates", retrieve)
+
+        assert matcher.match_services("zzzz pa", snapshot) == []
+        assert matcher.match_filter(snapshot).is_dead(('services', 'zzzz pa'))
+
+    def test_dead_prefix(self, snapshot):
+        match_filter = MatchFilter(snapshot)
+        match_filter.mark_dead(('services', 'xq'))
+
+        assert match_filter.has_dead_prefix('services', 'xq')
+        assert match_filter.has_dead_prefix('services', 'xqz paspoort')
+        assert not match_filter.has_dead_prefix('services', 'x')
+        assert not match_filter.has_dead_prefix('gemeentes', 'xqz')
+
+    def test_extension_skips_substring_search(self, monkeypatch, snapshot, matcher):
+        assert matcher.match_services("zzzz", snapshot) == []
+        substrings = matcher.substring_index(snapshot)
+        searched = []
+        containing = substrings.containing
+
+        def recording(text):
+            searched.append(text)
+            return containing(text)
+
+        monkeypatch.setattr(substrings, "containing", recording)
+
+        assert matcher.match_services("zzzz paspoort", snapshot) == full_scan(matcher, "zzzz paspoort", snapshot)
+        assert searched == ["paspoort"]
+
+    def test_services_and_gemeentes_are_separate(self, snapshot, matcher):
+        matcher.match_services("xqz", snapshot)
+        match_filter = matcher.match_filter(snapshot)
+
+        assert match_filter.is_dead(('services', 'xqz'))
+        assert not match_filter.is_dead(('gemeentes', 'xqz'))
+
+    def test_cache_is_bounded(self, snapshot):
+        match_filter = MatchFilter(snapshot, dead_capacity=2)
+        for key in ("a", "b", "c"):
+            match_filter.mark_dead(key)
+
+        assert not match_filter.is_dead("a")
+        assert match_filter.is_dead("c")
+
+    def test_new_snapshot_starts_empty(self, matcher, services, gemeentes, associations):
+        first = CatalogSnapshot.build(matcher, services, gemeentes, associations)
+        matcher.match_services("xqz", first)
+        second = CatalogSnapshot.build(matcher, services, gemeentes, associations)
+
+        assert matcher.match_filter(second) is not matcher.match_filter(first)
+        assert not matcher.match_filter(second).is_dead(('services', 'xqz'))
+
+    def test_only_for_heuristic_scorer(self, snapshot):
+        assert DutchMatcher(scorer="damerau").match_filter(snapshot) is None
@@ -0,0 +1,283 @@
+"""
+Unit tests for the retrieve-then-rerank pipeline: retrieval limits, CPU budgets and phase stats.
+"""
+import pytest
+
+from app.core.config import settings
+from app.routes import suggestions as suggestions_route
+from app.services.bm25f_engine import Bm25fEngine
+from app.services.canonical import QueryCanonicalizer
+from app.services.catalog import CatalogSnapshot
+from app.services.catalog_store import CatalogStore, catalog_store
+from app.services.dutch_matcher import BUDGET_CHECK_INTERVAL
+from app.services.match_pipeline import (
+    DEFAULT_RETRIEVE_LIMITS, MatchBudget, MatchTrace, PipelineStats, parse_retrieve_limits
+)
+
+from .conftest import FakeClock
+
+
+class TestRetrieveLimits:
+    """Test the per-engine limit spec."""
+
+    def test_defaults(self):
+        assert parse_retrieve_limits("") == DEFAULT_RETRIEVE_LIMITS
+
+    def test_override(self):
+        limits = parse_retrieve_limits("dutch=500, bm25f=0")
+
+        assert limits["dutch"] == 500
+        assert limits["bm25f"] == 0
+        assert limits["tfidf"] == DEFAULT_RETRIEVE_LIMITS["tfidf"]
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            parse_retrieve_limits("lucene=10")
+
+
+class TestLimitedRetrieval:
+    """Test that retrieval keeps the best-scoring candidates up to the limit."""
+
+    def test_phrase_and_word_hits_rank_first(self, matcher, snapshot):
+        query = matcher.prepare_text("paspoort aanvragen")
+        trace = MatchTrace()
+        candidates = matcher.retrieve_candidates(
+            query, snapshot.service_prefixes, snapshot.services, snapshot.service_trigrams,
+            limit=1, trace=trace
+        )
+
+        assert [entry.service['id'] for entry in candidates] == [2]
+        assert trace.dropped == 4
+
+    def test_catalog_order_kept(self, matcher, snapshot):
+        query = matcher.prepare_text("vergunning aanvragen")
+        candidates = matcher.retrieve_candidates(
+            query, snapshot.service_prefixes, snapshot.services, snapshot.service_trigrams, limit=3
+        )
+
+        # Parkeer- and bouwvergunning match both words, then catalog order
+        assert [entry.service['id'] for entry in candidates] == [1, 2, 6]
+
+    def test_limit_above_candidates_changes_nothing(self, matcher, snapshot):
+        for query in ["park", "paspoort den haag", "rijbeweis", "wijk", "aanvragen"]:
+            trace = MatchTrace()
+            limited = matcher.match_services(query, snapshot, retrieve_limit=100, trace=trace)
+
+            assert limited == matcher.match_services(query, snapshot)
+            assert trace.dropped == 0
+
+    def test_limit_without_index(self, matcher, services):
+        trace = MatchTrace()
+        matcher.match_services("wijk", services, retrieve_limit=3, trace=trace)
+
+        assert trace.phases["retrieve"][1] == 3
+        assert trace.dropped == len(services) - 3
+
+    def test_phases_recorded(self, matcher, snapshot):
+        trace = MatchTrace()
+        matches = matcher.match_services("aanvragen", snapshot, top_k=2, retrieve_limit=3, trace=trace)
+
+        assert list(trace.phases) == ["retrieve", "rerank"]
+        assert trace.phases["retrieve"][1] == 3
+        assert trace.phases["rerank"][1] == len(matches) == 2
+
+    def test_bm25f_limit_caps_results(self, snapshot, matcher):
+        engine = Bm25fEngine(snapshot, matcher)
+        trace = MatchTrace("bm25f")
+
+        assert len(engine.match_services("aanvragen", retrieve_limit=2, trace=trace)) == 2
+        assert trace.phases["retrieve"][1] == 2
+
+
+class TestPipelineStats:
+    """Test per-engine aggregation of request traces."""
+
+    def test_aggregates(self):
+        stats = PipelineStats()
+        for ms, candidates in [(1.0, 10), (3.0, 30)]:
+            trace = MatchTrace("dutch")
+            trace.add("rerank", ms, candidates)
+            trace.add("retrieve", 0.5, 100)
+            trace.dropped = 5
+            stats.add(trace)
+        dutch = stats.stats()["dutch"]
+
+        assert list(dutch["phases"]) == ["retrieve", "rerank"]
+        assert dutch["phases"]["rerank"] == {
+            "calls": 2, "mean_ms": 2.0, "p99_ms": 3.0, "max_ms": 3.0,
+            "mean_candidates": 20.0, "max_candidates": 30,
+        }
+        assert dutch["dropped"] == 10
+
+    def test_repeated_phase_adds_up(self):
+        trace = MatchTrace()
+        trace.add("associate", 1.0, 2)
+        trace.add("associate", 0.5, 3)
+
+        assert trace.phases["associate"] == [1.5, 5]
+
+
+class TestSuggestionRoutePhases:
+    """Test that a suggestion request reports every phase."""
+
+    def test_route_records_phases(self, monkeypatch, snapshot):
+        stats = PipelineStats()
+        monkeypatch.setattr(suggestions_route, "pipeline_stats", stats)
+        monkeypatch.setattr(settings, "MATCH_ENGINE", "dutch")
+        monkeypatch.setattr(settings, "RETRIEVE_LIMITS", "dutch=2")
+        monkeypatch.setattr(catalog_store, "get", lambda: snapshot)
+
+        suggestions = suggestions_route._generate_suggestions_from_database("aanvragen", 5)
+        dutch = stats.stats()["dutch"]
+
+        assert suggestions
+        assert list(dutch["phases"]) == ["retrieve", "rerank", "associate", "templates"]
+        assert dutch["phases"]["retrieve"]["max_candidates"] == 2
+        assert dutch["dropped"] == 3
+
+
+class TestMatchBudget:
+    """Test the CPU budget of one request."""
+
+    def test_expires_and_stays_expired(self):
+        clock = FakeClock()
+        budget = MatchBudget(50, clock=clock)
+
+        assert not budget.expired()
+        assert budget.remaining_ms() == 50.0
+        clock.now = 0.05
+        assert budget.expired()
+        clock.now = 0.0
+        assert budget.expired()
+        assert budget.exhausted
+
+    def test_unlimited(self):
+        budget = MatchBudget(0)
+
+        assert not budget.expired()
+        assert budget.remaining_ms() == float('inf')
+
+
+class TestBudgetedScoring:
+    """Test that scoring stops at the budget and keeps the best so far."""
+
+    FILLER = [
+        {
+            "id": 100 + i,
+            "name": f"Melding {i} aanvragen",
+            "description": "Melding aanvragen voor de openbare ruimte",
+            "keywords": ["melding"],
+            "category": "Openbare Ruimte",
+        }
+        for i in range(40)
+    ]
+
+    @pytest.fixture
+    def large_snapshot(self, matcher, services, gemeentes):
+        # The best match for "paspoort aanvragen" comes last in catalog order
+        paspoort = [s for s in services if s["id"] == 2]
+        others = [s for s in services if s["id"] != 2]
+        return CatalogSnapshot.build(matcher, others + self.FILLER + paspoort, gemeentes, [])
+
+    def exhausted(self):
+        clock = FakeClock()
+        budget = MatchBudget(1, clock=clock)
+        clock.now = 1.0
+        return budget
+
+    def test_stops_after_check_interval(self, matcher, large_snapshot):
+        query = matcher.prepare_text("aanvragen")
+        candidates = large_snapshot.services
+        matches = matcher.score_candidates(query, candidates, budget=self.exhausted())
+
+        assert matches == matcher.score_candidates(query, candidates[:BUDGET_CHECK_INTERVAL])
+        assert len(matcher.score_candidates(query, candidates)) > len(matches)
+
+    def test_best_retrieved_scored_first(self, matcher, large_snapshot):
+        trace = MatchTrace()
+        budget = self.exhausted()
+        matches = matcher.match_services("paspoort aanvragen", large_snapshot, top_k=3, trace=trace, budget=budget)
+
+        assert matches[0] == matcher.match_services("paspoort aanvragen", large_snapshot, top_k=3)[0]
+        assert matches[0][0]['id'] == 2
+        assert trace.partial
+
+    def test_unspent_budget_changes_nothing(self, matcher, large_snapshot):
+        for query in ["aanvragen", "paspoort aanvragen", "melding", "vergunning", "rijbeweis"]:
+            for top_k in [None, 1, 5]:
+                trace = MatchTrace()
+                budgeted = matcher.match_services(
+                    query, large_snapshot, top_k=top_k, trace=trace, budget=MatchBudget(0)
+                )
+
+                assert budgeted == matcher.match_services(query, large_snapshot, top_k=top_k)
+                assert not trace.partial
+
+    def test_partial_requests_counted(self):
+        stats = PipelineStats()
+        for partial in [True, False, True]:
+            trace = MatchTrace()
+            trace.partial = partial
+            stats.add(trace)
+
+        assert stats.stats()["dutch"]["partial"] == 2
+
+
+class TestSuggestionRouteBudget:
+    """Test that budget-cut and capped responses are marked partial and not cached."""
+
+    @pytest.fixture(autouse=True)
+    def budget(self, monkeypatch):
+        monkeypatch.setattr(settings, "MATCH_BUDGET_MS", 50)
+
+    def test_exhausted_budget_not_cached(self, route):
+        stub = route()
+        stub.exhaust_budget = True
+        assert stub.request("paspoort").partial is True
+        stub.exhaust_budget = False
+        second = stub.request("paspoort")
+
+        assert (second.partial, second.cached) == (False, False)
+        assert stub.request("paspoort").cached is True
+        assert len(stub.calls) == 2
+
+    def test_catalog_work_not_charged(self, monkeypatch, route, matcher, services, gemeentes):
+        # Rebuilding the snapshot and building each engine on first use take
+        # a CPU second on the budget's clock; matching takes none
+        clock = FakeClock()
+        store = CatalogStore()
+        filler = TestBudgetedScoring.FILLER
+
+        def build_from_db():
+            clock.now += 1
+            return CatalogSnapshot.build(matcher, services + filler, gemeentes, [])
+
+        def get_engine(snapshot, name, factory):
+            if name not in snapshot._engines:
+                clock.now += 1
+            return original_get_engine(snapshot, name, factory)
+
+        original_get_engine = CatalogSnapshot.get_engine
+        monkeypatch.setattr(CatalogSnapshot, "get_engine", get_engine)
+        monkeypatch.setattr(store, "_build_from_db", build_from_db)
+        monkeypatch.setattr(settings, "DATABASE_URL", "postgresql://test")
+        monkeypatch.setattr(settings, "MATCH_ENGINE", "dutch")
+        monkeypatch.setattr(settings, "MATCH_SHARDS", 0)
+        monkeypatch.setattr(suggestions_route, "catalog_store", store)
+        monkeypatch.setattr(suggestions_route, "pipeline_stats", PipelineStats())
+        monkeypatch.setattr(suggestions_route, "MatchBudget", lambda ms: MatchBudget(ms, clock=clock))
+        stub = route(_generate_suggestions=suggestions_route._generate_suggestions)
+
+        first = stub.request("melding aanvragen", session_token="abc")
+        store.invalidate()
+        rebuilt = stub.request("melding aanvragen", session_token="abc")
+
+        assert first.suggestions and rebuilt.suggestions
+        assert (first.partial, rebuilt.partial) == (False, False)
+        assert clock.now > 2
+
+    def test_capped_query_partial(self, route):
+        stub = route(query_canonicalizer=QueryCanonicalizer(max_words=3))
+
+        assert stub.request("ik wil graag een paspoort aanvragen").partial is True
+        assert stub.request("ik wil graag").partial is False
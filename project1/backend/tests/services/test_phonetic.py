@@ -0,0 +1,110 @@
+"""
+Unit tests for Dutch phonetic keys and the phonetic stage of spelling correction.
+"""
+import pytest
+
+from app.services.catalog import CatalogSnapshot
+from app.services.phonetic import PhoneticIndex, SPELLING_VARIATIONS, max_distance, phonetic_key
+from app.services.spelling import SpellingCorrector
+from app.services.dutch_matcher import DutchMatcher
+
+
+class TestPhoneticKey:
+    """Test that spelling variants share a key."""
+
+    @pytest.mark.parametrize("variant,word", [
+        ("rijbewys", "rijbewijs"),
+        ("rijbeweis", "rijbewijs"),
+        ("reysdocument", "reisdocument"),
+        ("vrouwen", "vrouen"),
+        ("blauw", "blau"),
+        ("paspoordt", "paspoort"),
+        ("wordt", "word"),
+        ("kontainer", "container"),
+        ("chft", "gft"),
+        ("cadeau", "kado"),
+        ("bureau", "buro"),
+    ])
+    def test_variants_share_key(self, variant, word):
+        assert phonetic_key(variant) == phonetic_key(word)
+
+    @pytest.mark.parametrize("a,b", [
+        ("paspoort", "rijbewijs"),
+        ("bouwen", "bouwer"),
+        ("dorp", "torp"),
+    ])
+    def test_different_words_differ(self, a, b):
+        assert phonetic_key(a) != phonetic_key(b)
+
+    def test_matcher_variations_are_folded(self):
+        assert DutchMatcher().spelling_variations is SPELLING_VARIATIONS
+        for canonical, spellings in SPELLING_VARIATIONS.items():
+            assert {phonetic_key(s) for s in spellings} == {phonetic_key(canonical)}
+
+
+class TestPhoneticIndex:
+    """Test key lookups and tie-breaking."""
+
+    def test_lookup_most_frequent_first(self):
+        index = PhoneticIndex(["wijk", "weik", "paspoort"], {"wijk": 1, "weik": 3, "paspoort": 1})
+
+        assert index.lookup("wyk") == ["weik", "wijk"]
+        assert index.lookup("xqz") == []
+        assert len(index) == 2
+
+    def test_correct_prefers_closest(self):
+        index = PhoneticIndex(["wijk", "weik"], {"wijk": 1, "weik": 3})
+
+        assert index.correct("wijc") == "wijk"
+        assert index.correct("wyk") == "weik"
+        assert index.correct("dorp") is None
+
+    def test_correct_bounded_by_length(self):
+        index = PhoneticIndex(["kado", "rijbewijs"], {"kado": 1, "rijbewijs": 1})
+
+        # Same key, but four edits on six letters
+        assert phonetic_key("cadeau") == phonetic_key("kado")
+        assert max_distance("cadeau") == 3
+        assert index.correct("cadeau") is None
+        assert index.correct("rijbewys") == "rijbewijs"
+
+
+class TestPhoneticCorrection:
+    """Test the phonetic stage in SpellingCorrector."""
+
+    @pytest.fixture
+    def corrector(self):
+        corrector = SpellingCorrector()
+        corrector.add_all(["rijbewijs", "paspoort", "container", "amsterdam", "tijd"])
+        return corrector.freeze()
+
+    def test_beyond_edit_budget(self, corrector):
+        # Four edits away (within the phonetic bound), but the same sound
+        assert corrector.correct("reibeweys") == "rijbewijs"
+        corrector.phonetic = None
+        assert corrector.correct("reibeweys") is None
+
+    def test_short_and_known_tokens_untouched(self, corrector):
+        assert corrector.correct("tyd") is None
+        assert corrector.correct("paspoort") is None
+        assert corrector.correct("kont") is None
+
+    def test_from_parts_keeps_phonetic_stage(self, corrector):
+        restored = SpellingCorrector.from_parts(*corrector.parts())
+
+        assert restored.correct("kontainer") == "container"
+
+    def test_match_services_with_variant(self, matcher, snapshot):
+        matches = matcher.match_services("rijbewys", snapshot)
+
+        assert matches[0][0]['id'] == 3
+
+    def test_original_word_still_scored(self, matcher):
+        # "rijbewys" is corrected to "rijbewijs", and is also inside a name
+        snapshot = CatalogSnapshot.build(matcher, [
+            {"id": 1, "name": "Rijbewijs aanvragen"},
+            {"id": 2, "name": "Bromfietsrijbewys omwisselen"},
+        ], [], [])
+
+        assert snapshot.spelling.correct("rijbewys") == "rijbewijs"
+        assert [service["id"] for service, _ in matcher.match_services("rijbewys", snapshot)] == [1, 2]
@@ -0,0 +1,68 @@
+"""
+Unit tests for the prefix completion index.
+"""
+from app.services.prefix_index import PrefixIndex
+
+
+class TestPrefixIndex:
+    """Test PrefixIndex lookups."""
+
+    def build_index(self):
+        index = PrefixIndex()
+        index.add_all(["paspoort", "aanvragen"], 1)
+        index.add_all(["parkeervergunning", "parkeren", "aanvragen"], 2)
+        index.add_all(["rijbewijs"], 3)
+        return index.freeze()
+
+    def test_prefix_lookup(self):
+        index = self.build_index()
+
+        assert index.lookup("pa") == {1, 2}
+        assert index.lookup("park") == {2}
+        assert index.lookup("aanvragen") == {1, 2}
+
+    def test_no_hits(self):
+        index = self.build_index()
+
+        assert index.lookup("xqz") == set()
+        assert index.lookup("") == set()
+        assert index.lookup("rijbewijzen") == set()
+
+    def test_exact_postings(self):
+        index = self.build_index()
+
+        assert list(index.postings("aanvragen")) == [1, 2]
+        assert list(index.postings("park")) == []
+        assert list(index.postings("zzz")) == []
+
+    def test_terms_sorted_and_deduplicated(self):
+        index = self.build_index()
+
+        assert index.terms() == sorted(set(index.terms()))
+        assert len(index) == 5
+
+
+class TestPrefixRetrieval:
+    """Test the matcher's prefix retrieval stage on a snapshot."""
+
+    def test_snapshot_indexes_names_and_keywords(self, snapshot):
+        assert snapshot.service_prefixes.lookup("paspo") == {1}
+        assert snapshot.gemeente_prefixes.lookup("den ha") == {3}
+        assert snapshot.gemeente_prefixes.lookup("hertogen") == {5}
+
+    def test_retrieval_narrows_candidates(self, matcher, snapshot):
+        query = matcher.prepare_text("verhu")
+        candidates = matcher.retrieve_candidates(query, snapshot.service_prefixes, snapshot.services)
+
+        assert [c.service["id"] for c in candidates] == [5]
+
+    def test_retrieval_falls_back_to_full_scan(self, matcher, snapshot, services):
+        """Description-only words without prefix hits still reach the scorer."""
+        query = matcher.prepare_text("wijk")
+        candidates = matcher.retrieve_candidates(query, snapshot.service_prefixes, snapshot.services)
+
+        assert len(candidates) == len(snapshot.services)
+        assert (
+            [(s["id"], c) for s, c in matcher.match_services("wijk", snapshot)]
+            == [(s["id"], c) for s, c in matcher.match_services("wijk", services)]
+        )
@@ -0,0 +1,171 @@
+"""
+Unit tests for the sharded multi-process matcher.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import pytest
+
+from app.services.catalog import CatalogSnapshot
+from app.services.dutch_matcher import DutchMatcher
+from app.services.match_pipeline import MatchBudget, MatchTrace
+from app.services.sharded_matcher import ShardedMatcher, ShardPool
+
+
+@pytest.fixture(scope="module")
+def sharded(module_snapshot):
+    matcher = DutchMatcher()
+    engine = ShardedMatcher(module_snapshot, matcher, n_shards=3)
+    yield engine, matcher, module_snapshot
+    engine.close()
+
+
+class TestShardedMatcher:
+    """Test scatter/gather results against the single-process matcher."""
+
+    def test_shards_partition_catalog(self, sharded):
+        engine, _, _ = sharded
+
+        assert engine.n_shards == 3
+        assert engine.offsets == [0, 3, 6]
+
+    @pytest.mark.parametrize("query", [
+        "park", "paspo", "aanvragen", "vergunning", "rijbeweis", "verhuizng",
+        "wijk",
+        "ouwen",  # corrected to "bouwen", also inside "trouwen"
+        "xqz",  # no index hit in any shard: full-scan fallback
+    ])
+    def test_matches_single_process(self, sharded, query):
+        engine, matcher, snapshot = sharded
+
+        assert engine.match_services(query) == matcher.match_services(query, snapshot)
+        assert engine.match_services(query, top_k=2) == matcher.match_services(query, snapshot, top_k=2)
+
+    def test_more_shards_than_services(self, matcher):
+        snapshot = CatalogSnapshot.build(matcher, [{"id": 1, "name": "Paspoort aanvragen"}], [], [])
+        engine = ShardedMatcher(snapshot, matcher, n_shards=4)
+        try:
+            assert engine.n_shards == 1
+            assert engine.match_services("paspoort")[0][0]["id"] == 1
+        finally:
+            engine.close()
+
+
+class TestShardedConcurrency:
+    """Test that requests are multiplexed over the workers, not serialized."""
+
+    def test_requests_in_flight_together(self, monkeypatch, sharded):
+        engine, matcher, snapshot = sharded
+        both_sent = threading.Barrier(2, timeout=10)
+        gather = engine._gather
+
+        def gather_together(call):
+            # Only returns once the other request has been sent too
+            both_sent.wait()
+            return gather(call)
+
+        monkeypatch.setattr(engine, "_gather", gather_together)
+        queries = ["paspo", "park"]
+        with ThreadPoolExecutor(2) as pool:
+            results = list(pool.map(engine.match_services, queries))
+
+        assert results == [matcher.match_services(query, snapshot) for query in queries]
+
+    def test_concurrent_results_match_single_process(self, sharded):
+        engine, matcher, snapshot = sharded
+        queries = ["park", "paspo", "rijbeweis", "verhuizng", "ouwen", "wijk"] * 5
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda query: engine.match_services(query, top_k=3), queries))
+
+        assert results == [matcher.match_services(query, snapshot, top_k=3) for query in queries]
+
+
+def grown_snapshot(matcher, snapshot):
+    """The services of snapshot plus one"""
+    rows = [dict(entry.service) for entry in snapshot.services] + [{
+        "id": 8,
+        "name": "Hondenbelasting betalen",
+        "description": "Belasting betalen voor uw hond",
+        "keywords": ["hond", "belasting"],
+        "category": "Belastingen",
+    }]
+    return CatalogSnapshot.build(matcher, rows, [], [])
+
+
+class TestShardedReload:
+    """Test that a new snapshot is loaded into the running workers."""
+
+    def test_load_keeps_workers(self, matcher, module_snapshot):
+        engine = ShardedMatcher(module_snapshot, matcher, n_shards=3)
+        try:
+            pids = [process.pid for process in engine._processes]
+            grown = grown_snapshot(matcher, module_snapshot)
+            engine.load(grown)
+
+            assert [process.pid for process in engine._processes] == pids
+            assert engine.snapshot is grown
+            assert engine.offsets == [0, 3, 6]
+            for query in ["hond", "paspo", "ouwen", "xqz"]:
+                assert engine.match_services(query) == matcher.match_services(query, grown)
+        finally:
+            engine.close()
+
+    def test_pool_loads_newer_snapshots_only(self, matcher, module_snapshot):
+        pool = ShardPool()
+        try:
+            engine = pool.get(module_snapshot, matcher, 2)
+            grown = grown_snapshot(matcher, module_snapshot)
+
+            assert pool.get(grown, matcher, 2) is engine
+            assert engine.snapshot is grown
+            # A request still holding the older snapshot does not load it back
+            assert pool.get(module_snapshot, matcher, 2) is engine
+            assert engine.snapshot is grown
+        finally:
+            pool.close()
+
+
+@pytest.fixture(scope="module")
+def damerau_sharded(module_snapshot):
+    engine = ShardedMatcher(module_snapshot, DutchMatcher(scorer="damerau"), n_shards=3)
+    yield engine
+    engine.close()
+
+
+def count_scatters(monkeypatch, engine):
+    """Budgets (in ms) of the scatters engine makes from now on"""
+    budgets = []
+    scatter = engine._scatter
+
+    def counting(message, *args):
+        budgets.append(message[-2])
+        return scatter(message, *args)
+
+    monkeypatch.setattr(engine, "_scatter", counting)
+    return budgets
+
+
+class TestShardedBudget:
+    """Test that the fallback scatter only gets what is left of the budget."""
+
+    def test_fallback_gets_remaining_budget(self, monkeypatch, damerau_sharded):
+        scatters = count_scatters(monkeypatch, damerau_sharded)
+        damerau_sharded.match_services("xqz", budget=MatchBudget(10_000))
+
+        assert len(scatters) == 2
+        assert scatters[1] < scatters[0] <= 10_000
+
+    def test_spent_budget_skips_fallback(self, monkeypatch, damerau_sharded):
+        scatters = count_scatters(monkeypatch, damerau_sharded)
+        trace = MatchTrace("sharded")
+
+        assert damerau_sharded.match_services("xqz", trace=trace, budget=MatchBudget(1e-3)) == []
+        assert len(scatters) == 1
+        assert trace.partial
+
+    def test_heuristic_scorer_has_no_fallback(self, monkeypatch, sharded):
+        engine, _, _ = sharded
+        scatters = count_scatters(monkeypatch, engine)
+
+        assert engine.match_services("xqz", budget=MatchBudget(10_000)) == []
+        assert len(scatters) == 1
@@ -0,0 +1,80 @@
+"""
+Unit tests for symmetric-delete spelling correction.
+"""
+from app.services.match_pipeline import MatchBudget
+from app.services.spelling import SpellingCorrector, deletes
+
+
+class TestDeletes:
+    """Test delete generation."""
+
+    def test_deletes(self):
+        assert deletes("abc", 1) == {"abc", "bc", "ac", "ab"}
+        assert "a" in deletes("abc", 2)
+
+
+class TestSpellingCorrector:
+    """Test query token correction."""
+
+    def build_corrector(self):
+        corrector = SpellingCorrector()
+        corrector.add_all(["paspoort", "rijbewijs", "verhuizing", "vergunning", "amsterdam"])
+        corrector.add("vergunning")
+        return corrector.freeze()
+
+    def test_corrects_within_distance_two(self):
+        corrector = self.build_corrector()
+
+        assert corrector.correct("paspoordt") == "paspoort"
+        assert corrector.correct("rijbeweis") == "rijbewijs"
+        assert corrector.correct("amsterdm") == "amsterdam"
+
+    def test_leaves_known_words_and_prefixes(self):
+        corrector = self.build_corrector()
+
+        assert corrector.correct("paspoort") is None
+        assert corrector.correct("paspo") is None
+        assert corrector.correct("id") is None
+
+    def test_no_correction_beyond_distance(self):
+        corrector = self.build_corrector()
+
+        assert corrector.correct("xqzwvbn") is None
+
+    def test_correct_words_mapping(self):
+        corrector = self.build_corrector()
+
+        assert corrector.correct_words(["paspoordt", "verhu"]) == {"paspoordt": "paspoort"}
+
+
+class TestQueryCorrection:
+    """Test corrected tokens feed service matching."""
+
+    def test_misspelled_query_matches_service(self, matcher, snapshot):
+        matches = matcher.match_services("rijbeweis", snapshot)
+
+        assert matches[0][0]["id"] == 3
+
+    def test_misspelled_gemeente(self, matcher, snapshot):
+        matches = matcher.match_gemeentes("amsterdm", snapshot)
+
+        assert matches[0][0]["name"] == "Amsterdam"
+
+    def test_corrected_query_text(self, matcher, snapshot):
+        query = matcher.correct_query(matcher.prepare_text("paspoordt amsterdam"), snapshot.spelling)
+
+        assert query.normalized == "paspoort amsterdam"
+        assert query.words == frozenset({"paspoort", "amsterdam"})
+
+    def test_original_query_still_scored(self, matcher, snapshot):
+        # "ouwen" is corrected to "bouwen" but is also inside "trouwen"
+        assert snapshot.spelling.correct("ouwen") == "bouwen"
+        matches = {service["id"]: confidence for service, confidence in matcher.match_services("ouwen", snapshot)}
+
+        assert set(matches) == {6, 7}
+        assert matches[6] > matches[7]
+
+    def test_original_query_still_scored_with_budget(self, matcher, snapshot):
+        matches = matcher.match_services("ouwen", snapshot, budget=MatchBudget(0))
+
+        assert [service["id"] for service, _ in matches] == [6, 7]
@@ -0,0 +1,93 @@
+"""
+Unit tests for the Dutch stemmer and stem-based keyword matching.
+"""
+import pytest
+
+from app.services.catalog import PreparedText
+from app.services.stemmer import stem, stems
+
+
+class TestStem:
+    """Test that inflected forms share a stem."""
+
+    @pytest.mark.parametrize("inflected,base", [
+        ("vergunningen", "vergunning"),
+        ("containers", "container"),
+        ("paspoorten", "paspoort"),
+        ("mogelijkheden", "mogelijkheid"),
+        ("straten", "straat"),
+        ("parkeren", "parkeer"),
+        ("parkeert", "parkeer"),
+        ("verhuisd", "verhuizen"),
+        ("verhuizing", "verhuizen"),
+        ("aanvraagt", "aanvragen"),
+        ("wordt", "worden"),
+        ("opzegt", "opzeggen"),
+        ("rijbewijzen", "rijbewijs"),
+    ])
+    def test_same_stem(self, inflected, base):
+        assert stem(inflected) == stem(base)
+
+    @pytest.mark.parametrize("a,b", [
+        ("paspoort", "rijbewijs"),
+        ("bouwen", "bouwer"),
+        ("afval", "afvoer"),
+    ])
+    def test_different_stems(self, a, b):
+        assert stem(a) != stem(b)
+
+    @pytest.mark.parametrize("word", ["id", "gft", "brp", "ab"])
+    def test_short_words_unchanged(self, word):
+        assert stem(word) == word
+
+    def test_memoized(self):
+        stem("gemeenten")
+        hits = stem.cache_info().hits
+        stem("gemeenten")
+
+        assert stem.cache_info().hits == hits + 1
+
+
+class TestPreparedStems:
+    """Test stems stored alongside the keywords."""
+
+    def test_stems_computed(self):
+        text = PreparedText("vergunningen aanvragen", frozenset(["vergunningen", "aanvragen"]))
+
+        assert text.stems == stems(["vergunning", "aanvraag"])
+
+    def test_uninflected_stems_share_words(self):
+        words = frozenset(["gft", "id"])
+        assert PreparedText("gft id", words).stems is words
+
+    def test_catalog_fields_have_stems(self, snapshot):
+        name = snapshot.services[4].name  # Verhuizing doorgeven
+
+        assert stem("verhuisd") in name.stems
+
+
+class TestStemMatching:
+    """Test that inflected queries match by stem Jaccard."""
+
+    def test_verb_form_matches(self, matcher, snapshot):
+        matches = matcher.match_services("verhuisd", snapshot)
+
+        assert [service['id'] for service, _ in matches] == [5]
+
+    def test_stem_jaccard_score(self, matcher):
+        query = matcher.prepare_text("verlengd")
+        target = matcher.prepare_text("verlengen")
+
+        assert matcher.score_prepared(query, target) == (True, 0.85)
+
+    def test_word_matches_unchanged(self, matcher):
+        query = matcher.prepare_text("paspoort verlengen")
+        target = matcher.prepare_text("verlengen paspoort")
+
+        assert matcher.score_prepared(query, target) == (True, 0.85)
+
+    def test_below_threshold(self, matcher):
+        query = matcher.prepare_text("verlengd")
+        target = matcher.prepare_text("paspoort rijbewijs verlengen")
+
+        assert matcher.score_prepared(query, target) == (False, 0.0)
@@ -0,0 +1,74 @@
+"""
+Unit tests for the substring index of exact retrieval candidates.
+"""
+import random
+import re
+
+from app.services.substring_index import SubstringIndex
+
+
+def build_index(matcher, texts):
+    return SubstringIndex([matcher.prepare_text(text) for text in fields] for fields in texts)
+
+
+class TestSubstringIndex:
+    """Test each lookup against the fields it must find."""
+
+    TEXTS = [
+        ["Paspoort aanvragen", "Nieuw paspoort aanvragen of verlengen"],
+        ["Afvalcontainer", "Melding openbare ruimte"],
+        ["Rijbewijs", "Verhuizing doorgeven aan de gemeente"],
+    ]
+
+    def test_containing(self, matcher):
+        index = build_index(matcher, self.TEXTS)
+
+        assert index.containing("verlengen") == {0}
+        assert index.containing("val") == {1}
+        assert index.containing("n") == {0, 1, 2}
+        assert index.containing("xqz") == set()
+        # Never across fields or entries
+        assert index.containing("aanvragen nieuw") == set()
+
+    def test_inside(self, matcher):
+        index = build_index(matcher, self.TEXTS)
+
+        assert index.inside("afvalcontainermelding") == {1}
+        assert index.inside("mijnrijbewijs") == {2}
+        # Field stop words are not looked up
+        assert index.inside("aanvraag") == set()
+
+    def test_field_without_words_always_qualifies(self, matcher):
+        index = build_index(matcher, [["Paspoort", ""], ["Rijbewijs"]])
+
+        assert index.inside("xqz") == {0}
+
+    def test_candidates_cover_stems(self, matcher):
+        index = build_index(matcher, [["Parkeervergunningen"], ["Paspoort"]])
+
+        assert 0 in index.candidates(matcher.prepare_text("vergunning"))
+
+
+class TestCandidatesSuperset:
+    """Test that the scorer never matches an entry outside the candidates."""
+
+    def test_random_queries(self, matcher, snapshot):
+        index = matcher.substring_index(snapshot)
+        words = sorted({
+            word for entry in snapshot.services for field in snapshot.service_fields(entry)
+            for word in re.findall(r'\w+', field.normalized)
+        })
+        rng = random.Random(5)
+        for _ in range(300):
+            word = rng.choice(words)
+            start = rng.randrange(len(word))
+            query = matcher.prepare_text(rng.choice([
+                word,
+                word[start:start + rng.randint(1, 6)],
+                word + rng.choice(words),
+                " ".join(rng.sample(words, 2)),
+            ]))
+            candidates = index.candidates(query)
+            for doc_id, entry in enumerate(snapshot.services):
+                if doc_id not in candidates:
+                    assert matcher.score_service(query, entry) == 0.0, query.normalized
@@ -0,0 +1,101 @@
+"""
+Unit tests for the in-process suggestion result cache.
+"""
+import pytest
+
+from app.services import suggestion_cache as suggestion_cache_module
+from app.services.catalog_store import catalog_store
+from app.services.suggestion_cache import SuggestionCache
+
+from .conftest import FakeClock
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock(1000.0)
+    monkeypatch.setattr(suggestion_cache_module.time, "monotonic", fake)
+    return fake
+
+
+class TestSuggestionCache:
+    """Test LRU eviction, TTL expiry and counters."""
+
+    def test_hit_and_miss(self):
+        cache = SuggestionCache(max_entries=4)
+
+        assert cache.get("park") is None
+        cache.put("park", ["a"])
+        assert cache.get("park") == ["a"]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = SuggestionCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.evictions == 1
+        assert len(cache) == 2
+
+    def test_entries_expire(self, clock):
+        cache = SuggestionCache(max_entries=4, ttl_seconds=30)
+        cache.put("park", ["a"])
+
+        clock.now += 29
+        assert cache.get("park") == ["a"]
+        clock.now += 1
+        assert cache.get("park") is None
+        assert cache.expirations == 1
+        assert len(cache) == 0
+
+    def test_put_refreshes_ttl(self, clock):
+        cache = SuggestionCache(max_entries=4, ttl_seconds=30)
+        cache.put("park", ["a"])
+        clock.now += 20
+        cache.put("park", ["b"])
+        clock.now += 20
+
+        assert cache.get("park") == ["b"]
+
+    def test_disabled(self):
+        cache = SuggestionCache(max_entries=0)
+        cache.put("park", ["a"])
+
+        assert cache.get("park") is None
+        assert cache.stats()["enabled"] is False
+        assert cache.misses == 0
+
+    def test_stats(self):
+        cache = SuggestionCache(max_entries=1)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        cache.put("b", 2)
+
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["evictions"] == 1
+        assert stats["size"] == 1
+        assert stats["hit_rate"] == 0.5
+
+
+class TestSuggestionRouteCache:
+    """Test that the route serves repeats from the cache until the catalog changes."""
+
+    def test_repeated_query_is_cached(self, route):
+        stub = route()
+
+        assert stub.request("Park").cached is False
+        assert stub.request(" park ").cached is True
+        assert stub.request("park", max_results=3).cached is False
+        assert len(stub.calls) == 2
+
+    def test_catalog_change_retires_entries(self, route):
+        stub = route()
+        stub.request("park")
+        catalog_store.invalidate()  # what every admin write does
+
+        assert stub.request("park").cached is False
+        assert len(stub.calls) == 2
@@ -0,0 +1,52 @@
+"""
+Unit tests for the NumPy TF-IDF engine.
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.services.tfidf_engine import TfidfEngine
+
+
+@pytest.fixture
+def engine(snapshot, matcher):
+    return TfidfEngine(snapshot, matcher)
+
+
+class TestTfidfEngine:
+    """Test TF-IDF matching and top-k selection."""
+
+    def test_return_shape(self, engine):
+        """Same List[Tuple[Dict, float]] shape as DutchMatcher.match_services."""
+        matches = engine.match_services("paspoort")
+
+        assert matches[0][0]["id"] == 2
+        assert isinstance(matches[0][1], float)
+        assert all(a[1] >= b[1] for a, b in zip(matches, matches[1:]))
+
+    def test_prefix_and_typo(self, engine):
+        assert engine.match_services("park")[0][0]["id"] == 1
+        assert engine.match_services("rijbeweis")[0][0]["id"] == 3
+        assert engine.match_services("afvalcontaner")[0][0]["id"] == 4
+
+    def test_top_k(self, engine):
+        full = engine.match_services("aanvragen", min_confidence=0.0)
+        top = engine.match_services("aanvragen", min_confidence=0.0, top_k=2)
+
+        assert len(top) == 2
+        assert top == full[:2]
+
+    def test_unknown_query(self, engine):
+        assert engine.match_services("xq") == []
+
+    def test_field_weights_configurable(self, snapshot, matcher):
+        engine = TfidfEngine(snapshot, matcher, field_weights={"description": 0.0, "category": 0.0})
+
+        assert engine.field_weights["name"] == 1.0
+        assert engine.field_weights["description"] == 0.0
+
+    def test_engine_cached_per_snapshot(self, snapshot, matcher):
+        first = snapshot.get_engine("tfidf", lambda s: TfidfEngine(s, matcher))
+        second = snapshot.get_engine("tfidf", lambda s: TfidfEngine(s, matcher))
+
+        assert first is second
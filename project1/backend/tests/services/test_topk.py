@@ -0,0 +1,76 @@
+"""
+Unit tests for bounded top-k selection.
+"""
+import random
+
+from app.services.topk import TopK
+
+
+class TestTopK:
+    """Test TopK against sort + truncate."""
+
+    def test_keeps_best_k(self):
+        top = TopK(2)
+        for score, item in [(0.5, "a"), (0.9, "b"), (0.7, "c"), (0.1, "d")]:
+            top.push(score, item)
+
+        assert top.results() == [("b", 0.9), ("c", 0.7)]
+        assert top.threshold() == 0.7
+
+    def test_unbounded_keeps_everything(self):
+        top = TopK()
+        for score in [0.3, 0.1, 0.2]:
+            top.push(score, score)
+
+        assert len(top) == 3
+        assert top.threshold() == float('-inf')
+        assert [s for _, s in top.results()] == [0.3, 0.2, 0.1]
+
+    def test_zero_k_keeps_nothing(self):
+        top = TopK(0)
+        assert not top.push(1.0, "a")
+        assert top.results() == []
+
+    def test_ties_keep_insertion_order(self):
+        top = TopK(2)
+        for item in "abc":
+            top.push(0.5, item)
+
+        assert top.results() == [("a", 0.5), ("b", 0.5)]
+
+    def test_matches_stable_sort(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            k = rng.randint(0, 8)
+            items = [(rng.choice([0.25, 0.5, 0.75, rng.random()]), i) for i in range(rng.randint(0, 30))]
+            top = TopK(k)
+            for score, item in items:
+                top.push(score, item)
+
+            expected = sorted(items, key=lambda x: x[0], reverse=True)[:k]
+            assert top.results() == [(item, score) for score, item in expected]
+
+    def test_order_matches_stable_sort(self):
+        rng = random.Random(11)
+        for _ in range(200):
+            k = rng.randint(0, 8)
+            items = [(rng.choice([0.25, 0.5, 0.75, rng.random()]), i) for i in range(rng.randint(0, 30))]
+            top = TopK(k)
+            for score, item in rng.sample(items, len(items)):
+                top.push(score, item, order=item)
+
+            expected = sorted(items, key=lambda x: x[0], reverse=True)[:k]
+            assert top.results() == [(item, score) for score, item in expected]
+
+
+class TestTopKInMatcher:
+    """Test that bounded matching returns the head of the full ranking."""
+
+    def test_match_services_top_k(self, matcher, snapshot):
+        for query in ["aanvragen", "vergunning", "park", "paspoort"]:
+            full = matcher.match_services(query, snapshot)
+            assert matcher.match_services(query, snapshot, top_k=2) == full[:2]
+
+    def test_match_gemeentes_top_k(self, matcher, snapshot):
+        full = matcher.match_gemeentes("den", snapshot)
+        assert matcher.match_gemeentes("den", snapshot, top_k=1) == full[:1]
@@ -0,0 +1,63 @@
+"""
+Unit tests for the character-trigram index.
+"""
+from app.services.trigram_index import TrigramIndex, trigrams
+
+
+class TestTrigrams:
+    """Test trigram extraction."""
+
+    def test_padded_trigrams(self):
+        assert trigrams("id") == [" id", "id "]
+        assert trigrams("pas") == [" pa", "pas", "as "]
+
+
+class TestTrigramIndex:
+    """Test typo candidate generation."""
+
+    def build_index(self):
+        index = TrigramIndex(min_similarity=0.5)
+        index.add_all(["rijbewijs", "aanvragen"], 1)
+        index.add_all(["paspoort", "aanvragen"], 2)
+        index.add_all(["afvalcontainer"], 3)
+        return index.freeze()
+
+    def test_typo_finds_token(self):
+        index = self.build_index()
+
+        assert index.similar_tokens("rijbeweis")[0][0] == "rijbewijs"
+        assert index.lookup("rijbeweis") == {1}
+        assert index.lookup("paspoordt") == {2}
+        assert index.lookup("afvalcontaner") == {3}
+
+    def test_min_overlap_threshold(self):
+        index = self.build_index()
+
+        assert index.lookup("xqz") == set()
+        assert index.lookup("water") == set()
+
+    def test_exact_token_docs(self):
+        index = self.build_index()
+
+        assert index.token_docs("aanvragen") == {1, 2}
+        assert index.token_docs("onbekend") == set()
+
+
+class TestTrigramRetrieval:
+    """Test the trigram stage of candidate retrieval."""
+
+    def test_typo_narrows_candidates(self, matcher, snapshot):
+        query = matcher.prepare_text("rijbeweis")
+        candidates = matcher.retrieve_candidates(
+            query, snapshot.service_prefixes, snapshot.services, snapshot.service_trigrams
+        )
+
+        assert [c.service["id"] for c in candidates] == [3]
+
+    def test_description_word_without_prefix_hit(self, matcher, snapshot):
+        query = matcher.prepare_text("wijk")
+        candidates = matcher.retrieve_candidates(
+            query, snapshot.service_prefixes, snapshot.services, snapshot.service_trigrams
+        )
+
+        assert [c.service["id"] for c in candidates] == [1]